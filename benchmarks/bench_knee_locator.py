@@ -0,0 +1,241 @@
+"""Benchmark KneeLocator across every code path and a range of input sizes.
+
+Runs the full ``curve`` x ``direction`` x ``interp_method`` x ``online``
+matrix on the ``DataGenerator`` curves and on synthetic curves of
+increasing length, recording the best wall time and the peak traced
+memory of each case, along with the time and memory of each step of
+``KneeLocator`` from a profiled run.
+
+Usage::
+
+    # measure and save a baseline
+    python benchmarks/bench_knee_locator.py --save baseline.json
+
+    # after a change, compare against it
+    python benchmarks/bench_knee_locator.py --save new.json --compare baseline.json
+
+The comparison exits with status 1 if any case got slower than
+``--threshold`` times its baseline time, by more than ``--min-delta``
+seconds.
+
+``--threads N`` also times ``kneedle`` on long curves from 1 and from N
+threads sharing the same inputs. Its NumPy steps release the GIL, so the
+threaded run should be faster on a machine with N free cores.
+"""
+
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from kneed import DataGenerator, KneeLocator, __version__, kneedle
+
+CURVES = ["concave", "convex"]
+DIRECTIONS = ["increasing", "decreasing"]
+INTERP_METHODS = ["interp1d", "polynomial"]
+ONLINE = [False, True]
+DEFAULT_SIZES = [10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+
+
+def generated_curves():
+    """The sample curves shipped with DataGenerator."""
+    yield "figure2", DataGenerator.figure2()
+    yield "noisy_gaussian", DataGenerator.noisy_gaussian(N=1000)
+    yield "bumpy", DataGenerator.bumpy()
+    yield "concave_increasing", DataGenerator.concave_increasing()
+    yield "concave_decreasing", DataGenerator.concave_decreasing()
+    yield "convex_increasing", DataGenerator.convex_increasing()
+    yield "convex_decreasing", DataGenerator.convex_decreasing()
+
+
+def synthetic_curve(n, curve, direction, seed=0):
+    """A noisy curve of length ``n`` with the requested shape."""
+    x = np.linspace(1.0, 10.0, n)
+    if curve == "concave":
+        y = np.log(x) if direction == "increasing" else -np.exp(x / 2)
+    else:
+        y = np.exp(x / 2) if direction == "increasing" else 1 / x
+    noise = np.random.RandomState(seed).normal(scale=1e-3 * np.ptp(y), size=n)
+    return x, y + noise
+
+
+def cases(sizes):
+    """Yield ``(name, x, y, params)`` for every benchmark case."""
+    matrix = list(itertools.product(CURVES, DIRECTIONS, INTERP_METHODS, ONLINE))
+    for name, (x, y) in generated_curves():
+        for curve, direction, interp_method, online in matrix:
+            yield name, x, y, dict(
+                curve=curve,
+                direction=direction,
+                interp_method=interp_method,
+                online=online,
+            )
+    for n in sizes:
+        for curve, direction, interp_method, online in matrix:
+            x, y = synthetic_curve(n, curve, direction)
+            yield "synthetic-{}".format(n), x, y, dict(
+                curve=curve,
+                direction=direction,
+                interp_method=interp_method,
+                online=online,
+            )
+
+
+def measure(x, y, params, min_time=0.2, max_repeats=50):
+    """Return the best wall time, peak traced memory and per-step records."""
+    timings = []
+    start = time.perf_counter()
+    while len(timings) < max_repeats and (
+        not timings or time.perf_counter() - start < min_time
+    ):
+        t0 = time.perf_counter()
+        KneeLocator(x, y, **params)
+        timings.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    try:
+        KneeLocator(x, y, **params)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # a separate run, the per-step memory tracing slows every step down
+    stages = KneeLocator(x, y, profile=True, **params).timings
+    return min(timings), peak, stages
+
+
+def thread_scaling(threads, n=2_000_000, n_curves=8, repeats=2):
+    """Return the best wall time of locating ``n_curves`` knees from one
+    and from ``threads`` threads."""
+    x = np.linspace(1, 10, n)
+    curves = [np.log(x) * (i + 1) for i in range(n_curves)]
+
+    def timed(workers):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(lambda y: kneedle(x, y), curves))
+        return time.perf_counter() - start
+
+    timed(threads)  # warm up
+    serial = min(timed(1) for _ in range(repeats))
+    threaded = min(timed(threads) for _ in range(repeats))
+    return serial, threaded
+
+
+def case_key(result):
+    return "{name}|{curve}|{direction}|{interp_method}|online={online}".format(**result)
+
+
+def run(sizes, verbose=True):
+    results = []
+    for name, x, y, params in cases(sizes):
+        best, peak, stages = measure(x, y, params)
+        result = dict(
+            name=name, n=len(x), time=best, peak_bytes=peak, stages=stages, **params
+        )
+        results.append(result)
+        if verbose:
+            print(
+                "{:<70} {:>12.6f} s {:>14,d} B".format(case_key(result), best, peak),
+                flush=True,
+            )
+            for stage, record in stages.items():
+                print(
+                    "    {:<66} {:>12.6f} s {:>14,d} B".format(
+                        stage, record["time"], record["bytes"]
+                    )
+                )
+    return {
+        "meta": {
+            "kneed": __version__,
+            "numpy": np.__version__,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, threshold, min_delta):
+    """Print the time ratio of each case against a baseline, return regressions."""
+    previous = {case_key(result): result for result in baseline["results"]}
+    regressions = []
+    print("\n{:<70} {:>8} {:>8}".format("case", "time", "memory"))
+    for result in report["results"]:
+        key = case_key(result)
+        if key not in previous:
+            continue
+        time_ratio = result["time"] / previous[key]["time"]
+        memory_ratio = result["peak_bytes"] / max(previous[key]["peak_bytes"], 1)
+        flag = ""
+        time_delta = result["time"] - previous[key]["time"]
+        if time_ratio > threshold and time_delta > min_delta:
+            regressions.append(key)
+            flag = "  <-- slower"
+        print(
+            "{:<70} {:>7.2f}x {:>7.2f}x{}".format(key, time_ratio, memory_ratio, flag)
+        )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=DEFAULT_SIZES,
+        help="lengths of the synthetic curves (default: 10 to 10**7)",
+    )
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.2,
+        help="time ratio above which a case counts as a regression (default: 1.2)",
+    )
+    parser.add_argument(
+        "--min-delta",
+        type=float,
+        default=1e-3,
+        help="ignore slowdowns smaller than this many seconds (default: 1e-3)",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        help="also time kneedle from this many threads against one",
+    )
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes)
+    if args.threads:
+        serial, threaded = thread_scaling(args.threads)
+        report["threads"] = dict(threads=args.threads, serial=serial, threaded=threaded)
+        print(
+            "\nkneedle, 1 thread {:.3f} s, {} threads {:.3f} s, {:.2f}x".format(
+                serial, args.threads, threaded, serial / threaded
+            )
+        )
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold, args.min_delta)
+        if regressions:
+            print("\n{} case(s) regressed.".format(len(regressions)))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,13 @@
 from .data_generator import DataGenerator
 from .knee_locator import KneeLocator
-from .shape_detector import find_shape
+from .core import kneedle
+from .result import KneeResult, results_to_arrow, results_to_numpy
+from .cache import KneeCache
+from .batch import locate_knees
+from .incremental import IncrementalKneeLocator
+from .chunked import ChunkedKneeLocator
+from .rolling import RollingKneeLocator
+from .adaptive import find_knee_adaptive
+from .shape_detector import find_shape, find_shape_batch
+from .smoothing import register_smoother
 from ._version import __version__
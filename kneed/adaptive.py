@@ -0,0 +1,122 @@
+import numpy as np
+from concurrent.futures import Executor
+from typing import Callable, Optional
+
+from .knee_locator import KneeLocator
+
+
+def _refinement_points(kl: KneeLocator, n_candidates: int, integer: bool) -> list:
+    """Points halfway to the neighbours of the most promising knee
+    candidates, those around the knee first."""
+    x = kl.x
+    candidates = []
+    if kl.knee_index is not None:
+        candidates.append(kl.knee_index)
+    # the highest local maxima of the difference curve, mapped back to x
+    maxima = kl.maxima_indices
+    order = np.argsort(kl.y_difference[maxima])[::-1]
+    candidates.extend(kl._knee_index(maxima[order]).tolist())
+
+    points = []
+    known = set(x.tolist())
+    seen = set()
+    for index in candidates:
+        if index in seen:
+            continue
+        seen.add(index)
+        for neighbour in (index - 1, index + 1):
+            if 0 <= neighbour < len(x):
+                midpoint = (x[index] + x[neighbour]) / 2
+                point = float(np.floor(midpoint)) if integer else float(midpoint)
+                if point not in known:
+                    known.add(point)
+                    points.append(point)
+        if len(seen) == n_candidates:
+            break
+    return points
+
+
+def find_knee_adaptive(
+    func: Callable[[float], float],
+    x_min: float,
+    x_max: float,
+    budget: int = 20,
+    initial_points: int = 6,
+    integer: bool = False,
+    patience: int = 3,
+    n_candidates: int = 2,
+    executor: Optional[Executor] = None,
+    **kwargs,
+) -> KneeLocator:
+    """Locate the knee of a curve that is expensive to evaluate.
+
+    Rather than requiring every y value up front, ``func`` is evaluated on
+    a coarse grid first. Each round then evaluates ``func`` halfway between
+    the current knee (and the highest local maxima of the difference
+    curve) and their neighbours, until the knee is stable, the resolution
+    cannot be refined further, or the evaluation budget is spent. When the
+    budget runs out within a round, the points around the knee are
+    evaluated first.
+
+    Parameters
+    ----------
+    func : callable
+        Maps an x value to its y value, e.g. the KMeans inertia for ``k``
+        clusters.
+    x_min : float
+        The smallest x value to evaluate.
+    x_max : float
+        The largest x value to evaluate.
+    budget : int, default 20
+        The maximum number of calls to ``func``.
+    initial_points : int, default 6
+        The number of evenly spaced points evaluated in the first round.
+    integer : bool, default False
+        If True, only evaluate ``func`` at integer x values, passed to it
+        as ``int``.
+    patience : int, default 3
+        The number of consecutive rounds the knee has to stay the same
+        before the search stops.
+    n_candidates : int, default 2
+        The number of knee candidates refined in each round.
+    executor : concurrent.futures.Executor, optional
+        If given, the points of each round are evaluated in parallel with
+        ``executor.map``.
+    **kwargs
+        Passed to ``KneeLocator``, e.g. ``curve`` and ``direction``.
+
+    Returns
+    -------
+    KneeLocator
+        Fitted on every point evaluated, sorted by x.
+    """
+    if budget < 2:
+        raise ValueError("budget must allow at least 2 evaluations.")
+    grid = np.linspace(x_min, x_max, min(initial_points, budget))
+    if integer:
+        grid = np.unique(np.round(grid))
+    points = sorted({float(value) for value in grid})
+
+    evaluated = {}
+    stable_rounds = 0
+    previous_knee = None
+    while True:
+        new_points = sorted(points[: budget - len(evaluated)])
+        arguments = [int(value) for value in new_points] if integer else new_points
+        results = (executor.map if executor is not None else map)(func, arguments)
+        evaluated.update(zip(new_points, results))
+
+        x = np.array(sorted(evaluated))
+        y = np.array([evaluated[value] for value in x])
+        kl = KneeLocator(x, y, **kwargs)
+
+        if kl.knee is not None and kl.knee == previous_knee:
+            stable_rounds += 1
+        else:
+            stable_rounds = 0
+        previous_knee = kl.knee
+        if stable_rounds >= patience or len(evaluated) >= budget:
+            return kl
+        points = _refinement_points(kl, n_candidates, integer)
+        if not points:
+            return kl
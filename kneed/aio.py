@@ -0,0 +1,213 @@
+"""Knee detection from asyncio code.
+
+The coroutines here run ``kneedle`` in an executor, so long curves do not
+block the event loop.
+"""
+
+import asyncio
+import os
+from collections import deque
+from concurrent.futures import Executor
+from functools import partial
+from typing import AsyncIterable, AsyncIterator, Iterable, Optional, Tuple, Union
+
+from .cache import KneeCache
+from .core import KneeResult, kneedle
+
+Curves = Union[Iterable[Tuple], AsyncIterable[Tuple]]
+
+
+async def _iterate(curves: Curves) -> AsyncIterator[Tuple]:
+    """Iterate over a plain or an asynchronous iterable."""
+    if hasattr(curves, "__aiter__"):
+        async for curve in curves:
+            yield curve
+    else:
+        for curve in curves:
+            yield curve
+
+
+class AsyncKneeLocator(object):
+    """Locate knees from coroutines, in a thread or process pool.
+
+    At most ``max_concurrency`` curves are processed at once, further
+    requests wait for a free slot. Identical requests made while the first
+    one is still running share its result instead of computing it again;
+    requests are identical when the bytes of ``x`` and ``y`` and every
+    argument are, see ``KneeCache.key``.
+
+    Parameters
+    ----------
+    executor : concurrent.futures.Executor, optional
+        Where ``kneedle`` runs. Defaults to the event loop's default
+        thread pool. With a ``ProcessPoolExecutor`` the curves are pickled
+        to the worker processes.
+    max_concurrency : int, optional
+        The maximum number of curves processed at once. Defaults to the
+        number of CPUs.
+    coalesce : bool, default True
+        Whether identical in-flight requests share one computation.
+        Identifying them hashes ``x`` and ``y`` on the event loop.
+
+    Attributes
+    ----------
+    in_flight : int
+        The number of distinct requests waiting or running.
+    """
+
+    def __init__(
+        self,
+        executor: Optional[Executor] = None,
+        max_concurrency: Optional[int] = None,
+        coalesce: bool = True,
+    ):
+        if max_concurrency is None:
+            max_concurrency = os.cpu_count() or 1
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be a positive integer.")
+        self.executor = executor
+        self.max_concurrency = max_concurrency
+        self.coalesce = coalesce
+        self._loop = None
+        self._semaphore = None
+        self._pending = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    def _bind(self):
+        """Start afresh in a new event loop, e.g. after ``asyncio.run``."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._pending = {}
+
+    async def _run(self, x, y, kwargs: dict) -> KneeResult:
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.executor, partial(kneedle, x, y, **kwargs)
+            )
+
+    async def locate_knee(self, x, y, **kwargs) -> KneeResult:
+        """Find the knee of a curve in the executor.
+
+        Parameters
+        ----------
+        x : array-like
+            x values.
+        y : array-like
+            y values.
+        **kwargs
+            Passed to ``kneedle``.
+
+        Returns
+        -------
+        KneeResult
+        """
+        self._bind()
+        if not self.coalesce:
+            return await self._run(x, y, kwargs)
+
+        key = KneeCache.key(x, y, **kwargs)
+        future = self._pending.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._run(x, y, kwargs))
+            self._pending[key] = future
+            pending = self._pending
+
+            def forget(done):
+                if pending.get(key) is done:
+                    del pending[key]
+
+            future.add_done_callback(forget)
+        # a cancelled caller must not cancel the others sharing the future
+        return await asyncio.shield(future)
+
+    async def locate_knees_many(
+        self, curves: Curves, **kwargs
+    ) -> AsyncIterator[KneeResult]:
+        """Find the knee of each curve of an iterable, in order.
+
+        ``curves`` is only read as fast as the results are consumed: at
+        most ``max_concurrency`` curves are taken from it ahead of the
+        results yielded so far.
+
+        Parameters
+        ----------
+        curves : iterable or async iterable
+            ``(x, y)`` pairs.
+        **kwargs
+            Passed to ``kneedle``.
+
+        Yields
+        ------
+        KneeResult
+            The result of each curve, in the order of ``curves``.
+        """
+        pending = deque()
+        try:
+            async for x, y in _iterate(curves):
+                if len(pending) >= self.max_concurrency:
+                    yield await pending.popleft()
+                pending.append(asyncio.ensure_future(self.locate_knee(x, y, **kwargs)))
+            while pending:
+                yield await pending.popleft()
+        finally:
+            # the consumer stopped early, or a curve failed
+            for future in pending:
+                future.cancel()
+
+
+_default = None
+
+
+def _default_locator() -> AsyncKneeLocator:
+    global _default
+    if _default is None:
+        _default = AsyncKneeLocator()
+    return _default
+
+
+async def locate_knee(x, y, **kwargs) -> KneeResult:
+    """Find the knee of a curve without blocking the event loop.
+
+    Runs ``kneedle`` in the loop's default thread pool, through a shared
+    ``AsyncKneeLocator``. Create an ``AsyncKneeLocator`` to choose the
+    executor and the concurrency limit.
+
+    Parameters
+    ----------
+    x : array-like
+        x values.
+    y : array-like
+        y values.
+    **kwargs
+        Passed to ``kneedle``.
+
+    Returns
+    -------
+    KneeResult
+    """
+    return await _default_locator().locate_knee(x, y, **kwargs)
+
+
+def locate_knees_many(curves: Curves, **kwargs) -> AsyncIterator[KneeResult]:
+    """Find the knee of each curve of an iterable without blocking the
+    event loop, see ``AsyncKneeLocator.locate_knees_many``.
+
+    Parameters
+    ----------
+    curves : iterable or async iterable
+        ``(x, y)`` pairs.
+    **kwargs
+        Passed to ``kneedle``.
+
+    Returns
+    -------
+    async iterator of KneeResult
+        The result of each curve, in the order of ``curves``.
+    """
+    return _default_locator().locate_knees_many(curves, **kwargs)
@@ -0,0 +1,91 @@
+"""Knee detection on long-format Arrow tables."""
+
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+from .batch import locate_knees_grouped
+from .result import _import_pyarrow
+
+RESULT_COLUMNS = ("knee", "knee_y", "norm_knee", "norm_knee_y")
+
+
+def knees_by_group(
+    table,
+    by: Union[str, Sequence[str]],
+    x: Optional[str],
+    y: str,
+    **kwargs,
+):
+    """Locate the knee of every group of rows of an Arrow table.
+
+    The Arrow counterpart of ``kneed.pandas.knees_by_group``: the columns
+    are sorted once and the groups are processed as slices of them, see
+    ``kneed.batch.locate_knees_grouped``. The rows of each group are used
+    in their order in ``table``. Needs pyarrow.
+
+    Parameters
+    ----------
+    table : pyarrow.Table
+        One row per point, in long format.
+    by : str or list of str
+        The columns identifying a curve. Rows with a null key are ignored.
+    x : str or None
+        The x column. If None, x is the position of each row in its group.
+    y : str
+        The y column.
+    **kwargs
+        Passed to ``kneed.batch.locate_knees``, e.g. ``S``, ``curve`` or
+        ``direction``.
+
+    Returns
+    -------
+    pyarrow.Table
+        One row per group, sorted by the group keys, with the key columns
+        and the columns ``knee``, ``knee_y``, ``norm_knee``,
+        ``norm_knee_y`` and ``n_points``. Groups without a knee/elbow hold
+        null.
+    """
+    pyarrow = _import_pyarrow()
+    by = [by] if isinstance(by, str) else list(by)
+
+    valid = np.ones(table.num_rows, dtype=bool)
+    for name in by:
+        valid &= table[name].is_valid().to_numpy(zero_copy_only=False)
+
+    # number the distinct keys of each column, then the distinct
+    # combinations, in sorted order
+    uniques = []
+    codes = []
+    for name in by:
+        values = table[name].to_numpy(zero_copy_only=False)[valid]
+        column_uniques, inverse = np.unique(values, return_inverse=True)
+        uniques.append(column_uniques)
+        codes.append(inverse.ravel())
+    shape = [len(u) for u in uniques]
+    combined, inverse = np.unique(
+        np.ravel_multi_index(codes, shape), return_inverse=True
+    )
+    groups = np.full(table.num_rows, -1, dtype=np.int64)
+    groups[valid] = inverse.ravel()
+
+    results = locate_knees_grouped(
+        None if x is None else table[x].to_numpy().astype(float, copy=False),
+        table[y].to_numpy().astype(float, copy=False),
+        groups,
+        n_groups=len(combined),
+        **kwargs,
+    )
+    columns = {}
+    for name, column_uniques, positions in zip(
+        by, uniques, np.unravel_index(combined, shape)
+    ):
+        columns[name] = pyarrow.array(
+            column_uniques[positions], type=table.schema.field(name).type
+        )
+    for name, values in zip(RESULT_COLUMNS, results):
+        columns[name] = pyarrow.array(values, mask=np.isnan(values))
+    columns["n_points"] = pyarrow.array(
+        np.bincount(inverse.ravel(), minlength=len(combined))
+    )
+    return pyarrow.table(columns)
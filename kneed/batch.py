@@ -0,0 +1,283 @@
+import numpy as np
+from typing import Iterable, Optional, Tuple
+
+from .core import (
+    VALID_CURVE,
+    VALID_DIRECTION,
+    _extrema_mask,
+    _knee_crossings,
+    transform_y,
+)
+from .shape_detector import find_shape_batch
+from .smoothing import get_smoother, polynomial_fit
+
+
+def _normalize_rows(a: np.ndarray) -> np.ndarray:
+    """Normalize each row of an array to [0, 1]."""
+    a_min = a.min(axis=-1, keepdims=True)
+    return (a - a_min) / (a.max(axis=-1, keepdims=True) - a_min)
+
+
+def locate_knees(
+    x: Iterable[float],
+    y: Iterable[Iterable[float]],
+    S: float = 1.0,
+    curve: str = "concave",
+    direction: str = "increasing",
+    interp_method: str = "interp1d",
+    online: bool = False,
+    polynomial_degree: int = 7,
+    interp_kwargs: Optional[dict] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Locate the knee of many curves at once.
+
+    Runs the same steps as ``KneeLocator`` on a whole matrix of curves,
+    one curve per row, so the per-curve Python overhead is paid once per
+    call rather than once per curve.
+
+    Parameters
+    ----------
+    x : array-like
+        x values. Either 1-D and shared by every curve, or 2-D with the
+        same shape as ``y``.
+    y : array-like
+        2-D array of y values, one curve per row.
+    S : float, default 1.0
+        Sensitivity, see ``KneeLocator``.
+    curve : str, default "concave"
+        One of ``{"concave", "convex"}``, applied to every curve. If
+        ``"auto"``, it is detected for each curve with ``find_shape_batch``.
+    direction : str, default "increasing"
+        One of ``{"increasing", "decreasing"}``, applied to every curve. If
+        ``"auto"``, it is detected for each curve with ``find_shape_batch``.
+    interp_method : str, default "interp1d"
+        The smoother applied to every curve, see ``KneeLocator``.
+    online : bool, default False
+        If True, report the last knee found on each curve instead of the
+        first.
+    polynomial_degree : int, default 7
+        The degree of the fitting polynomial. Only used when
+        ``interp_method="polynomial"``.
+    interp_kwargs : dict, optional
+        Keyword arguments for the smoother selected by ``interp_method``.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        ``(knees, knees_y, norm_knees, norm_knees_y)``, each with one entry
+        per curve. Curves without a knee/elbow hold NaN.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if y.ndim != 2:
+        raise ValueError("y must be a 2-D array with one curve per row.")
+    if x.shape != y.shape[-1:] and x.shape != y.shape:
+        raise ValueError(
+            "x must be 1-D with one value per column of y, or have the same shape as y."
+        )
+    if "auto" in (curve, direction):
+        return _locate_knees_auto(
+            x,
+            y,
+            S,
+            curve,
+            direction,
+            interp_method,
+            online,
+            polynomial_degree,
+            interp_kwargs,
+        )
+    if curve not in VALID_CURVE or direction not in VALID_DIRECTION:
+        raise ValueError(
+            "Please check that the curve and direction arguments are valid."
+        )
+    n_curves, n_points = y.shape
+
+    # Step 1: fit a smooth line
+    if interp_method == "interp1d":
+        Ds_y = y
+    elif interp_method == "polynomial":
+        if x.ndim == 1:
+            # one factorization of the Vandermonde matrix for every curve
+            Ds_y = polynomial_fit(x, y, polynomial_degree)
+        else:
+            Ds_y = np.array(
+                [polynomial_fit(xi, yi, polynomial_degree) for xi, yi in zip(x, y)]
+            )
+    else:
+        smoother = get_smoother(interp_method)
+        if x.ndim == 1:
+            Ds_y = smoother(x, y, **(interp_kwargs or {}))
+        else:
+            Ds_y = np.array(
+                [smoother(xi, yi, **(interp_kwargs or {})) for xi, yi in zip(x, y)]
+            )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Step 2: normalize values
+        x_normalized = _normalize_rows(x)
+        y_normalized = _normalize_rows(Ds_y)
+
+        # Step 3: Calculate the Difference curve
+        y_normalized = transform_y(y_normalized, direction, curve)
+        y_difference = y_normalized - x_normalized
+
+        # Step 4: Identify local maxima/minima
+        is_maximum = _extrema_mask(y_difference, np.greater_equal)
+        is_minimum = _extrema_mask(y_difference, np.less_equal)
+
+        # Step 5: Calculate thresholds
+        offset = S * np.abs(np.diff(x_normalized, axis=-1).mean(axis=-1, keepdims=True))
+        thresholds = y_difference - offset
+
+    # Step 6: find knee
+    detected, threshold_index = _knee_crossings(
+        y_difference, is_maximum, is_minimum, thresholds
+    )
+    found = detected.any(axis=-1)
+    if not found.any():
+        return tuple(np.full(n_curves, np.nan) for _ in range(4))
+    if online:
+        step = n_points - 2 - np.argmax(detected[:, ::-1], axis=-1)
+    else:
+        step = np.argmax(detected, axis=-1)
+    threshold_index = threshold_index[np.arange(n_curves), step]
+
+    # Step 7: extract data about the knees
+    if (curve == "convex") == (direction == "increasing"):
+        knee_index = n_points - 1 - threshold_index
+    else:
+        knee_index = threshold_index
+    rows = np.arange(n_curves)
+    x_rows = np.broadcast_to(x, y.shape)
+    x_normalized = np.broadcast_to(x_normalized, y.shape)
+
+    results = (
+        x_rows[rows, knee_index],
+        y[rows, knee_index],
+        x_normalized[rows, threshold_index],
+        y_normalized[rows, threshold_index],
+    )
+    return tuple(np.where(found, values, np.nan) for values in results)
+
+
+def _locate_knees_auto(
+    x, y, S, curve, direction, interp_method, online, polynomial_degree, interp_kwargs
+):
+    """Detect the shape of each curve, then locate the knees of the curves
+    sharing a shape together."""
+    directions, curves = find_shape_batch(x, y)
+    if curve != "auto":
+        curves = np.full(len(y), curve)
+    if direction != "auto":
+        directions = np.full(len(y), direction)
+
+    results = tuple(np.full(len(y), np.nan) for _ in range(4))
+    shapes, group = np.unique(
+        np.stack((curves, directions), axis=-1), axis=0, return_inverse=True
+    )
+    for i, (shape_curve, shape_direction) in enumerate(shapes):
+        rows = np.flatnonzero(group.ravel() == i)
+        group_results = locate_knees(
+            x if x.ndim == 1 else x[rows],
+            y[rows],
+            S=S,
+            curve=shape_curve,
+            direction=shape_direction,
+            interp_method=interp_method,
+            online=online,
+            polynomial_degree=polynomial_degree,
+            interp_kwargs=interp_kwargs,
+        )
+        for values, group_values in zip(results, group_results):
+            values[rows] = group_values
+    return results
+
+
+def locate_knees_grouped(
+    x: Optional[Iterable[float]],
+    y: Iterable[float],
+    groups: Iterable[int],
+    n_groups: Optional[int] = None,
+    block_size: int = 2**16,
+    **kwargs,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Locate the knee of many curves stored back to back in flat arrays.
+
+    The points of each curve keep their order, but the curves may be
+    interleaved. One stable sort brings the points of each curve together
+    and the curves of equal length next to each other, then the curves of
+    each length are processed by ``locate_knees`` as zero-copy 2-D views.
+    Points that are already in that order are not copied at all.
+
+    Parameters
+    ----------
+    x : array-like or None
+        x values. If None, x is the position of each point in its curve.
+    y : array-like
+        y values, the same length as ``groups``.
+    groups : array-like of int
+        The curve of each point, from 0 to ``n_groups - 1``. Points with
+        a negative group are ignored.
+    n_groups : int, optional
+        The number of curves. Defaults to the largest group plus one.
+    block_size : int, default 65536
+        The maximum number of points, summed over curves, passed to
+        ``locate_knees`` at once.
+    **kwargs
+        Passed to ``locate_knees``.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        ``(knees, knees_y, norm_knees, norm_knees_y)``, each with one entry
+        per curve. Curves without a knee/elbow, or with fewer than 3
+        points, hold NaN.
+    """
+    y = np.asarray(y)
+    groups = np.asarray(groups, dtype=np.int64)
+    if y.shape != groups.shape or (x is not None and np.shape(x) != y.shape):
+        raise ValueError("x, y and groups must be the same length.")
+    if x is not None:
+        x = np.asarray(x)
+    if groups.size and groups.min() < 0:
+        keep = groups >= 0
+        x = None if x is None else x[keep]
+        y, groups = y[keep], groups[keep]
+    if n_groups is None:
+        n_groups = int(groups.max()) + 1 if groups.size else 0
+    results = np.full((4, n_groups), np.nan)
+
+    lengths = np.bincount(groups, minlength=n_groups)
+    # by length, then by group, then in the original order
+    key = lengths[groups] * n_groups + groups
+    if np.any(key[1:] < key[:-1]):
+        order = np.argsort(key, kind="stable")
+        x = None if x is None else x[order]
+        y = y[order]
+
+    # the groups in the order they are now laid out
+    group_order = np.lexsort((np.arange(n_groups), lengths))
+    run_lengths, run_sizes = np.unique(lengths[group_order], return_counts=True)
+    start = 0
+    first = 0
+    for length, n_curves in zip(run_lengths, run_sizes):
+        stop = start + length * n_curves
+        if length >= 3:
+            rows = max(1, block_size // length)
+            y_run = y[start:stop].reshape(n_curves, length)
+            if x is None:
+                x_run = np.arange(length, dtype=float)
+            else:
+                x_run = x[start:stop].reshape(n_curves, length)
+            for block in range(0, n_curves, rows):
+                block_rows = slice(block, min(block + rows, n_curves))
+                curves = group_order[first + block_rows.start : first + block_rows.stop]
+                results[:, curves] = locate_knees(
+                    x_run if x is None else x_run[block_rows],
+                    y_run[block_rows],
+                    **kwargs,
+                )
+        start = stop
+        first += n_curves
+    return tuple(results)
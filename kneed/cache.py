@@ -0,0 +1,214 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from ._version import __version__
+
+
+def _hasher():
+    """xxhash when it is installed, it is several times faster than blake2b."""
+    try:
+        import xxhash
+    except ImportError:
+        return hashlib.blake2b(digest_size=16)
+    return xxhash.xxh3_128()
+
+
+def _update(hasher, value):
+    """Feed a value into ``hasher``, arrays by their raw bytes."""
+    if isinstance(value, dict):
+        hasher.update(b"{")
+        for name in sorted(value):
+            hasher.update(repr(name).encode())
+            _update(hasher, value[name])
+        hasher.update(b"}")
+    elif np.ndim(value) > 0:
+        # contiguous arrays are hashed through a view of their buffer,
+        # without copying the data
+        a = np.ascontiguousarray(value)
+        hasher.update("{}{}".format(a.dtype.str, a.shape).encode())
+        if a.dtype.hasobject:
+            hasher.update(repr(a.tolist()).encode())
+        else:
+            hasher.update(memoryview(a).cast("B"))
+    else:
+        hasher.update(repr(value).encode())
+    hasher.update(b";")
+
+
+class KneeCache(object):
+    """Reuse ``KneeLocator`` results for curves that were seen before.
+
+    Results are keyed by a hash of the raw bytes of ``x`` and ``y``, of
+    every argument that changes the result and of the kneed version, kept
+    in memory with least-recently-used eviction, and optionally written to
+    a directory so they survive restarts. The cache is thread-safe.
+
+    An entry holds copies of ``x``, ``y`` and the fitted line along with
+    the knee results, not the intermediate arrays, which a locator
+    restored from it rebuilds. Every hit gets its own copies.
+
+    Pass it to ``KneeLocator(..., cache=cache)``, or call ``locate``.
+
+    Parameters
+    ----------
+    maxsize : int, default 128
+        The maximum number of results kept in memory.
+    ttl : float, optional
+        The number of seconds a result stays valid. By default results
+        never expire.
+    directory : str, optional
+        Where to store results on disk, one pickle file per curve. Files
+        are read back with ``pickle``, so only point it at a directory you
+        trust.
+
+    Attributes
+    ----------
+    hits : int
+        The number of lookups answered from the cache.
+    misses : int
+        The number of lookups that had to be computed.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 128,
+        ttl: Optional[float] = None,
+        directory: Optional[str] = None,
+    ):
+        if maxsize < 1:
+            raise ValueError("maxsize must be a positive integer.")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.directory = directory
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(x, y, **params) -> str:
+        """Hash a curve and the arguments it is located with.
+
+        The kneed version is hashed too, so results stored on disk by
+        another release are never reused.
+
+        Parameters
+        ----------
+        x : array-like
+            x values.
+        y : array-like
+            y values.
+        **params
+            The ``KneeLocator`` arguments.
+
+        Returns
+        -------
+        str
+            A hex digest identifying the curve and arguments.
+        """
+        hasher = _hasher()
+        _update(hasher, __version__)
+        _update(hasher, x)
+        _update(hasher, y)
+        _update(hasher, params)
+        return hasher.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".pkl")
+
+    def get(self, key: str):
+        """Return the result stored under ``key``, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored, value = entry
+                if self.ttl is None or time.monotonic() - stored < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+        value = self._load(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, value)
+        return value
+
+    def set(self, key: str, value):
+        """Store ``value`` under ``key``."""
+        with self._lock:
+            self._remember(key, value)
+        if self.directory is not None:
+            # write to a temporary file first, readers never see partial files
+            fd, path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(path, self._path(key))
+
+    def _remember(self, key: str, value):
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _load(self, key: str):
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            if (
+                self.ttl is not None
+                and time.time() - os.path.getmtime(path) >= self.ttl
+            ):
+                return None
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except Exception:
+            # unpickling a damaged or foreign file can raise almost
+            # anything, recompute the result in that case
+            return None
+
+    def clear(self):
+        """Forget every result, in memory and on disk."""
+        with self._lock:
+            self._entries.clear()
+        if self.directory is not None:
+            for name in os.listdir(self.directory):
+                if name.endswith(".pkl"):
+                    os.remove(os.path.join(self.directory, name))
+
+    def locate(self, x, y, **kwargs):
+        """Return the ``KneeLocator`` for a curve, computing it on a miss.
+
+        Parameters
+        ----------
+        x : array-like
+            x values.
+        y : array-like
+            y values.
+        **kwargs
+            Passed to ``KneeLocator``.
+
+        Returns
+        -------
+        KneeLocator
+        """
+        from .knee_locator import KneeLocator
+
+        return KneeLocator(x, y, cache=self, **kwargs)
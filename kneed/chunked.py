@@ -0,0 +1,243 @@
+import numpy as np
+from typing import Sequence
+
+from .core import VALID_CURVE, VALID_DIRECTION, _extrema_mask
+
+
+class ChunkedKneeLocator(object):
+    """Locate the knee of a curve too large to hold in memory.
+
+    ``x`` and ``y`` are read in chunks of ``chunk_size`` points and never
+    copied as a whole, so ``numpy.memmap`` arrays (or any sliceable array
+    with a length, such as h5py or zarr datasets) of any size can be
+    processed with a fixed amount of memory. The first pass finds the
+    minimum and maximum of ``x`` and ``y`` for normalization, the second
+    builds the difference curve chunk by chunk and carries the state of
+    the knee detector across chunk boundaries.
+
+    The line is not smoothed, which matches ``KneeLocator`` with the
+    default ``interp_method="interp1d"``.
+
+    Parameters
+    ----------
+    x : array-like
+        x values, must be the same length as y.
+    y : array-like
+        y values, must be the same length as x.
+    S : float, default 1.0
+        Sensitivity, see ``KneeLocator``.
+    curve : str, default "concave"
+        One of ``{"concave", "convex"}``.
+    direction : str, default "increasing"
+        One of ``{"increasing", "decreasing"}``.
+    online : bool, default False
+        If True, keep scanning after the first knee and report the last.
+    chunk_size : int, default 1048576
+        The number of points read at a time.
+
+    Attributes
+    ----------
+    N : int
+        The number of points in the curve.
+    knee : float or None
+        The x value of the knee point.
+    knee_y : float or None
+        The y value of the knee point.
+    norm_knee : float or None
+        The normalized x value of the knee point.
+    norm_knee_y : float or None
+        The normalized y value of the knee point.
+    knee_index : int or None
+        The index into ``x`` and ``y`` of the knee point.
+    all_knees : set
+        All the x values of the identified knee points.
+    all_norm_knees : set
+        All the normalized x values of the identified knee points.
+    all_knees_indices : numpy.ndarray
+        The indices of all the identified knee points, in the order they
+        were first detected.
+    """
+
+    def __init__(
+        self,
+        x: Sequence[float],
+        y: Sequence[float],
+        S: float = 1.0,
+        curve: str = "concave",
+        direction: str = "increasing",
+        online: bool = False,
+        chunk_size: int = 2**20,
+    ):
+        if curve not in VALID_CURVE or direction not in VALID_DIRECTION:
+            raise ValueError(
+                "Please check that the curve and direction arguments are valid."
+            )
+        if len(x) != len(y):
+            raise ValueError("x and y must be the same length.")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer.")
+        self.x = x
+        self.y = y
+        self.N = len(x)
+        self.S = S
+        self.curve = curve
+        self.direction = direction
+        self.online = online
+        self.chunk_size = chunk_size
+        self._flipped = (curve == "convex") == (direction == "increasing")
+
+        # Pass 1: the ranges used for normalization
+        (self._x_min, self._x_range), (self._y_min, self._y_range) = self._ranges()
+
+        # Pass 2: traverse the difference curve
+        threshold_indices = self._traverse()
+
+        self.knee = self.knee_y = self.norm_knee = self.norm_knee_y = None
+        self.knee_index = None
+        self.all_knees = set()
+        self.all_norm_knees = set()
+        self.all_knees_indices = np.empty(0, dtype=np.intp)
+        if not threshold_indices.size:
+            return
+
+        knee_indices = self._knee_index(threshold_indices)
+        _, first_seen = np.unique(knee_indices, return_index=True)
+        self.all_knees_indices = knee_indices[np.sort(first_seen)]
+        self.all_knees.update(self._read(self.x, knee_indices))
+        self.all_norm_knees.update(self._x_normalized(threshold_indices))
+
+        threshold_index = threshold_indices[-1:]
+        self.knee_index = int(knee_indices[-1])
+        self.knee = self._read(self.x, knee_indices[-1:])[0]
+        self.knee_y = self._read(self.y, knee_indices[-1:])[0]
+        self.norm_knee = self._x_normalized(threshold_index)[0]
+        self.norm_knee_y = self._y_transformed(
+            threshold_index[0], threshold_index[0] + 1
+        )[0]
+
+    def _chunks(self):
+        for start in range(0, self.N, self.chunk_size):
+            yield start, min(start + self.chunk_size, self.N)
+
+    def _ranges(self) -> tuple:
+        """Return the minimum and the range of ``x``, then of ``y``."""
+        return self._bounds(self.x), self._bounds(self.y)
+
+    def _bounds(self, a: Sequence[float]):
+        """Return the minimum and the range of ``a``, one chunk at a time."""
+        a_min, a_max = np.inf, -np.inf
+        for start, stop in self._chunks():
+            chunk = np.asarray(a[start:stop])
+            a_min = min(a_min, chunk.min())
+            a_max = max(a_max, chunk.max())
+        return a_min, a_max - a_min
+
+    @staticmethod
+    def _read(a: Sequence[float], indices: np.ndarray) -> np.ndarray:
+        """Read scattered points without loading the whole array."""
+        return np.array([a[int(index)] for index in indices])
+
+    def _knee_index(self, threshold_index):
+        if self._flipped:
+            return self.N - 1 - threshold_index
+        return threshold_index
+
+    def _x_normalized(self, indices: np.ndarray) -> np.ndarray:
+        return (self._read(self.x, indices) - self._x_min) / self._x_range
+
+    def _y_transformed(self, start: int, stop: int) -> np.ndarray:
+        """Normalized, knee-oriented y values of the difference curve points
+        ``start`` to ``stop``, matching ``KneeLocator.transform_y``."""
+        if self._flipped:
+            y = np.asarray(self.y[self.N - stop : self.N - start])[::-1]
+        else:
+            y = np.asarray(self.y[start:stop])
+        y_normalized = (y - self._y_min) / self._y_range
+        if self.curve == "convex":
+            # the normalized curve always peaks at exactly 1
+            y_normalized = 1.0 - y_normalized
+        return y_normalized
+
+    def _difference(self, start: int, stop: int) -> np.ndarray:
+        x_normalized = (np.asarray(self.x[start:stop]) - self._x_min) / self._x_range
+        return self._y_transformed(start, stop) - x_normalized
+
+    def _traverse(self) -> np.ndarray:
+        """Walk the difference curve chunk by chunk, return the detections.
+
+        Each chunk is read with one extra point on either side, so local
+        extrema at chunk boundaries and the look-ahead of the detector see
+        the same neighbours as a single pass over the whole curve would.
+        """
+        if self.N < 2:
+            return np.empty(0, dtype=np.intp)
+        # the mean step of the normalized x values, from its two ends
+        x_ends = self._x_normalized(np.array([0, self.N - 1]))
+        offset = self.S * abs((x_ends[1] - x_ends[0]) / (self.N - 1))
+
+        detections = []
+        last_maximum = last_minimum = -1
+        last_maximum_value = np.nan
+        for start, stop in self._chunks():
+            lo, hi = max(start - 1, 0), min(stop + 1, self.N)
+            y_difference = self._difference(lo, hi)
+            is_maximum = _extrema_mask(y_difference, np.greater_equal)
+            is_minimum = _extrema_mask(y_difference, np.less_equal)
+            # the halo points themselves lack a neighbour, drop them
+            inner = slice(start - lo, stop - lo)
+            is_maximum, is_minimum = is_maximum[inner], is_minimum[inner]
+
+            positions = np.arange(start, stop)
+            chunk_maximum = np.maximum.accumulate(np.where(is_maximum, positions, -1))
+            chunk_minimum = np.maximum.accumulate(np.where(is_minimum, positions, -1))
+            maximum = np.where(chunk_maximum >= 0, chunk_maximum, last_maximum)
+            minimum = np.where(chunk_minimum >= 0, chunk_minimum, last_minimum)
+
+            in_chunk = maximum >= start
+            armed = np.where(
+                in_chunk,
+                y_difference[np.where(in_chunk, maximum, start) - lo],
+                last_maximum_value,
+            )
+            # the last point of the curve has nothing after it
+            steps = min(stop, self.N - 1) - start
+            following = y_difference[start - lo + 1 : start - lo + 1 + steps]
+            active = (maximum[:steps] >= 0) & (maximum[:steps] > minimum[:steps])
+            detected = active & (following < armed[:steps] - offset)
+            if detected.any():
+                found = maximum[:steps][detected]
+                if not self.online:
+                    return found[:1]
+                detections.append(found)
+
+            last_maximum, last_minimum = maximum[-1], minimum[-1]
+            last_maximum_value = armed[-1]
+
+        if not detections:
+            return np.empty(0, dtype=np.intp)
+        return np.concatenate(detections)
+
+    # Niceties for users working with elbows rather than knees
+    @property
+    def elbow(self):
+        return self.knee
+
+    @property
+    def norm_elbow(self):
+        return self.norm_knee
+
+    @property
+    def elbow_y(self):
+        return self.knee_y
+
+    @property
+    def norm_elbow_y(self):
+        return self.norm_knee_y
+
+    @property
+    def all_elbows(self):
+        return self.all_knees
+
+    @property
+    def all_norm_elbows(self):
+        return self.all_norm_knees
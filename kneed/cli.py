@@ -0,0 +1,526 @@
+"""The ``kneed`` command line interface.
+
+Usage::
+
+    kneed detect data.csv --x step --y loss --group-by run_id -o knees.parquet
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import math
+import operator
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from ._version import __version__
+from .batch import locate_knees
+from .core import VALID_CURVE, VALID_DIRECTION
+from .result import _import_pyarrow
+
+INPUT_FORMATS = ("csv", "npy", "parquet")
+OUTPUT_FORMATS = ("csv", "json", "parquet")
+RESULT_COLUMNS = ("knee", "knee_y", "norm_knee", "norm_knee_y", "n_points")
+
+# the number of points, summed over curves, handed to a worker at once
+_TASK_POINTS = 2**20
+
+
+def _file_format(path: str, formats: Sequence[str]) -> str:
+    """The format of a file, from its extension."""
+    extension = os.path.splitext(path)[1].lstrip(".").lower()
+    if extension == "pq":
+        extension = "parquet"
+    if extension not in formats:
+        raise ValueError(
+            "Cannot tell the format of {}, use one of the extensions {}.".format(
+                path, ", ".join("." + f for f in formats)
+            )
+        )
+    return extension
+
+
+def _missing(path: str, columns: Sequence[str], available: Sequence[str]):
+    missing = [c for c in columns if c not in available]
+    if missing:
+        raise ValueError(
+            "{} has no column {}, the columns are {}.".format(
+                path, ", ".join(missing), ", ".join(available)
+            )
+        )
+
+
+def read_csv(
+    path: str, columns: Sequence[str], numeric: Sequence[str], chunk_size: int
+) -> Iterator[Dict[str, np.ndarray]]:
+    """Read columns of a CSV file with a header row, ``chunk_size`` rows at
+    a time. The ``numeric`` columns are parsed as floats."""
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        _missing(path, columns, header)
+        while True:
+            rows = list(itertools.islice(reader, chunk_size))
+            if not rows:
+                return
+            chunk = {}
+            for c in columns:
+                values = map(operator.itemgetter(header.index(c)), rows)
+                if c in numeric:
+                    chunk[c] = np.fromiter(map(float, values), float, len(rows))
+                else:
+                    chunk[c] = np.array(list(values))
+            yield chunk
+
+
+def read_npy(
+    path: str, columns: Sequence[str], numeric: Sequence[str], chunk_size: int
+) -> Iterator[Dict[str, np.ndarray]]:
+    """Read columns of a ``.npy`` file, ``chunk_size`` rows at a time.
+
+    The columns of a structured array are its field names, the columns of
+    a plain array are the positions ``"0"``, ``"1"``, ... of its second
+    axis. The file is memory-mapped, only the rows of a chunk are read.
+    """
+    data = np.load(path, mmap_mode="r")
+    if data.dtype.names is not None:
+        available = list(data.dtype.names)
+        _missing(path, columns, available)
+        select = {c: (lambda rows, c=c: rows[c]) for c in columns}
+    else:
+        data = data.reshape(len(data), -1)
+        available = [str(i) for i in range(data.shape[1])]
+        _missing(path, columns, available)
+        select = {c: (lambda rows, i=int(c): rows[:, i]) for c in columns}
+    for start in range(0, len(data), chunk_size):
+        rows = data[start : start + chunk_size]
+        yield {
+            c: np.array(select[c](rows), dtype=float if c in numeric else None)
+            for c in columns
+        }
+
+
+def read_parquet(
+    path: str, columns: Sequence[str], numeric: Sequence[str], chunk_size: int
+) -> Iterator[Dict[str, np.ndarray]]:
+    """Read columns of a Parquet file, ``chunk_size`` rows at a time. The
+    ``numeric`` columns are cast to floats."""
+    pyarrow = _import_pyarrow()
+    parquet_file = pyarrow.parquet.ParquetFile(path)
+    _missing(path, columns, parquet_file.schema_arrow.names)
+    for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+        yield {
+            c: np.asarray(
+                batch.column(c).to_numpy(zero_copy_only=False),
+                dtype=float if c in numeric else None,
+            )
+            for c in columns
+        }
+
+
+READERS = {"csv": read_csv, "npy": read_npy, "parquet": read_parquet}
+
+
+class _Counters(object):
+    """Wall time and throughput of each phase of a run."""
+
+    def __init__(self):
+        self.phases = {}
+
+    def add(self, phase: str, seconds: float, **counts):
+        record = self.phases.setdefault(phase, {"seconds": 0.0})
+        record["seconds"] += seconds
+        for name, count in counts.items():
+            record[name] = record.get(name, 0) + count
+
+    def report(self, stream):
+        total = sum(record["seconds"] for record in self.phases.values())
+        stream.write(
+            "{:<8} {:>10} {:>6} {:>12} {:>14}\n".format(
+                "phase", "seconds", "%", "rows", "rows/s"
+            )
+        )
+        for phase, record in self.phases.items():
+            seconds = record["seconds"]
+            rows = record.get("rows", 0)
+            stream.write(
+                "{:<8} {:>10.4f} {:>6.1f} {:>12} {:>14}\n".format(
+                    phase,
+                    seconds,
+                    100 * seconds / total if total else 0.0,
+                    rows,
+                    "{:.0f}".format(rows / seconds) if seconds else "-",
+                )
+            )
+        groups = self.phases.get("detect", {}).get("groups", 0)
+        stream.write("{} curves in {:.4f} s\n".format(groups, total))
+
+
+class _Groups(object):
+    """The x and y values of each group, gathered chunk by chunk.
+
+    Groups are kept in the order they first appear. Each chunk is split
+    with one sort, not row by row.
+    """
+
+    def __init__(self):
+        self.index = {}
+        self.keys = []
+        self.x = []
+        self.y = []
+
+    def add(self, keys: Sequence[np.ndarray], x: Optional[np.ndarray], y: np.ndarray):
+        if not keys:
+            self._append((), x, y)
+            return
+        codes = []
+        uniques = []
+        for column in keys:
+            values, inverse = np.unique(column, return_inverse=True)
+            uniques.append(values)
+            codes.append(inverse.ravel())
+        code = np.ravel_multi_index(codes, [len(u) for u in uniques])
+        groups, first, inverse = np.unique(code, return_index=True, return_inverse=True)
+        order = np.argsort(inverse.ravel(), kind="stable")
+        bounds = np.cumsum(np.bincount(inverse.ravel()))[:-1]
+        rows = np.split(order, bounds)
+        positions = np.unravel_index(groups, [len(u) for u in uniques])
+        for g in np.argsort(first, kind="stable"):
+            # Python values for the output, object arrays already hold them
+            key = tuple(
+                u[p[g]].item() if u.dtype != object else u[p[g]]
+                for u, p in zip(uniques, positions)
+            )
+            self._append(key, None if x is None else x[rows[g]], y[rows[g]])
+
+    def _append(self, key: tuple, x: Optional[np.ndarray], y: np.ndarray):
+        i = self.index.get(key)
+        if i is None:
+            i = self.index[key] = len(self.keys)
+            self.keys.append(key)
+            self.x.append([])
+            self.y.append([])
+        if x is not None:
+            self.x[i].append(x)
+        self.y[i].append(y)
+
+    def curves(self) -> Iterator[tuple]:
+        """Yield ``(x, y)`` for each group. Without an x column, x is the
+        position of each point within its group."""
+        for xs, ys in zip(self.x, self.y):
+            y = np.concatenate(ys)
+            x = np.concatenate(xs) if xs else np.arange(len(y), dtype=float)
+            yield x, y
+
+
+def _detect(task: List[tuple], options: dict) -> tuple:
+    """Locate the knees of a list of ``(index, x, y)`` curves.
+
+    Curves of the same length are stacked and handled by a single
+    ``locate_knees`` call.
+    """
+    indices = np.array([i for i, _, _ in task], dtype=np.int64)
+    lengths = np.array([len(y) for _, _, y in task])
+    results = np.full((4, len(task)), np.nan)
+    for length in np.unique(lengths):
+        rows = np.flatnonzero(lengths == length)
+        if length < 3:
+            continue
+        x = np.stack([task[r][1] for r in rows])
+        y = np.stack([task[r][2] for r in rows])
+        results[:, rows] = locate_knees(x, y, **options)
+    return indices, results
+
+
+def _tasks(curves: List[tuple], n_jobs: int) -> List[List[tuple]]:
+    """Split the curves into tasks of at most ``_TASK_POINTS`` points, and
+    at least one task per job. Curves are sorted by length, so that curves
+    of equal length end up in the same task."""
+    total = sum(len(y) for _, y in curves)
+    budget = max(1, min(_TASK_POINTS, math.ceil(total / n_jobs)))
+    tasks = [[]]
+    size = 0
+    for i in sorted(range(len(curves)), key=lambda i: len(curves[i][1])):
+        if size >= budget:
+            tasks.append([])
+            size = 0
+        x, y = curves[i]
+        tasks[-1].append((i, x, y))
+        size += len(y)
+    return tasks
+
+
+def detect(
+    paths: Sequence[str],
+    y: str,
+    x: Optional[str] = None,
+    group_by: Sequence[str] = (),
+    n_jobs: int = 1,
+    chunk_size: int = 2**16,
+    counters: Optional[_Counters] = None,
+    **options,
+) -> Dict[str, list]:
+    """Locate the knee of every group of rows in one or more files.
+
+    Parameters
+    ----------
+    paths : list of str
+        CSV, NPY or Parquet files, read ``chunk_size`` rows at a time. Rows
+        of a group may be spread over several chunks and files.
+    y : str
+        The y column.
+    x : str, optional
+        The x column. By default x is the position of each row in its
+        group.
+    group_by : list of str
+        The columns identifying a curve. By default every row belongs to a
+        single curve.
+    n_jobs : int, default 1
+        The number of worker processes, -1 to use every CPU.
+    chunk_size : int, default 65536
+        The number of rows read at a time.
+    counters : _Counters, optional
+        Collects the time spent reading, detecting and writing.
+    **options
+        Passed to ``locate_knees``.
+
+    Returns
+    -------
+    dict
+        One list per group-by column, and one list for each of ``knee``,
+        ``knee_y``, ``norm_knee``, ``norm_knee_y`` and ``n_points``.
+    """
+    counters = counters if counters is not None else _Counters()
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    if n_jobs < 1:
+        raise ValueError("jobs must be a positive integer, or -1.")
+    numeric = ([x] if x is not None else []) + [y]
+    columns = list(group_by) + numeric
+
+    groups = _Groups()
+    start = time.perf_counter()
+    n_rows = 0
+    for path in paths:
+        reader = READERS[_file_format(path, INPUT_FORMATS)]
+        for chunk in reader(path, columns, numeric, chunk_size):
+            keys = [chunk[c] for c in group_by]
+            groups.add(keys, None if x is None else chunk[x], chunk[y])
+            n_rows += len(chunk[y])
+    curves = list(groups.curves())
+    counters.add("read", time.perf_counter() - start, rows=n_rows)
+
+    start = time.perf_counter()
+    results = np.full((4, len(curves)), np.nan)
+    tasks = _tasks(curves, n_jobs)
+    if n_jobs == 1 or len(tasks) == 1:
+        done = (_detect(task, options) for task in tasks)
+        for indices, values in done:
+            results[:, indices] = values
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            futures = [pool.submit(_detect, task, options) for task in tasks]
+            for future in futures:
+                indices, values = future.result()
+                results[:, indices] = values
+    counters.add("detect", time.perf_counter() - start, rows=n_rows, groups=len(curves))
+
+    table = {c: [key[i] for key in groups.keys] for i, c in enumerate(group_by)}
+    for name, values in zip(RESULT_COLUMNS, results):
+        table[name] = values.tolist()
+    table["n_points"] = [len(y) for _, y in curves]
+    return table
+
+
+def write_table(table: Dict[str, list], stream, output_format: str):
+    """Write the result table in one go."""
+    columns = list(table)
+    if output_format == "csv":
+        rows = zip(
+            *(
+                ["" if isinstance(v, float) and math.isnan(v) else v for v in table[c]]
+                for c in columns
+            )
+        )
+        writer = csv.writer(stream)
+        writer.writerow(columns)
+        writer.writerows(rows)
+    elif output_format == "json":
+        clean = {
+            c: [None if isinstance(v, float) and math.isnan(v) else v for v in table[c]]
+            for c in columns
+        }
+        records = [dict(zip(columns, row)) for row in zip(*clean.values())]
+        json.dump(records, stream)
+        stream.write("\n")
+    else:
+        pyarrow = _import_pyarrow()
+        pyarrow.parquet.write_table(pyarrow.table(table), stream)
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="kneed", description="Knee-point detection in Python."
+    )
+    parser.add_argument("--version", action="version", version=__version__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sub = commands.add_parser(
+        "detect",
+        help="locate the knee of every curve in CSV, NPY or Parquet files",
+        description="Locate the knee of every group of rows in CSV, NPY or "
+        "Parquet files, and write one row per group.",
+    )
+    sub.add_argument("paths", nargs="+", metavar="FILE", help="input files")
+    sub.add_argument("--y", required=True, help="the y column")
+    sub.add_argument(
+        "--x", help="the x column, by default the position of each row in its group"
+    )
+    sub.add_argument(
+        "--group-by",
+        action="append",
+        default=[],
+        metavar="COLUMN",
+        help="a column identifying a curve, can be repeated",
+    )
+    sub.add_argument("-S", type=float, default=1.0, help="sensitivity, default 1.0")
+    sub.add_argument("--curve", choices=VALID_CURVE + ["auto"], default="concave")
+    sub.add_argument(
+        "--direction", choices=VALID_DIRECTION + ["auto"], default="increasing"
+    )
+    sub.add_argument("--interp-method", default="interp1d")
+    sub.add_argument("--polynomial-degree", type=int, default=7)
+    sub.add_argument("--online", action="store_true")
+    sub.add_argument(
+        "-o", "--output", help="output file, by default CSV on standard output"
+    )
+    sub.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        help="output format, by default taken from the output file extension",
+    )
+    sub.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes, -1 to use every CPU",
+    )
+    sub.add_argument(
+        "--chunk-size", type=int, default=2**16, help="rows read at a time"
+    )
+    sub.add_argument(
+        "--profile",
+        action="store_true",
+        help="print the time and throughput of each phase to standard error",
+    )
+    return parser
+
+
+def _open_temporary(path: str, output_format: str):
+    """Open a temporary file in the directory of ``path``, to be moved to
+    ``path`` once it is written.
+
+    Returns
+    -------
+    tuple
+        The open file and its path.
+    """
+    try:
+        fd, temporary = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp"
+        )
+    except OSError as error:
+        raise OSError("cannot write {}: {}".format(path, error.strerror)) from None
+    # mkstemp makes the file private, give it the usual permissions
+    umask = os.umask(0)
+    os.umask(umask)
+    os.chmod(temporary, 0o666 & ~umask)
+    if output_format == "parquet":
+        return os.fdopen(fd, "wb"), temporary
+    return os.fdopen(fd, "w", newline=""), temporary
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the ``kneed`` command.
+
+    Parameters
+    ----------
+    argv : list of str, optional
+        The command line arguments, by default ``sys.argv[1:]``.
+
+    Returns
+    -------
+    int
+        The exit status.
+    """
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+
+    counters = _Counters()
+    temporary = None
+    try:
+        if args.format is not None:
+            output_format = args.format
+        elif args.output is not None:
+            output_format = _file_format(args.output, OUTPUT_FORMATS)
+        else:
+            output_format = "csv"
+        if output_format == "parquet" and args.output is None:
+            raise ValueError("Parquet output needs an output file, use --output.")
+        # a bad path fails before the work, and an existing output is only
+        # replaced once the new one is complete
+        if args.output is None:
+            output, temporary = sys.stdout, None
+        else:
+            output, temporary = _open_temporary(args.output, output_format)
+        table = detect(
+            args.paths,
+            y=args.y,
+            x=args.x,
+            group_by=args.group_by,
+            n_jobs=args.jobs,
+            chunk_size=args.chunk_size,
+            counters=counters,
+            S=args.S,
+            curve=args.curve,
+            direction=args.direction,
+            interp_method=args.interp_method,
+            online=args.online,
+            polynomial_degree=args.polynomial_degree,
+        )
+
+        start = time.perf_counter()
+        write_table(table, output, output_format)
+        output.flush()
+        if temporary is not None:
+            output.close()
+            os.replace(temporary, args.output)
+        counters.add("write", time.perf_counter() - start, rows=len(table["knee"]))
+    except BrokenPipeError:
+        # the reader went away, e.g. `kneed detect ... | head`; stdout is
+        # pointed at devnull so the flush at exit does not fail again
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+    finally:
+        if temporary is not None:
+            output.close()
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    if args.profile:
+        counters.report(sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,546 @@
+"""The Kneedle algorithm as pure functions.
+
+Nothing in this module keeps state between calls: every function works
+on the arrays it is given and returns new ones, so ``kneedle`` can be
+called from many threads at once. The work is done by whole-array NumPy
+operations, which release the GIL, so concurrent calls on long curves run
+in parallel.
+"""
+
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Iterable, Optional, Tuple, Union
+
+import numpy as np
+
+from .result import KneeResult
+from .shape_detector import find_shape
+from .smoothing import get_smoother, polynomial_fit
+
+VALID_CURVE = ["convex", "concave"]
+VALID_DIRECTION = ["increasing", "decreasing"]
+
+
+class _StageProfiler(object):
+    """Record the wall time and memory allocated by each step of the pipeline.
+
+    Parameters
+    ----------
+    profile : bool or callable
+        If falsy, profiling is disabled and ``stage`` costs nothing. If
+        callable, it is called with ``(stage, record)`` as each step ends.
+    """
+
+    def __init__(self, profile: Union[bool, Callable[[str, dict], None]] = False):
+        self.enabled = bool(profile)
+        self.callback = profile if callable(profile) else None
+        self.timings = {}
+
+    def stage(self, name: str, size: Callable[[], int]):
+        """Context manager measuring one step.
+
+        Parameters
+        ----------
+        name : str
+            The name the step is recorded under.
+        size : callable
+            Called once the step ends, returns the number of elements the
+            step produced.
+        """
+        if not self.enabled:
+            return nullcontext()
+        return self._measure(name, size)
+
+    @contextmanager
+    def _measure(self, name: str, size: Callable[[], int]):
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        elif hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            if not tracing:
+                tracemalloc.stop()
+        record = {"time": elapsed, "bytes": max(peak - before, 0), "size": size()}
+        self.timings[name] = record
+        if self.callback is not None:
+            self.callback(name, record)
+
+
+def _extrema_mask(a: np.ndarray, comparator) -> np.ndarray:
+    """Find the relative extrema along the last axis of an array.
+
+    A NumPy-only equivalent of ``scipy.signal.argrelextrema`` with
+    ``order=1`` and ``mode="clip"``: each point is compared with both of
+    its neighbours, and the end points are compared with themselves.
+
+    Parameters
+    ----------
+    a : numpy.ndarray
+        The array to search.
+    comparator : callable
+        Function comparing two arrays, e.g. ``numpy.greater_equal``.
+
+    Returns
+    -------
+    numpy.ndarray
+        Boolean mask, True at the relative extrema of ``a``.
+    """
+    mask = np.ones(a.shape, dtype=bool)
+    mask[..., 1:] &= comparator(a[..., 1:], a[..., :-1])
+    mask[..., :-1] &= comparator(a[..., :-1], a[..., 1:])
+    mask[..., :1] &= comparator(a[..., :1], a[..., :1])
+    mask[..., -1:] &= comparator(a[..., -1:], a[..., -1:])
+    return mask
+
+
+def _armed_maxima(
+    is_maximum: np.ndarray, is_minimum: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Find which local maximum arms the knee detector at each step.
+
+    Parameters
+    ----------
+    is_maximum : numpy.ndarray
+        Boolean mask of the local maxima of the difference curve(s).
+    is_minimum : numpy.ndarray
+        Boolean mask of the local minima of the difference curve(s).
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        ``(last_maximum, active)``, both one point shorter than the curve:
+        the most recent local maximum at or before each step, and whether
+        detection is active at that step.
+    """
+    # 32-bit positions halve the memory of the index arrays below
+    n = is_maximum.shape[-1]
+    positions = np.arange(n, dtype=np.int32 if n < 2**31 else np.intp)
+    # most recent local maximum/minimum at or before each point
+    last_maximum = np.maximum.accumulate(np.where(is_maximum, positions, -1), axis=-1)
+    last_minimum = np.maximum.accumulate(np.where(is_minimum, positions, -1), axis=-1)
+    last_maximum = last_maximum[..., :-1]
+    last_minimum = last_minimum[..., :-1]
+
+    # traversal starts at the first local maximum, and a point that is both
+    # a maximum and a minimum leaves detection paused
+    active = (last_maximum >= 0) & (last_maximum > last_minimum)
+    return last_maximum, active
+
+
+def _knee_crossings(
+    y_difference: np.ndarray,
+    is_maximum: np.ndarray,
+    is_minimum: np.ndarray,
+    thresholds: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Traverse difference curves and flag the points where knees are detected.
+
+    Equivalent to walking each difference curve point by point: a local
+    maximum arms the detector with its threshold, a local minimum disarms
+    it, and a knee is declared whenever the next point falls below the
+    armed threshold. The walk is expressed with cumulative extrema masks
+    so it runs in O(N) inside NumPy. All arrays are traversed along their
+    last axis, so a 2-D input processes one curve per row.
+
+    Parameters
+    ----------
+    y_difference : numpy.ndarray
+        The y values of the difference curve(s).
+    is_maximum : numpy.ndarray
+        Boolean mask of the local maxima of the difference curve(s).
+    is_minimum : numpy.ndarray
+        Boolean mask of the local minima of the difference curve(s).
+    thresholds : numpy.ndarray
+        The threshold armed by each point. Only read at the local maxima.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        ``(detected, threshold_index)``, both one point shorter than the
+        curve. ``detected[..., i]`` is True if a knee is declared at step
+        ``i`` and ``threshold_index[..., i]`` is the local maximum that
+        armed the detector at that step.
+    """
+    last_maximum, active = _armed_maxima(is_maximum, is_minimum)
+    armed = np.take_along_axis(
+        np.broadcast_to(thresholds, y_difference.shape),
+        np.maximum(last_maximum, 0),
+        axis=-1,
+    )
+    detected = active & (y_difference[..., 1:] < armed)
+    return detected, last_maximum
+
+
+def _find_knee_indices(
+    y_difference: np.ndarray,
+    maxima_indices: np.ndarray,
+    minima_indices: np.ndarray,
+    Tmx: np.ndarray,
+    online: bool,
+) -> np.ndarray:
+    """Return the local maxima at which knees are detected on a difference curve.
+
+    Parameters
+    ----------
+    y_difference : numpy.ndarray
+        The y values of the difference curve.
+    maxima_indices : numpy.ndarray
+        The indices of the local maxima of the difference curve.
+    minima_indices : numpy.ndarray
+        The indices of the local minima of the difference curve.
+    Tmx : numpy.ndarray
+        The threshold for each local maximum.
+    online : bool
+        If False, stop at the first detection.
+
+    Returns
+    -------
+    numpy.ndarray
+        The index of the local maximum responsible for each detection, in
+        traversal order. Empty if no knee was found.
+    """
+    is_maximum = np.zeros(y_difference.shape, dtype=bool)
+    is_maximum[maxima_indices] = True
+    is_minimum = np.zeros(y_difference.shape, dtype=bool)
+    is_minimum[minima_indices] = True
+    thresholds = np.zeros(y_difference.shape, dtype=y_difference.dtype)
+    thresholds[maxima_indices] = Tmx
+
+    detected, threshold_index = _knee_crossings(
+        y_difference, is_maximum, is_minimum, thresholds
+    )
+    if not online:
+        # only the first detection is needed in offline mode
+        first = np.argmax(detected)
+        return threshold_index[first : first + 1][detected[first : first + 1]]
+    return threshold_index[detected]
+
+
+def _validate(curve: str, direction: str):
+    if curve not in VALID_CURVE or direction not in VALID_DIRECTION:
+        raise ValueError(
+            "Please check that the curve and direction arguments are valid."
+        )
+
+
+def normalize(a: np.ndarray, dtype: Optional[np.dtype] = None) -> np.ndarray:
+    """Normalize an array to [0, 1].
+
+    Parameters
+    ----------
+    a : numpy.ndarray
+        The array to normalize.
+    dtype : numpy.dtype, optional
+        The floating point type of the result. Defaults to the type of
+        ``a``, or float64 for integer arrays.
+
+    Returns
+    -------
+    numpy.ndarray
+        The normalized array.
+    """
+    a_min, a_max = np.min(a), np.max(a)
+    if np.issubdtype(a.dtype, np.integer):
+        # subtract exactly, in integers wide enough not to overflow
+        wide = np.result_type(a.dtype, np.int64)
+        shifted = np.subtract(a, a_min, dtype=wide)
+        span = np.subtract(a_max, a_min, dtype=wide)
+    else:
+        shifted = a - a_min
+        span = a_max - a_min
+    if dtype is None:
+        dtype = np.result_type(shifted.dtype, np.float16)
+    return np.true_divide(shifted, span, dtype=dtype)
+
+
+def transform_y(y: Iterable[float], direction: str, curve: str) -> float:
+    """Transform y to concave, increasing based on given direction and curve.
+
+    Parameters
+    ----------
+    y : array-like
+        The y values to transform. A 2-D array is transformed row by row.
+    direction : str
+        One of ``{"increasing", "decreasing"}``.
+    curve : str
+        One of ``{"concave", "convex"}``.
+
+    Returns
+    -------
+    numpy.ndarray
+        The transformed y values.
+    """
+    # convert elbows to knees
+    if direction == "decreasing":
+        if curve == "concave":
+            y = np.flip(y, axis=-1)
+        elif curve == "convex":
+            y = np.max(y, axis=-1, keepdims=True) - y
+    elif direction == "increasing" and curve == "convex":
+        y = np.flip(np.max(y, axis=-1, keepdims=True) - y, axis=-1)
+
+    return y
+
+
+def fit_line(
+    x: np.ndarray,
+    y: np.ndarray,
+    interp_method: str = "interp1d",
+    polynomial_degree: int = 7,
+    interp_kwargs: Optional[dict] = None,
+) -> np.ndarray:
+    """Step 1: fit a smooth line, evaluated at ``x``.
+
+    Parameters
+    ----------
+    x : numpy.ndarray
+        x values.
+    y : numpy.ndarray
+        y values.
+    interp_method : str, default "interp1d"
+        The smoother, see ``KneeLocator``.
+    polynomial_degree : int, default 7
+        The degree of the fitting polynomial. Only used when
+        ``interp_method="polynomial"``.
+    interp_kwargs : dict, optional
+        Keyword arguments for the smoother selected by ``interp_method``.
+
+    Returns
+    -------
+    numpy.ndarray
+        The y values of the fitted line.
+    """
+    if interp_method == "interp1d":
+        # the linear interpolant evaluated at its own knots is y itself
+        return y
+    if interp_method == "polynomial":
+        return polynomial_fit(x, y, polynomial_degree)
+    return get_smoother(interp_method)(x, y, **(interp_kwargs or {}))
+
+
+def difference_curve(
+    x: np.ndarray,
+    Ds_y: np.ndarray,
+    S: float,
+    curve: str,
+    direction: str,
+    dtype: Optional[np.dtype] = None,
+    profiler: Optional[_StageProfiler] = None,
+) -> dict:
+    """Steps 2 to 5: turn the fitted line into knee thresholds.
+
+    Parameters
+    ----------
+    x : numpy.ndarray
+        x values.
+    Ds_y : numpy.ndarray
+        The y values of the fitted line.
+    S : float
+        Sensitivity.
+    curve : str
+        One of ``{"concave", "convex"}``.
+    direction : str
+        One of ``{"increasing", "decreasing"}``.
+    dtype : numpy.dtype, optional
+        The floating point type of the normalized curves.
+    profiler : _StageProfiler, optional
+        Records each step when profiling is enabled.
+
+    Returns
+    -------
+    dict
+        The intermediate arrays ``x_normalized``, ``y_normalized``,
+        ``y_difference``, ``maxima_indices``, ``minima_indices`` and
+        ``Tmx``.
+    """
+    profiler = profiler if profiler is not None else _StageProfiler()
+    d = {}
+
+    # Step 2: normalize values
+    with profiler.stage("normalize", lambda: len(d["x_normalized"])):
+        d["x_normalized"] = normalize(x, dtype)
+        y_normalized = normalize(Ds_y, dtype)
+
+    # Step 3: Calculate the Difference curve
+    with profiler.stage("difference", lambda: len(d["y_difference"])):
+        d["y_normalized"] = transform_y(y_normalized, direction, curve)
+        # normalized difference curve
+        d["y_difference"] = d["y_normalized"] - d["x_normalized"]
+
+    # Step 4: Identify local maxima/minima
+    with profiler.stage(
+        "extrema", lambda: len(d["maxima_indices"]) + len(d["minima_indices"])
+    ):
+        # local maxima
+        d["maxima_indices"] = np.flatnonzero(
+            _extrema_mask(d["y_difference"], np.greater_equal)
+        )
+        # local minima
+        d["minima_indices"] = np.flatnonzero(
+            _extrema_mask(d["y_difference"], np.less_equal)
+        )
+
+    # Step 5: Calculate thresholds
+    with profiler.stage("thresholds", lambda: len(d["Tmx"])):
+        d["Tmx"] = d["y_difference"][d["maxima_indices"]] - (
+            S * np.abs(np.diff(d["x_normalized"]).mean())
+        )
+
+    return d
+
+
+def knee_index(threshold_index, n: int, curve: str, direction: str):
+    """Map indices on the difference curve of ``n`` points to indices into
+    ``x``.
+
+    The difference curve is flipped for convex increasing and concave
+    decreasing curves, so the mapping is its own inverse.
+    """
+    if (curve == "convex") == (direction == "increasing"):
+        return n - 1 - threshold_index
+    return threshold_index
+
+
+def detect_knees(
+    d: dict, curve: str, direction: str, online: bool
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Step 6: find the knees on a difference curve.
+
+    Parameters
+    ----------
+    d : dict
+        The intermediate arrays returned by ``difference_curve``.
+    curve : str
+        One of ``{"concave", "convex"}``.
+    direction : str
+        One of ``{"increasing", "decreasing"}``.
+    online : bool
+        If False, stop at the first detection.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        ``(knee_indices, threshold_indices)``, the index into ``x`` and
+        the index on the difference curve of every detection, in
+        traversal order. The last one is the knee. Empty if no knee was
+        found.
+    """
+    if not d["maxima_indices"].size:
+        # No local maxima found in the difference curve
+        # The line is probably not polynomial, try plotting
+        # the difference curve with plt.plot(knee.x_difference, knee.y_difference)
+        # Also check that you aren't mistakenly setting the curve argument
+        threshold_indices = np.empty(0, dtype=np.intp)
+    else:
+        threshold_indices = _find_knee_indices(
+            d["y_difference"],
+            d["maxima_indices"],
+            d["minima_indices"],
+            d["Tmx"],
+            online,
+        )
+    n = len(d["y_difference"])
+    return knee_index(threshold_indices, n, curve, direction), threshold_indices
+
+
+def first_seen(knee_indices: np.ndarray) -> np.ndarray:
+    """The positions of the first detection of each distinct knee, in the
+    order they were detected."""
+    _, first = np.unique(knee_indices, return_index=True)
+    first.sort()
+    return first
+
+
+def kneedle(
+    x: Iterable[float],
+    y: Iterable[float],
+    S: float = 1.0,
+    curve: str = "concave",
+    direction: str = "increasing",
+    interp_method: str = "interp1d",
+    online: bool = False,
+    polynomial_degree: int = 7,
+    interp_kwargs: Optional[dict] = None,
+    dtype: Optional[Union[str, np.dtype]] = None,
+) -> KneeResult:
+    """Find the knee of a curve, without building a ``KneeLocator``.
+
+    Runs the same steps as ``KneeLocator`` and returns only the result.
+    It has no side effects and shares nothing between calls, so it is
+    safe to call from many threads at once, and the inputs are only read.
+    ``KneeLocator`` adds resampling, decimation, caching, profiling and
+    access to the intermediate arrays on top of it.
+
+    Parameters
+    ----------
+    x : array-like
+        x values, must be the same length as y.
+    y : array-like
+        y values, must be the same length as x.
+    S : float, default 1.0
+        Sensitivity, see ``KneeLocator``.
+    curve : str, default "concave"
+        One of ``{"concave", "convex", "auto"}``.
+    direction : str, default "increasing"
+        One of ``{"increasing", "decreasing", "auto"}``.
+    interp_method : str, default "interp1d"
+        The smoother, see ``KneeLocator``.
+    online : bool, default False
+        If True, report the last knee found instead of the first.
+    polynomial_degree : int, default 7
+        The degree of the fitting polynomial. Only used when
+        ``interp_method="polynomial"``.
+    interp_kwargs : dict, optional
+        Keyword arguments for the smoother selected by ``interp_method``.
+    dtype : str or numpy.dtype, optional
+        Cast ``x`` and ``y`` to this floating point type, see
+        ``KneeLocator``.
+
+    Returns
+    -------
+    KneeResult
+        The knee, with ``knee`` set to None if no knee/elbow was found.
+    """
+    if dtype is not None and np.dtype(dtype).kind != "f":
+        raise ValueError("dtype must be a floating point type, e.g. float32.")
+    dtype = None if dtype is None else np.dtype(dtype)
+    x = np.asarray(x, dtype=dtype)
+    y = np.asarray(y, dtype=dtype)
+    if len(x) != len(y):
+        raise ValueError("x and y must be the same length.")
+    if "auto" in (curve, direction):
+        detected_direction, detected_curve = find_shape(x, y)
+        curve = detected_curve if curve == "auto" else curve
+        direction = detected_direction if direction == "auto" else direction
+    _validate(curve, direction)
+
+    Ds_y = fit_line(x, y, interp_method, polynomial_degree, interp_kwargs)
+    d = difference_curve(x, Ds_y, S, curve, direction, dtype)
+    knee_indices, threshold_indices = detect_knees(d, curve, direction, online)
+    if not knee_indices.size:
+        return KneeResult()
+
+    first = first_seen(knee_indices)
+    all_knees_indices = knee_indices[first]
+    all_threshold_indices = threshold_indices[first]
+    knee, threshold = knee_indices[-1], threshold_indices[-1]
+    return KneeResult(
+        knee=x[knee],
+        knee_y=y[knee],
+        norm_knee=d["x_normalized"][threshold],
+        norm_knee_y=d["y_normalized"][threshold],
+        knee_index=int(knee),
+        all_knees_indices=all_knees_indices,
+        all_knees=x[all_knees_indices],
+        all_knees_y=y[all_knees_indices],
+        all_norm_knees=d["x_normalized"][all_threshold_indices],
+        all_norm_knees_y=d["y_normalized"][all_threshold_indices],
+    )
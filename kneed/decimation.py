@@ -0,0 +1,99 @@
+import numpy as np
+from typing import Iterable
+
+
+def lttb(x: Iterable[float], y: Iterable[float], n_out: int) -> np.ndarray:
+    """Pick the points that preserve the shape of a curve, Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept. The points in between are
+    split into ``n_out - 2`` buckets of equal size, and from each bucket
+    the point forming the largest triangle with the point picked from the
+    previous bucket and the average of the next bucket is kept.
+
+    Parameters
+    ----------
+    x : array-like
+        x values, sorted in increasing order.
+    y : array-like
+        y values, must be the same length as x.
+    n_out : int
+        The number of points to keep, at least 3.
+
+    Returns
+    -------
+    numpy.ndarray
+        The sorted indices of the points to keep.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out < 3:
+        raise ValueError("lttb needs to keep at least 3 points.")
+    if n_out >= n:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    # prefix sums give the average of each bucket in O(1)
+    x_sums = np.concatenate(([0.0], np.cumsum(x)))
+    y_sums = np.concatenate(([0.0], np.cumsum(y)))
+    next_starts = edges[1:]
+    next_stops = np.append(edges[2:], n)
+    next_sizes = next_stops - next_starts
+    next_x = (x_sums[next_stops] - x_sums[next_starts]) / next_sizes
+    next_y = (y_sums[next_stops] - y_sums[next_starts]) / next_sizes
+
+    indices = np.empty(n_out, dtype=np.intp)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        bucket_x, bucket_y = x[start:stop], y[start:stop]
+        area = np.abs(
+            (x[a] - next_x[i]) * (bucket_y - y[a])
+            - (x[a] - bucket_x) * (next_y[i] - y[a])
+        )
+        a = start + np.argmax(area)
+        indices[i + 1] = a
+    return indices
+
+
+def minmax(x: Iterable[float], y: Iterable[float], n_out: int) -> np.ndarray:
+    """Pick the lowest and highest point of each bucket of a curve.
+
+    The first and last points are always kept. The points in between are
+    split into ``(n_out - 2) // 2`` buckets of equal size and the points
+    with the smallest and largest y value of each bucket are kept, so
+    spikes survive the decimation.
+
+    Parameters
+    ----------
+    x : array-like
+        x values, sorted in increasing order.
+    y : array-like
+        y values, must be the same length as x.
+    n_out : int
+        The maximum number of points to keep, at least 4.
+
+    Returns
+    -------
+    numpy.ndarray
+        The sorted indices of the points to keep.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out < 4:
+        raise ValueError("minmax needs to keep at least 4 points.")
+    if n_out >= n:
+        return np.arange(n)
+
+    n_buckets = (n_out - 2) // 2
+    interior = np.arange(1, n - 1)
+    bucket = (interior - 1) * n_buckets // (n - 2)
+    # sorted by bucket, then by y within each bucket
+    order = interior[np.lexsort((y[interior], bucket))]
+    edges = np.searchsorted(bucket, np.arange(n_buckets + 1))
+    keep = np.concatenate(([0], order[edges[:-1]], order[edges[1:] - 1], [n - 1]))
+    return np.unique(keep)
+
+
+DOWNSAMPLE_METHODS = {"lttb": lttb, "minmax": minmax}
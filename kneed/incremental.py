@@ -0,0 +1,248 @@
+import numpy as np
+from typing import Iterable, Optional
+
+from .batch import locate_knees
+from .chunked import ChunkedKneeLocator
+from .core import VALID_CURVE, VALID_DIRECTION
+
+# points of the difference curve walked at a time when looking for a knee
+_CHUNK_SIZE = 2**14
+
+
+class IncrementalKneeLocator(object):
+    """Track the knee of a curve that grows one point at a time.
+
+    Points are appended with ``update`` or ``extend`` in amortized O(1)
+    time per point, into buffers that grow geometrically, and the running
+    minimum and maximum of ``x`` and ``y`` are kept up to date as they
+    arrive. The knee is only computed when one of the result attributes
+    is read, and is reused until more data arrives.
+
+    Every appended point that widens the x or y range rescales the whole
+    normalized difference curve, so a read after new data walks the
+    difference curve again from its start. In offline mode with
+    ``interp_method="interp1d"``, the walk normalizes with the running
+    ranges and stops at the first knee, so a read costs time proportional
+    to the position of the knee rather than to the length of the curve.
+    Online mode has to reach the end of the curve, and a polynomial fit
+    spans all of it, so those reads are a vectorized O(N) pass. Reads
+    without new data in between are free.
+
+    Parameters
+    ----------
+    S : float, default 1.0
+        Sensitivity, see ``KneeLocator``.
+    curve : str, default "concave"
+        One of ``{"concave", "convex"}``.
+    direction : str, default "increasing"
+        One of ``{"increasing", "decreasing"}``.
+    interp_method : str, default "interp1d"
+        One of ``{"interp1d", "polynomial"}``.
+    online : bool, default False
+        If True, report the last knee found instead of the first.
+    polynomial_degree : int, default 7
+        The degree of the fitting polynomial. Only used when
+        ``interp_method="polynomial"``.
+    capacity : int, default 1024
+        The number of points to allocate room for up front.
+
+    Attributes
+    ----------
+    x : numpy.ndarray
+        x values received so far.
+    y : numpy.ndarray
+        y values received so far.
+    N : int
+        The number of points received so far.
+    knee : float or None
+        The x value of the current knee point.
+    knee_y : float or None
+        The y value of the current knee point.
+    norm_knee : float or None
+        The normalized x value of the current knee point.
+    norm_knee_y : float or None
+        The normalized y value of the current knee point.
+    """
+
+    def __init__(
+        self,
+        S: float = 1.0,
+        curve: str = "concave",
+        direction: str = "increasing",
+        interp_method: str = "interp1d",
+        online: bool = False,
+        polynomial_degree: int = 7,
+        capacity: int = 1024,
+    ):
+        if curve not in VALID_CURVE or direction not in VALID_DIRECTION:
+            raise ValueError(
+                "Please check that the curve and direction arguments are valid."
+            )
+        self.S = S
+        self.curve = curve
+        self.direction = direction
+        self.interp_method = interp_method
+        self.online = online
+        self.polynomial_degree = polynomial_degree
+        self.N = 0
+        self._x = np.empty(max(capacity, 1))
+        self._y = np.empty(max(capacity, 1))
+        self._x_min = self._y_min = np.inf
+        self._x_max = self._y_max = -np.inf
+        self._result = None
+
+    @property
+    def x(self) -> np.ndarray:
+        return self._x[: self.N]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self._y[: self.N]
+
+    def __len__(self) -> int:
+        return self.N
+
+    def _reserve(self, n: int):
+        """Make room for ``n`` more points, doubling the buffers if needed."""
+        needed = self.N + n
+        if needed <= len(self._x):
+            return
+        capacity = max(needed, 2 * len(self._x))
+        for name in ("_x", "_y"):
+            grown = np.empty(capacity)
+            grown[: self.N] = getattr(self, name)[: self.N]
+            setattr(self, name, grown)
+
+    def update(self, x: float, y: float):
+        """Append a single point to the curve.
+
+        Parameters
+        ----------
+        x : float
+            The x value of the new point.
+        y : float
+            The y value of the new point.
+        """
+        self._reserve(1)
+        self._x[self.N] = x
+        self._y[self.N] = y
+        x, y = self._x[self.N], self._y[self.N]
+        self._x_min = min(self._x_min, x)
+        self._x_max = max(self._x_max, x)
+        self._y_min = min(self._y_min, y)
+        self._y_max = max(self._y_max, y)
+        self.N += 1
+        self._result = None
+
+    def extend(self, xs: Iterable[float], ys: Iterable[float]):
+        """Append several points to the curve.
+
+        Parameters
+        ----------
+        xs : array-like
+            x values of the new points.
+        ys : array-like
+            y values of the new points, must be the same length as ``xs``.
+        """
+        xs = np.asarray(xs, dtype=float).ravel()
+        ys = np.asarray(ys, dtype=float).ravel()
+        if xs.shape != ys.shape:
+            raise ValueError("xs and ys must be the same length.")
+        if not len(xs):
+            return
+        self._reserve(len(xs))
+        self._x[self.N : self.N + len(xs)] = xs
+        self._y[self.N : self.N + len(ys)] = ys
+        self._x_min = min(self._x_min, xs.min())
+        self._x_max = max(self._x_max, xs.max())
+        self._y_min = min(self._y_min, ys.min())
+        self._y_max = max(self._y_max, ys.max())
+        self.N += len(xs)
+        self._result = None
+
+    def _locate(self) -> tuple:
+        """Compute the knee of the current curve, reusing the last result."""
+        if self._result is None:
+            if self.N < 2:
+                self._result = (None, None, None, None)
+            elif self.interp_method == "interp1d" and not self.online:
+                # a flat x or y normalizes to NaN, like in locate_knees
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    locator = _BufferKneeLocator(self)
+                self._result = (
+                    locator.knee,
+                    locator.knee_y,
+                    locator.norm_knee,
+                    locator.norm_knee_y,
+                )
+            else:
+                results = locate_knees(
+                    self.x,
+                    self.y[np.newaxis],
+                    S=self.S,
+                    curve=self.curve,
+                    direction=self.direction,
+                    interp_method=self.interp_method,
+                    online=self.online,
+                    polynomial_degree=self.polynomial_degree,
+                )
+                self._result = tuple(
+                    None if np.isnan(value[0]) else value[0] for value in results
+                )
+        return self._result
+
+    @property
+    def knee(self) -> Optional[float]:
+        return self._locate()[0]
+
+    @property
+    def knee_y(self) -> Optional[float]:
+        return self._locate()[1]
+
+    @property
+    def norm_knee(self) -> Optional[float]:
+        return self._locate()[2]
+
+    @property
+    def norm_knee_y(self) -> Optional[float]:
+        return self._locate()[3]
+
+    # Niceties for users working with elbows rather than knees
+    @property
+    def elbow(self):
+        return self.knee
+
+    @property
+    def norm_elbow(self):
+        return self.norm_knee
+
+    @property
+    def elbow_y(self):
+        return self.knee_y
+
+    @property
+    def norm_elbow_y(self):
+        return self.norm_knee_y
+
+
+class _BufferKneeLocator(ChunkedKneeLocator):
+    """``ChunkedKneeLocator`` over the buffers of an ``IncrementalKneeLocator``,
+    normalized with its running ranges instead of a first pass."""
+
+    def __init__(self, source: IncrementalKneeLocator):
+        self._source = source
+        super().__init__(
+            source.x,
+            source.y,
+            S=source.S,
+            curve=source.curve,
+            direction=source.direction,
+            chunk_size=_CHUNK_SIZE,
+        )
+
+    def _ranges(self) -> tuple:
+        source = self._source
+        return (
+            (source._x_min, source._x_max - source._x_min),
+            (source._y_min, source._y_max - source._y_min),
+        )
@@ -1,20 +1,45 @@
 import numpy as np
-from scipy import interpolate
-from scipy.signal import argrelextrema
-from typing import Tuple, Optional, Iterable
-
-VALID_CURVE = ["convex", "concave"]
-VALID_DIRECTION = ["increasing", "decreasing"]
-
-try:
-    import matplotlib.pyplot as plt
-except ImportError:
-    _has_matplotlib = False
-    _matplotlib_not_found_err = ModuleNotFoundError(
-        "This function needs Matplotlib to be executed. Please run command `pip install kneed[plot]` "
-    )
-else:
-    _has_matplotlib = True
+from copy import deepcopy
+from functools import partial
+from typing import Callable, Tuple, Optional, Iterable, Union
+
+from .cache import KneeCache
+from .core import (
+    VALID_CURVE,
+    VALID_DIRECTION,
+    _StageProfiler,
+    _armed_maxima,
+    _extrema_mask,
+    detect_knees,
+    difference_curve,
+    first_seen,
+    knee_index,
+    normalize,
+    transform_y,
+)
+from .decimation import DOWNSAMPLE_METHODS
+from .result import KneeResult
+from .shape_detector import find_shape
+from .smoothing import get_smoother, polynomial_fit
+
+
+def _import_pyplot():
+    """Import matplotlib.pyplot on first use, it is slow to import."""
+    try:
+        import matplotlib.pyplot as plt
+    except ImportError:
+        raise ModuleNotFoundError(
+            "This function needs Matplotlib to be executed. Please run command `pip install kneed[plot]` "
+        ) from None
+    return plt
+
+
+def _owned(a: np.ndarray, source) -> np.ndarray:
+    """Return ``a``, copied if it may share memory with the caller's
+    ``source``."""
+    if a is source or not a.flags.owndata:
+        return a.copy()
+    return a
 
 
 class KneeLocator(object):
@@ -33,25 +58,80 @@ class KneeLocator(object):
         a default of 1.0.
     curve : str, default "concave"
         If ``"concave"``, the algorithm will detect knees. If ``"convex"``,
-        it will detect elbows.
+        it will detect elbows. If ``"auto"``, it is detected from the data
+        with ``find_shape``.
     direction : str, default "increasing"
-        One of ``{"increasing", "decreasing"}``.
+        One of ``{"increasing", "decreasing", "auto"}``. If ``"auto"``, it
+        is detected from the data with ``find_shape``.
     interp_method : str, default "interp1d"
-        One of ``{"interp1d", "polynomial"}``.
+        How the line is smoothed before looking for the knee. ``"interp1d"``
+        uses the data as it is, ``"polynomial"`` fits a single polynomial.
+        The local smoothers ``"savgol"`` (Savitzky-Golay),
+        ``"moving_average"`` and ``"spline"`` (a cubic smoothing spline)
+        run in linear time, and more can be added with
+        ``kneed.smoothing.register_smoother``.
     online : bool, default False
         If True, kneed will correct old knee points as it traverses the
         curve. If False, it returns the first knee found.
     polynomial_degree : int, default 7
         The degree of the fitting polynomial. Only used when
-        ``interp_method="polynomial"``. Passed to ``numpy.polyfit`` as
-        the ``deg`` parameter.
+        ``interp_method="polynomial"``. The polynomial is fitted in a
+        Chebyshev basis on ``x`` scaled to ``[-1, 1]``, see
+        ``kneed.smoothing.polynomial_fit``.
+    interp_kwargs : dict, optional
+        Keyword arguments for the smoother selected by ``interp_method``,
+        e.g. ``{"window_length": 21}`` for ``"savgol"``.
+    resample : int or array-like, optional
+        Resample the fitted line onto a new grid before looking for the
+        knee, which is useful for unevenly sampled data. An integer builds
+        a uniform grid with that many points spanning ``x``, an array is
+        used as the grid directly. By default the input ``x`` values are
+        used as they are.
+    downsample : int, optional
+        Decimate curves longer than this many points before fitting, with
+        ``downsample_method``. The knees are found on the decimated curve,
+        then each one is refined to the original point between its
+        decimated neighbours where the full resolution difference curve
+        is highest. Every reported knee value and index refers to the
+        original points. Cannot be combined with ``resample``.
+    downsample_method : str, default "lttb"
+        One of ``{"lttb", "minmax"}``. ``"lttb"`` keeps the points that
+        best preserve the shape of the curve (Largest-Triangle-Three-
+        Buckets), ``"minmax"`` the lowest and highest point of each bucket.
+    profile : bool or callable, default False
+        If True, record the wall time, peak allocated bytes and output
+        size of each step in ``timings``. Memory is measured with
+        ``tracemalloc``, which slows the steps down. A callable is called
+        with ``(stage, record)`` as each step ends, e.g. to forward the
+        measurements to a metrics system.
+    keep_intermediates : bool, default True
+        If False, only ``x``, ``y`` and the knee results are kept once the
+        knee is found (plus the fitted line for non-default
+        ``interp_method``). The intermediate arrays such as
+        ``y_difference`` or ``Tmx`` are then recomputed each time they are
+        read, which keeps long-lived locators small, and cannot be
+        assigned.
+    cache : KneeCache, optional
+        Reuse the result of an earlier ``KneeLocator`` with the same data
+        and arguments from this cache, and store new results in it. See
+        ``kneed.cache.KneeCache``.
+    dtype : str or numpy.dtype, optional
+        Cast ``x`` and ``y`` to this floating point type, e.g.
+        ``"float32"`` to process huge curves in half the memory, and keep
+        every step in it. By default floating point inputs keep their type
+        and integer inputs are only converted by the normalization. The
+        knee threshold moves by ``S / N`` per point, which float32 no
+        longer resolves past about 10**5 points, so combine it with
+        ``downsample`` for longer curves.
 
     Attributes
     ----------
     x : numpy.ndarray
-        x values.
+        x values. The resampled grid when ``resample`` is set, the
+        decimated x values when ``downsample`` is.
     y : numpy.ndarray
-        y values.
+        y values. Linearly interpolated onto the grid when ``resample``
+        is set, decimated along with ``x`` when ``downsample`` is.
     S : float
         Sensitivity, original paper suggests default of 1.0.
     curve : str
@@ -60,11 +140,33 @@ class KneeLocator(object):
     direction : str
         One of ``{"increasing", "decreasing"}``.
     interp_method : str
-        One of ``{"interp1d", "polynomial"}``.
+        The smoother applied in Step 1, e.g. ``"interp1d"`` or
+        ``"polynomial"``.
     online : bool
         If True, corrects old knee points. If False, returns first knee.
     polynomial_degree : int
         The degree of the fitting polynomial.
+    interp_kwargs : dict
+        Keyword arguments for the smoother.
+    resample : int, array-like or None
+        The grid the data was resampled onto, if any.
+    downsample : int or None
+        The maximum number of points the curve was decimated to, if any.
+    downsample_method : str
+        One of ``{"lttb", "minmax"}``.
+    downsample_indices : numpy.ndarray or None
+        The indices into the input data of the points kept by
+        ``downsample``. None if the curve was not decimated.
+    keep_intermediates : bool
+        Whether the intermediate arrays are stored or recomputed on access.
+    dtype : numpy.dtype or None
+        The floating point type the curve is processed in, if one was set.
+    timings : dict
+        Per-step measurements when ``profile`` is enabled, keyed by step
+        name (``"input"``, ``"downsample"``, ``"fit"``, ``"normalize"``, ``"difference"``,
+        ``"extrema"``, ``"thresholds"``, ``"find_knee"``). Each record holds
+        ``"time"`` in seconds, ``"bytes"`` allocated at peak and ``"size"``,
+        the number of elements the step produced. Empty otherwise.
     N : int
         The number of ``x`` values in the input data.
     Ds_y : numpy.ndarray
@@ -104,14 +206,34 @@ class KneeLocator(object):
         The normalized x value of the knee point.
     norm_knee_y : float or None
         The normalized y value of the knee point.
+    knee_index : int or None
+        The index into ``x`` and ``y`` of the knee point. When the curve
+        was decimated, the index into the input data, not into the
+        decimated ``x``.
+    knee_error : float or None
+        When the curve was decimated, the width in x of the window of
+        original points the knee was refined in. The refined ``knee`` is
+        within this distance of the decimated one. None otherwise.
     all_knees : set
         All the x values of the identified knee points.
+    all_knees_indices : numpy.ndarray
+        The indices into ``x`` and ``y`` of all the identified knee points,
+        in the order they were first detected. Indices into the input data
+        when the curve was decimated, like ``knee_index``. ``all_knees_x``,
+        ``all_knees_y`` and ``all_norm_knees_y`` are aligned with it.
+    all_knees_x : numpy.ndarray
+        The x values of all the identified knee points, aligned with
+        ``all_knees_indices``.
     all_norm_knees : set
         All the normalized x values of the identified knee points.
     all_knees_y : list
-        All the y values of the identified knee points.
+        All the y values of the identified knee points, aligned with
+        ``all_knees_indices``.
     all_norm_knees_y : list
         All the normalized y values of the identified knee points.
+    result : KneeResult
+        The knee results in a compact, read-only record, see
+        ``kneed.result.KneeResult``.
     elbow : float or None
         Alias for ``knee``.
     elbow_y : float or None
@@ -130,6 +252,40 @@ class KneeLocator(object):
         Alias for ``all_norm_knees_y``.
     """
 
+    __slots__ = (
+        "x",
+        "y",
+        "N",
+        "S",
+        "curve",
+        "direction",
+        "interp_method",
+        "online",
+        "polynomial_degree",
+        "interp_kwargs",
+        "dtype",
+        "resample",
+        "downsample",
+        "downsample_method",
+        "downsample_indices",
+        "knee_error",
+        "keep_intermediates",
+        "timings",
+        "knee",
+        "norm_knee",
+        "knee_y",
+        "norm_knee_y",
+        "all_knees",
+        "all_norm_knees",
+        "all_knees_y",
+        "all_norm_knees_y",
+        "knee_index",
+        "all_knees_indices",
+        "_intermediates",
+        "_fitted_y",
+        "_refinement",
+    )
+
     def __init__(
         self,
         x: Iterable[float],
@@ -140,20 +296,77 @@ class KneeLocator(object):
         interp_method: str = "interp1d",
         online: bool = False,
         polynomial_degree: int = 7,
+        interp_kwargs: Optional[dict] = None,
+        resample: Optional[Union[int, Iterable[float]]] = None,
+        downsample: Optional[int] = None,
+        downsample_method: str = "lttb",
+        profile: Union[bool, Callable[[str, dict], None]] = False,
+        keep_intermediates: bool = True,
+        cache: Optional[KneeCache] = None,
+        dtype: Optional[Union[str, np.dtype]] = None,
     ):
+        if cache is not None:
+            key = cache.key(
+                x,
+                y,
+                S=S,
+                curve=curve,
+                direction=direction,
+                interp_method=interp_method,
+                online=online,
+                polynomial_degree=polynomial_degree,
+                interp_kwargs=interp_kwargs,
+                resample=resample,
+                downsample=downsample,
+                downsample_method=downsample_method,
+                keep_intermediates=keep_intermediates,
+                dtype=None if dtype is None else np.dtype(dtype).str,
+            )
+            cached = cache.get(key)
+            if cached is not None:
+                self._restore(cached)
+                return
+
+        if dtype is not None and np.dtype(dtype).kind != "f":
+            raise ValueError("dtype must be a floating point type, e.g. float32.")
+        self.dtype = None if dtype is None else np.dtype(dtype)
+        profiler = _StageProfiler(profile)
+        self.timings = profiler.timings
+        self.keep_intermediates = keep_intermediates
+        self._intermediates = {}
+        self._fitted_y = None
+        self._refinement = None
+
         # Step 0: Raw Input
-        self.x = np.array(x)
-        self.y = np.array(y)
+        with profiler.stage("input", lambda: self.N):
+            # arrays of the right type are used as they are, not copied
+            self.x = np.asarray(x, dtype=self.dtype)
+            self.y = np.asarray(y, dtype=self.dtype)
+            self.N = len(self.x)
+        if "auto" in (curve, direction) and len(self.x) == len(self.y):
+            detected_direction, detected_curve = find_shape(self.x, self.y)
+            if curve == "auto":
+                curve = detected_curve
+            if direction == "auto":
+                direction = detected_direction
         self.curve = curve
         self.direction = direction
-        self.N = len(self.x)
         self.S = S
         self.all_knees = set()
         self.all_norm_knees = set()
         self.all_knees_y = []
         self.all_norm_knees_y = []
+        self.knee_index = None
+        self.all_knees_indices = np.empty(0, dtype=np.intp)
+        self.interp_method = interp_method
         self.online = online
         self.polynomial_degree = polynomial_degree
+        self.interp_kwargs = dict(interp_kwargs or {})
+        self.resample = resample
+        self.downsample = downsample
+        self.downsample_method = downsample_method
+        self.downsample_indices = None
+        self.knee_error = None
 
         # I'm implementing Look Before You Leap (LBYL) validation for direction
         # and curve arguments. This is not preferred in Python. The motivation
@@ -168,101 +381,348 @@ class KneeLocator(object):
                 "Please check that the curve and direction arguments are valid."
             )
 
-        # Step 1: fit a smooth line
-        if interp_method == "interp1d":
-            uspline = interpolate.interp1d(self.x, self.y)
-            self.Ds_y = uspline(self.x)
-        elif interp_method == "polynomial":
-            p = np.poly1d(np.polyfit(x, y, self.polynomial_degree))
-            self.Ds_y = p(x)
-        else:
+        if len(self.x) != len(self.y):
+            raise ValueError("x and y must be the same length.")
+
+        if downsample_method not in DOWNSAMPLE_METHODS:
             raise ValueError(
-                "{} is an invalid interp_method parameter, use either 'interp1d' or 'polynomial'".format(
-                    interp_method
+                "{} is an invalid downsample_method parameter, use either 'lttb' or 'minmax'".format(
+                    downsample_method
                 )
             )
+        if downsample is not None and resample is not None:
+            raise ValueError("downsample and resample cannot be combined.")
+
+        # Decimate very long curves, the original points are kept until the
+        # knee has been refined on them
+        full_x = full_y = None
+        if downsample is not None and self.N > downsample:
+            with profiler.stage("downsample", lambda: self.N):
+                full_x, full_y = self.x, self.y
+                self.downsample_indices = DOWNSAMPLE_METHODS[downsample_method](
+                    full_x, full_y, int(downsample)
+                )
+                self.x = full_x[self.downsample_indices]
+                self.y = full_y[self.downsample_indices]
+                self.N = len(self.x)
 
-        # Step 2: normalize values
-        self.x_normalized = self.__normalize(self.x)
-        self.y_normalized = self.__normalize(self.Ds_y)
+        if not keep_intermediates:
+            # compact locators rebuild their intermediate arrays from x and
+            # y, so later changes to the caller's arrays must not reach them
+            # (cache entries are deep copies already, see _snapshot)
+            self.x = _owned(self.x, x)
+            self.y = _owned(self.y, y)
 
-        # Step 3: Calculate the Difference curve
-        self.y_normalized = self.transform_y(
-            self.y_normalized, self.direction, self.curve
-        )
-        # normalized difference curve
-        self.y_difference = self.y_normalized - self.x_normalized
-        self.x_difference = self.x_normalized.copy()
-
-        # Step 4: Identify local maxima/minima
-        # local maxima
-        self.maxima_indices = argrelextrema(self.y_difference, np.greater_equal)[0]
-        self.x_difference_maxima = self.x_difference[self.maxima_indices]
-        self.y_difference_maxima = self.y_difference[self.maxima_indices]
-
-        # local minima
-        self.minima_indices = argrelextrema(self.y_difference, np.less_equal)[0]
-        self.x_difference_minima = self.x_difference[self.minima_indices]
-        self.y_difference_minima = self.y_difference[self.minima_indices]
-
-        # Step 5: Calculate thresholds
-        self.Tmx = self.y_difference_maxima - (
-            self.S * np.abs(np.diff(self.x_normalized).mean())
-        )
+        # Step 1: fit a smooth line
+        p = None
+        with profiler.stage("fit", lambda: self.N):
+            if resample is None:
+                grid = self.x
+            elif np.ndim(resample) == 0:
+                grid = np.linspace(self.x.min(), self.x.max(), int(resample))
+            else:
+                grid = np.asarray(resample)
+
+            if interp_method == "interp1d":
+                if resample is None:
+                    # the linear interpolant evaluated at its own knots is y itself
+                    self.Ds_y = self.y
+                else:
+                    from scipy.interpolate import interp1d
+
+                    self.Ds_y = interp1d(self.x, self.y)(grid)
+            elif interp_method == "polynomial":
+                self.Ds_y = polynomial_fit(
+                    self.x,
+                    self.y,
+                    self.polynomial_degree,
+                    None if resample is None else grid,
+                )
+                p = partial(polynomial_fit, self.x, self.y, self.polynomial_degree)
+            else:
+                smoother = get_smoother(interp_method)
+                smoothed = smoother(self.x, self.y, **self.interp_kwargs)
+                # the smoothed line between its points
+                p = partial(np.interp, xp=self.x, fp=smoothed)
+                self.Ds_y = smoothed if resample is None else p(grid)
+
+            if resample is not None:
+                if interp_method == "interp1d":
+                    self.y = self.Ds_y
+                else:
+                    from scipy.interpolate import interp1d
+
+                    self.y = interp1d(self.x, self.y)(grid)
+                self.x = grid
+                self.N = len(grid)
+
+        Ds_y = self.Ds_y
+
+        # Steps 2 to 5: normalize, difference curve, extrema and thresholds
+        self._intermediates.update(self._difference_curve(self.Ds_y, profiler))
+
+        with profiler.stage("find_knee", lambda: len(self.all_knees)):
+            if full_x is not None:
+                # where each decimated point lands on the original points
+                self._refinement = self._refine_knees(full_x, full_y, p)
+
+            # Step 6: find knee
+            self.knee, self.norm_knee = self.find_knee()
+
+            # Step 7: If we have a knee, extract data about it
+            self.knee_y = self.norm_knee_y = None
+            if self.knee_index is not None:
+                first = int(
+                    np.flatnonzero(self.all_knees_indices == self.knee_index)[0]
+                )
+                self.knee_y = self.all_knees_y[first]
+                self.norm_knee_y = self.all_norm_knees_y[first]
 
-        # Step 6: find knee
-        self.knee, self.norm_knee = self.find_knee()
+        if not keep_intermediates:
+            # keep what is needed to rebuild the rest on demand
+            self._intermediates = None
+            if interp_method != "interp1d":
+                self._fitted_y = Ds_y
 
-        # Step 7: If we have a knee, extract data about it
-        self.knee_y = self.norm_knee_y = None
-        if self.knee:
-            self.knee_y = self.y[self.x == self.knee][0]
-            self.norm_knee_y = self.y_normalized[self.x_normalized == self.norm_knee][0]
+        if cache is not None:
+            cache.set(key, self._snapshot())
 
-    @staticmethod
-    def __normalize(a: Iterable[float]) -> Iterable[float]:
-        """Normalize an array to [0, 1].
+    def _snapshot(self) -> dict:
+        """Copy what a cache keeps of this locator.
+
+        Only ``x``, ``y``, the fitted line and the results are kept, the
+        intermediate arrays are rebuilt from them like in compact mode.
+
+        Returns
+        -------
+        dict
+            Attribute values, keyed by name, for ``_restore``.
+        """
+        state = {
+            name: getattr(self, name)
+            for name in self.__slots__
+            if name != "_intermediates" and hasattr(self, name)
+        }
+        state["_intermediates"] = None
+        if self._intermediates is not None and self.interp_method != "interp1d":
+            state["_fitted_y"] = self._intermediates["Ds_y"]
+        return deepcopy(state)
+
+    def _restore(self, state: dict):
+        """Take the attributes saved by ``_snapshot``, e.g. from a cache."""
+        # copied so that locators restored from the same state stay
+        # independent
+        for name, value in deepcopy(state).items():
+            setattr(self, name, value)
+        if self.keep_intermediates:
+            self._intermediates = self._get_intermediates()
+            self._fitted_y = None
+
+    def _refine_knees(
+        self,
+        x: np.ndarray,
+        y: np.ndarray,
+        fit: Optional[Callable[[np.ndarray], np.ndarray]],
+    ) -> dict:
+        """Move every point of the decimated curve to the original point
+        between its decimated neighbours where the difference curve of the
+        original points is highest.
+
+        A knee is a maximum of the difference curve, so a knee found on the
+        decimated curve is refined by looking it up here. The work is one
+        pass over the original points, whatever the number of knees, and
+        the result holds a few values per decimated point.
 
         Parameters
         ----------
-        a : array-like
-            The array to normalize.
+        x : numpy.ndarray
+            The original x values.
+        y : numpy.ndarray
+            The original y values.
+        fit : callable or None
+            The line fitted to the decimated curve, evaluated at the
+            original points for non-default ``interp_method``.
 
         Returns
         -------
-        numpy.ndarray
-            The normalized array.
+        dict
+            ``index``, ``x``, ``y``, ``norm_x`` and ``norm_y`` arrays, with
+            one entry per decimated point: the index into the original
+            points of the refined point, its x and y values, and its
+            normalized x and y values as reported by ``norm_knee`` and
+            ``norm_knee_y``.
         """
-        return (a - min(a)) / (max(a) - min(a))
+        n = len(x)
+        x_normalized = normalize(x, self.dtype)
+        y_normalized = normalize(y if fit is None else fit(x), self.dtype)
+        y_normalized = transform_y(y_normalized, self.direction, self.curve)
+        # the difference curve of the original points, indexed like x
+        threshold_indices = knee_index(np.arange(n), n, self.curve, self.direction)
+        score = (y_normalized - x_normalized)[threshold_indices]
+
+        # the first highest point of each stretch between decimated points,
+        # the last stretch ends with the last point
+        indices = self.downsample_indices
+        starts = indices[:-1]
+        stretch_max = np.maximum.reduceat(score, starts)
+        is_max = score == np.repeat(stretch_max, np.diff(np.append(starts, n)))
+        max_positions = np.flatnonzero(is_max)
+        stretch_best = max_positions[np.searchsorted(max_positions, starts)]
+
+        # a point's window is the stretches on either side of it, plus the
+        # next decimated point, candidates from left to right so that ties
+        # go to the first one
+        m = len(indices)
+        k = np.arange(m)
+        candidates = np.stack(
+            (
+                stretch_best[np.maximum(k - 1, 0)],
+                stretch_best[np.minimum(k, m - 2)],
+                indices[np.minimum(k + 1, m - 1)],
+            )
+        )
+        best = candidates[np.argmax(score[candidates], axis=0), k]
+        threshold_best = threshold_indices[best]
+        return {
+            "index": best,
+            "x": x[best],
+            "y": y[best],
+            "norm_x": x_normalized[threshold_best],
+            "norm_y": y_normalized[threshold_best],
+        }
+
+    def _knee_points(
+        self,
+        knee_indices: np.ndarray,
+        d: Optional[dict] = None,
+        reported: bool = False,
+    ) -> dict:
+        """Look up the values reported for knees.
+
+        Parameters
+        ----------
+        knee_indices : numpy.ndarray
+            Indices into ``x`` of the knees, or with ``reported=True`` the
+            reported indices, e.g. ``all_knees_indices``. The two only
+            differ when the curve was decimated.
+        d : dict, optional
+            The intermediate arrays, if they are at hand.
+        reported : bool, default False
+            Whether ``knee_indices`` are reported indices.
 
-    @staticmethod
-    def transform_y(y: Iterable[float], direction: str, curve: str) -> float:
-        """Transform y to concave, increasing based on given direction and curve.
+        Returns
+        -------
+        dict
+            ``index``, ``x``, ``y``, ``norm_x`` and ``norm_y`` arrays, the
+            reported index, x and y values, and normalized x and y values
+            of each knee.
+        """
+        if self._refinement is not None:
+            rows = knee_indices
+            if reported:
+                # any decimated point refined to the same original point
+                order = np.argsort(self._refinement["index"], kind="stable")
+                found = np.searchsorted(
+                    self._refinement["index"], knee_indices, sorter=order
+                )
+                rows = order[found]
+            return {name: values[rows] for name, values in self._refinement.items()}
+
+        d = self._get_intermediates() if d is None else d
+        threshold_indices = self._knee_index(knee_indices)
+        return {
+            "index": knee_indices,
+            "x": self.x[knee_indices],
+            "y": self.y[knee_indices],
+            "norm_x": d["x_normalized"][threshold_indices],
+            "norm_y": d["y_normalized"][threshold_indices],
+        }
+
+    def _difference_curve(self, Ds_y: np.ndarray, profiler: "_StageProfiler") -> dict:
+        """Run the steps that turn the fitted line into knee thresholds.
 
         Parameters
         ----------
-        y : array-like
-            The y values to transform.
-        direction : str
-            One of ``{"increasing", "decreasing"}``.
-        curve : str
-            One of ``{"concave", "convex"}``.
+        Ds_y : numpy.ndarray
+            The y values of the fitted line.
+        profiler : _StageProfiler
+            Records each step when profiling is enabled.
 
         Returns
         -------
-        numpy.ndarray
-            The transformed y values.
+        dict
+            The intermediate arrays, keyed by attribute name.
         """
-        # convert elbows to knees
-        if direction == "decreasing":
-            if curve == "concave":
-                y = np.flip(y)
-            elif curve == "convex":
-                y = y.max() - y
-        elif direction == "increasing" and curve == "convex":
-            y = np.flip(y.max() - y)
+        return difference_curve(
+            self.x, Ds_y, self.S, self.curve, self.direction, self.dtype, profiler
+        )
+
+    def _get_intermediates(self) -> dict:
+        """Return the intermediate arrays, rebuilding them in compact mode."""
+        if self._intermediates is not None:
+            return self._intermediates
+        Ds_y = self.y if self._fitted_y is None else self._fitted_y
+        d = {"Ds_y": Ds_y}
+        d.update(self._difference_curve(Ds_y, _StageProfiler()))
+        return d
+
+    def _intermediate(name: str, doc: str):
+        def fget(self):
+            return self._get_intermediates()[name]
+
+        def fset(self, value):
+            if self._intermediates is None:
+                raise AttributeError(
+                    "{} is rebuilt on access when keep_intermediates=False and "
+                    "cannot be set.".format(name)
+                )
+            self._intermediates[name] = value
+
+        return property(fget, fset, doc=doc)
 
-        return y
+    Ds_y = _intermediate("Ds_y", "The y values from the fitted spline.")
+    x_normalized = _intermediate("x_normalized", "The normalized x values.")
+    y_normalized = _intermediate("y_normalized", "The normalized y values.")
+    y_difference = _intermediate(
+        "y_difference", "The y values of the difference curve."
+    )
+    maxima_indices = _intermediate(
+        "maxima_indices", "The indices of each of the maxima on the difference curve."
+    )
+    minima_indices = _intermediate(
+        "minima_indices", "The indices of each of the minima on the difference curve."
+    )
+    Tmx = _intermediate(
+        "Tmx", "The threshold values on the difference curve for each local maxima."
+    )
+    del _intermediate
+
+    @property
+    def x_difference(self):
+        """The x values of the difference curve, the same as ``x_normalized``."""
+        return self.x_normalized
+
+    @property
+    def x_difference_maxima(self):
+        d = self._get_intermediates()
+        return d["x_normalized"][d["maxima_indices"]]
+
+    @property
+    def y_difference_maxima(self):
+        d = self._get_intermediates()
+        return d["y_difference"][d["maxima_indices"]]
+
+    @property
+    def x_difference_minima(self):
+        d = self._get_intermediates()
+        return d["x_normalized"][d["minima_indices"]]
+
+    @property
+    def y_difference_minima(self):
+        d = self._get_intermediates()
+        return d["y_difference"][d["minima_indices"]]
+
+    transform_y = staticmethod(transform_y)
 
     def find_knee(
         self,
@@ -277,81 +737,137 @@ class KneeLocator(object):
         tuple
             ``(knee, norm_knee)`` where each is a float or None.
         """
-        if not self.maxima_indices.size:
-            # No local maxima found in the difference curve
-            # The line is probably not polynomial, try plotting
-            # the difference curve with plt.plot(knee.x_difference, knee.y_difference)
-            # Also check that you aren't mistakenly setting the curve argument
-            return None, None
-        # placeholder for which threshold region i is located in.
-        maxima_threshold_index = 0
-        minima_threshold_index = 0
-        traversed_maxima = False
-        # State flag to control knee detection after local minima
-        detection_active = True
-        # traverse the difference curve
-        for i, x in enumerate(self.x_difference):
-            # skip points on the curve before the the first local maxima
-            if i < self.maxima_indices[0]:
-                continue
-
-            j = i + 1
-
-            # reached the end of the curve
-            if i == (len(self.x_difference) - 1):
-                break
-
-            # if we're at a local max, increment the maxima threshold index and continue
-            if (self.maxima_indices == i).any():
-                threshold = self.Tmx[maxima_threshold_index]
-                threshold_index = i
-                maxima_threshold_index += 1
-                # Reactivate detection when we reach a local maximum
-                detection_active = True
-            # values in difference curve are at or after a local minimum
-            if (self.minima_indices == i).any():
-                threshold = 0.0
-                minima_threshold_index += 1
-                # Deactivate detection after a local minimum until next local maximum
-                detection_active = False
-
-            if detection_active and self.y_difference[j] < threshold:
-                if self.curve == "convex":
-                    if self.direction == "decreasing":
-                        knee = self.x[threshold_index]
-                        norm_knee = self.x_normalized[threshold_index]
-                    else:
-                        knee = self.x[-(threshold_index + 1)]
-                        norm_knee = self.x_normalized[threshold_index]
-
-                elif self.curve == "concave":
-                    if self.direction == "decreasing":
-                        knee = self.x[-(threshold_index + 1)]
-                        norm_knee = self.x_normalized[threshold_index]
-                    else:
-                        knee = self.x[threshold_index]
-                        norm_knee = self.x_normalized[threshold_index]
-
-                # add the y value at the knee
-                y_at_knee = self.y[self.x == knee][0]
-                y_norm_at_knee = self.y_normalized[self.x_normalized == norm_knee][0]
-                if knee not in self.all_knees:
-                    self.all_knees_y.append(y_at_knee)
-                    self.all_norm_knees_y.append(y_norm_at_knee)
-
-                # now add the knee
-                self.all_knees.add(knee)
-                self.all_norm_knees.add(norm_knee)
-
-                # if detecting in offline mode, return the first knee found
-                if self.online is False:
-                    return knee, norm_knee
-
-        if self.all_knees == set():
+        d = self._get_intermediates()
+        knee_indices, _ = detect_knees(d, self.curve, self.direction, self.online)
+        if not knee_indices.size:
             # No knee was found
             return None, None
 
-        return knee, norm_knee
+        # refined on the original points when the curve was decimated
+        points = self._knee_points(knee_indices, d)
+
+        # record each distinct knee once, in the order it was first detected
+        first = first_seen(points["index"])
+        self.all_knees_indices = points["index"][first]
+        self.all_knees_y.extend(points["y"][first])
+        self.all_norm_knees_y.extend(points["norm_y"][first])
+        self.all_knees.update(points["x"])
+        self.all_norm_knees.update(points["norm_x"])
+
+        # offline mode only ever detects one knee, online mode keeps the last
+        self.knee_index = int(points["index"][-1])
+        if self._refinement is not None:
+            # the refined knee lies between the neighbours of the decimated one
+            last = int(knee_indices[-1])
+            self.knee_error = abs(
+                self.x[min(last + 1, self.N - 1)] - self.x[max(last - 1, 0)]
+            )
+        return points["x"][-1], points["norm_x"][-1]
+
+    def _knee_index(self, threshold_index):
+        """Map indices on the difference curve to indices into ``x``."""
+        return knee_index(threshold_index, self.N, self.curve, self.direction)
+
+    def sweep_sensitivity(self, S_values: Iterable[float]) -> np.ndarray:
+        """Locate the knee for many values of the sensitivity ``S`` at once.
+
+        Only the thresholds depend on ``S``, so the fitted line, the
+        difference curve and its extrema are computed once. A knee is
+        declared where the drop below the armed local maximum exceeds
+        ``S`` times the mean x spacing, so the first (offline) or last
+        (online) detection for every ``S`` is found with a binary search
+        over the running maximum of those drops.
+
+        Parameters
+        ----------
+        S_values : array-like
+            The sensitivities to evaluate.
+
+        Returns
+        -------
+        numpy.ndarray
+            Structured array with one record per value of ``S`` and the
+            fields ``S``, ``knee``, ``knee_y``, ``norm_knee``,
+            ``norm_knee_y`` and ``knee_index``. Values of ``S`` without a
+            knee hold NaN and a ``knee_index`` of -1.
+        """
+        S_values = np.asarray(S_values, dtype=float).ravel()
+        d = self._get_intermediates()
+        y_difference = d["y_difference"]
+        is_maximum = np.zeros(y_difference.shape, dtype=bool)
+        is_maximum[d["maxima_indices"]] = True
+        is_minimum = np.zeros(y_difference.shape, dtype=bool)
+        is_minimum[d["minima_indices"]] = True
+
+        # how far each step falls below the armed maximum, which is what the
+        # threshold S * spacing is compared against
+        last_maximum, active = _armed_maxima(is_maximum, is_minimum)
+        armed = np.maximum(last_maximum, 0)
+        drop = y_difference[armed] - y_difference[1:]
+        drop[~active | np.isnan(drop)] = -np.inf
+        # the offsets as difference_curve computes them, so that the
+        # thresholds below round exactly like Tmx
+        spacing = np.abs(np.diff(d["x_normalized"]).mean())
+        offsets = [S * spacing for S in S_values.tolist()]
+        offsets = np.array(offsets, dtype=np.result_type(y_difference, *offsets[:1]))
+
+        def detected(steps, S_indices):
+            """Whether find_knee detects a knee at these steps."""
+            thresholds = y_difference[armed[steps]] - offsets[S_indices]
+            thresholds = thresholds.astype(y_difference.dtype, copy=False)
+            return active[steps] & (y_difference[steps + 1] < thresholds)
+
+        # drop and the threshold test can round differently on exact ties,
+        # so the search uses a slightly lower bound and finds every step
+        # the exact test could accept
+        finite = y_difference[np.isfinite(y_difference)]
+        scale = np.max(np.abs(finite), initial=0.0) + np.abs(offsets)
+        bounds = offsets - 4 * np.finfo(offsets.dtype).eps * scale
+
+        if self.online:
+            # running maximum from the right is non-increasing
+            remaining = np.maximum.accumulate(drop[::-1])[::-1]
+            step = np.searchsorted(-remaining, -bounds, side="left") - 1
+            found = step >= 0
+        else:
+            # running maximum from the left is non-decreasing
+            seen = np.maximum.accumulate(drop)
+            step = np.searchsorted(seen, bounds, side="right")
+            found = step < len(drop)
+
+        # on a tie the exact test rejects, look for the detection step by
+        # step, which is rare
+        candidates = np.flatnonzero(found)
+        steps = np.arange(len(drop))
+        for i in candidates[~detected(step[candidates], candidates)]:
+            hits = np.flatnonzero(detected(steps, i))
+            found[i] = hits.size > 0
+            if found[i]:
+                step[i] = hits[-1] if self.online else hits[0]
+
+        table = np.empty(
+            len(S_values),
+            dtype=[
+                ("S", float),
+                ("knee", float),
+                ("knee_y", float),
+                ("norm_knee", float),
+                ("norm_knee_y", float),
+                ("knee_index", np.intp),
+            ],
+        )
+        table["S"] = S_values
+        table["knee_index"] = -1
+        for field in ("knee", "knee_y", "norm_knee", "norm_knee_y"):
+            table[field] = np.nan
+        threshold_index = last_maximum[step[found]]
+        points = self._knee_points(self._knee_index(threshold_index), d)
+        table["knee_index"][found] = points["index"]
+        table["knee"][found] = points["x"]
+        table["knee_y"][found] = points["y"]
+        table["norm_knee"][found] = points["norm_x"]
+        table["norm_knee_y"][found] = points["norm_y"]
+        return table
 
     def plot_knee_normalized(
         self,
@@ -373,8 +889,7 @@ class KneeLocator(object):
         ylabel : str, optional
             Y-axis label.
         """
-        if not _has_matplotlib:
-            raise _matplotlib_not_found_err
+        plt = _import_pyplot()
 
         if figsize is None:
             figsize = (6, 6)
@@ -385,14 +900,13 @@ class KneeLocator(object):
             plt.xlabel(xlabel)
         if ylabel:
             plt.ylabel(ylabel)
-        plt.plot(self.x_normalized, self.y_normalized, "b", label="normalized curve")
-        plt.plot(self.x_difference, self.y_difference, "r", label="difference curve")
-        plt.xticks(
-            np.arange(self.x_normalized.min(), self.x_normalized.max() + 0.1, 0.1)
-        )
-        plt.yticks(
-            np.arange(self.y_difference.min(), self.y_normalized.max() + 0.1, 0.1)
-        )
+        d = self._get_intermediates()
+        x_normalized, y_normalized = d["x_normalized"], d["y_normalized"]
+        y_difference = d["y_difference"]
+        plt.plot(x_normalized, y_normalized, "b", label="normalized curve")
+        plt.plot(x_normalized, y_difference, "r", label="difference curve")
+        plt.xticks(np.arange(x_normalized.min(), x_normalized.max() + 0.1, 0.1))
+        plt.yticks(np.arange(y_difference.min(), y_normalized.max() + 0.1, 0.1))
 
         plt.vlines(
             self.norm_knee,
@@ -423,8 +937,7 @@ class KneeLocator(object):
         ylabel : str, optional
             Y-axis label.
         """
-        if not _has_matplotlib:
-            raise _matplotlib_not_found_err
+        plt = _import_pyplot()
 
         if figsize is None:
             figsize = (6, 6)
@@ -441,6 +954,32 @@ class KneeLocator(object):
         )
         plt.legend(loc="best")
 
+    @property
+    def all_knees_x(self):
+        if self._refinement is not None:
+            return self._knee_points(self.all_knees_indices, reported=True)["x"]
+        return self.x[self.all_knees_indices]
+
+    @property
+    def result(self) -> KneeResult:
+        """The knee as a read-only ``KneeResult``, which does not hold on to
+        the curve and can be serialized with ``to_bytes``."""
+        if self.knee_index is None:
+            return KneeResult()
+        points = self._knee_points(self.all_knees_indices, reported=True)
+        return KneeResult(
+            knee=self.knee,
+            knee_y=self.knee_y,
+            norm_knee=self.norm_knee,
+            norm_knee_y=self.norm_knee_y,
+            knee_index=self.knee_index,
+            all_knees_indices=self.all_knees_indices,
+            all_knees=points["x"],
+            all_knees_y=self.all_knees_y,
+            all_norm_knees=points["norm_x"],
+            all_norm_knees_y=self.all_norm_knees_y,
+        )
+
     # Niceties for users working with elbows rather than knees
     @property
     def elbow(self):
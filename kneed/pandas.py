@@ -0,0 +1,75 @@
+"""Knee detection on long-format pandas DataFrames."""
+
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+from .batch import locate_knees_grouped
+
+RESULT_COLUMNS = ("knee", "knee_y", "norm_knee", "norm_knee_y")
+
+
+def _import_pandas():
+    """Import pandas on first use, it is an optional dependency."""
+    try:
+        import pandas
+    except ImportError:
+        raise ModuleNotFoundError(
+            "This function needs pandas. Please run command `pip install kneed[pandas]` "
+        ) from None
+    return pandas
+
+
+def knees_by_group(
+    df,
+    by: Union[str, Sequence[str]],
+    x: Optional[str],
+    y: str,
+    **kwargs,
+):
+    """Locate the knee of every group of rows of a DataFrame.
+
+    Does the work of
+    ``df.groupby(by).apply(lambda g: KneeLocator(g[x], g[y]).knee)``
+    without building a DataFrame or a ``KneeLocator`` per group: the
+    columns are sorted once and the groups are processed as slices of
+    them, see ``kneed.batch.locate_knees_grouped``. The rows of each group
+    are used in their order in ``df``.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        One row per point, in long format.
+    by : str or list of str
+        The columns identifying a curve. Rows with a missing key are
+        ignored, as in ``DataFrame.groupby``.
+    x : str or None
+        The x column. If None, x is the position of each row in its group.
+    y : str
+        The y column.
+    **kwargs
+        Passed to ``kneed.batch.locate_knees``, e.g. ``S``, ``curve`` or
+        ``direction``.
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per group, indexed by the group keys, with the columns
+        ``knee``, ``knee_y``, ``norm_knee``, ``norm_knee_y`` and
+        ``n_points``. Groups without a knee/elbow hold NaN.
+    """
+    pandas = _import_pandas()
+    grouped = df.groupby(by, sort=True, observed=True, dropna=True)
+    sizes = grouped.size()
+    # rows with a missing key are numbered NaN, mark them -1 to skip them
+    groups = grouped.ngroup().to_numpy(dtype=float, na_value=-1).astype(np.int64)
+    results = locate_knees_grouped(
+        None if x is None else df[x].to_numpy(dtype=float),
+        df[y].to_numpy(dtype=float),
+        groups,
+        n_groups=len(sizes),
+        **kwargs,
+    )
+    out = pandas.DataFrame(dict(zip(RESULT_COLUMNS, results)), index=sizes.index)
+    out["n_points"] = sizes.to_numpy()
+    return out
@@ -0,0 +1,180 @@
+"""Knee detection for large sets of curves on several processes.
+
+The curves are copied once into a shared memory block, which the worker
+processes read without copying, and only a few numbers per curve are sent
+back.
+"""
+
+import heapq
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Iterable, List, Tuple
+
+import numpy as np
+
+from .core import kneedle
+from .result import RESULT_DTYPE
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Open an existing block, leaving its cleanup to the process that
+    created it."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def _locate(data: np.ndarray, layout: np.ndarray, kwargs: dict) -> np.ndarray:
+    """Locate the knee of the curves laid out in ``data``.
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        The x and y values of every curve, back to back.
+    layout : numpy.ndarray
+        One row ``(x_start, y_start, length)`` per curve.
+    kwargs : dict
+        Passed to ``kneedle``.
+
+    Returns
+    -------
+    numpy.ndarray
+        One ``RESULT_DTYPE`` record per curve.
+    """
+    results = np.empty(len(layout), dtype=RESULT_DTYPE)
+    for i, (x_start, y_start, length) in enumerate(layout):
+        result = kneedle(
+            data[x_start : x_start + length], data[y_start : y_start + length], **kwargs
+        )
+        results[i] = result._record()
+    return results
+
+
+def _work(name: str, size: int, layout: np.ndarray, kwargs: dict) -> np.ndarray:
+    """Run ``_locate`` in a worker process, on views of the shared block."""
+    block = _attach(name)
+    try:
+        data = np.ndarray((size,), dtype=float, buffer=block.buf)
+        results = _locate(data, layout, kwargs)
+        # no view may outlive the mapping
+        del data
+        return results
+    finally:
+        block.close()
+
+
+def _balance(lengths: np.ndarray, n_chunks: int) -> List[np.ndarray]:
+    """Split curves into chunks of about equal work.
+
+    Curves are handed out longest first, each to the chunk with the least
+    work so far (longest-processing-time scheduling). The cost of a curve
+    is its length plus a fixed per-curve overhead. Chunks are returned
+    from the most to the least work, so that the pool starts the longest
+    ones first.
+    """
+    # the Python overhead of one curve, in points
+    cost = lengths + 2000
+    heap = [(0, chunk) for chunk in range(n_chunks)]
+    chunks = [[] for _ in range(n_chunks)]
+    for i in np.argsort(-cost, kind="stable"):
+        load, chunk = heapq.heappop(heap)
+        chunks[chunk].append(i)
+        heapq.heappush(heap, (load + cost[i], chunk))
+    loads = {chunk: load for load, chunk in heap}
+    order = sorted(range(n_chunks), key=lambda chunk: -loads[chunk])
+    return [np.array(sorted(chunks[c]), dtype=np.intp) for c in order if chunks[c]]
+
+
+def map_knees(
+    curves: Iterable[Tuple[Iterable[float], Iterable[float]]],
+    n_jobs: int = -1,
+    chunks_per_job: int = 4,
+    **kwargs,
+) -> np.ndarray:
+    """Locate the knee of many curves of any lengths on several processes.
+
+    The curves are copied once into a ``multiprocessing.shared_memory``
+    block, and workers run ``kneedle`` on zero-copy views of it. Only one
+    small record per curve is sent back. An ``x`` array shared by several
+    curves, the same object, is stored once.
+
+    Curves are split into ``n_jobs * chunks_per_job`` chunks of about
+    equal total length, so curves of very different lengths still keep
+    every worker busy.
+
+    Parameters
+    ----------
+    curves : iterable
+        ``(x, y)`` pairs. Each curve may have its own length.
+    n_jobs : int, default -1
+        The number of worker processes, -1 to use every CPU. With 1, the
+        curves are processed in this process.
+    chunks_per_job : int, default 4
+        How many chunks each worker gets on average. More chunks balance
+        uneven curves better, fewer have less overhead.
+    **kwargs
+        Passed to ``kneedle``.
+
+    Returns
+    -------
+    numpy.ndarray
+        Structured array with one record per curve and the fields
+        ``knee``, ``knee_y``, ``norm_knee``, ``norm_knee_y``,
+        ``knee_index`` and ``n_knees``, see ``results_to_numpy``. Curves
+        without a knee hold NaN and a ``knee_index`` of -1.
+    """
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    if n_jobs < 1:
+        raise ValueError("n_jobs must be a positive integer, or -1.")
+    if chunks_per_job < 1:
+        raise ValueError("chunks_per_job must be a positive integer.")
+
+    # lay every curve out in one array: shared x arrays once, then each y
+    arrays = []
+    x_starts = {}
+    layout = []
+    size = 0
+    for x, y in curves:
+        if id(x) not in x_starts:
+            x_values = np.asarray(x, dtype=float).ravel()
+            # x is kept alive so that its id cannot be reused
+            x_starts[id(x)] = (size, len(x_values), x)
+            arrays.append(x_values)
+            size += len(x_values)
+        x_start, x_length, _ = x_starts[id(x)]
+        y_values = np.asarray(y, dtype=float).ravel()
+        if len(y_values) != x_length:
+            raise ValueError("x and y must be the same length.")
+        layout.append((x_start, size, len(y_values)))
+        arrays.append(y_values)
+        size += len(y_values)
+    layout = np.array(layout, dtype=np.int64).reshape(-1, 3)
+    if not len(layout):
+        return np.empty(0, dtype=RESULT_DTYPE)
+
+    if n_jobs == 1:
+        data = np.concatenate(arrays)
+        return _locate(data, layout, kwargs)
+
+    block = shared_memory.SharedMemory(create=True, size=max(size, 1) * 8)
+    try:
+        data = np.ndarray((size,), dtype=float, buffer=block.buf)
+        np.concatenate(arrays, out=data)
+        del arrays, data
+
+        results = np.empty(len(layout), dtype=RESULT_DTYPE)
+        chunks = _balance(layout[:, 2], min(n_jobs * chunks_per_job, len(layout)))
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            futures = [
+                (chunk, pool.submit(_work, block.name, size, layout[chunk], kwargs))
+                for chunk in chunks
+            ]
+            for chunk, future in futures:
+                results[chunk] = future.result()
+        return results
+    finally:
+        block.close()
+        block.unlink()
@@ -0,0 +1,256 @@
+import struct
+from typing import Iterable
+
+import numpy as np
+
+# one record per result in tables of results, curves without a knee hold
+# NaN and a knee_index of -1
+RESULT_DTYPE = np.dtype(
+    [
+        ("knee", float),
+        ("knee_y", float),
+        ("norm_knee", float),
+        ("norm_knee_y", float),
+        ("knee_index", np.int64),
+        ("n_knees", np.int64),
+    ]
+)
+
+_MAGIC = b"KNEE"
+_VERSION = 1
+# magic, version, then the fields of RESULT_DTYPE
+_HEADER = struct.Struct("<4sB3x4dqq")
+_ALL_VALUES = ("all_knees", "all_knees_y", "all_norm_knees", "all_norm_knees_y")
+
+
+def _import_pyarrow():
+    """Import pyarrow on first use, it is only needed for Arrow and Parquet."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ModuleNotFoundError(
+            "This function needs pyarrow. Please run command `pip install kneed[parquet]` "
+        ) from None
+    return pyarrow
+
+
+class KneeResult(object):
+    """The knee of a curve, as returned by ``kneedle`` and
+    ``KneeLocator.result``.
+
+    Results are read-only, so one result can be shared between threads.
+    A result holds only the knee and not the curve, so it is cheap to keep
+    and to send to another process. ``to_bytes`` encodes it in a compact
+    binary form, and ``results_to_numpy`` and ``results_to_arrow`` turn
+    many results into one table.
+
+    Attributes
+    ----------
+    knee : float or None
+        The x value of the knee point. None if no knee/elbow was detected.
+    knee_y : float or None
+        The y value of the knee point.
+    norm_knee : float or None
+        The normalized x value of the knee point.
+    norm_knee_y : float or None
+        The normalized y value of the knee point.
+    knee_index : int or None
+        The index into ``x`` and ``y`` of the knee point.
+    all_knees_indices : numpy.ndarray
+        The indices into ``x`` and ``y`` of all the identified knee points,
+        in the order they were first detected. The other ``all_*`` arrays
+        are aligned with it.
+    all_knees : numpy.ndarray
+        The x values of all the identified knee points.
+    all_knees_y : numpy.ndarray
+        The y values of all the identified knee points.
+    all_norm_knees : numpy.ndarray
+        The normalized x values of all the identified knee points.
+    all_norm_knees_y : numpy.ndarray
+        The normalized y values of all the identified knee points.
+    """
+
+    __slots__ = (
+        "knee",
+        "knee_y",
+        "norm_knee",
+        "norm_knee_y",
+        "knee_index",
+        "all_knees_indices",
+        "all_knees",
+        "all_knees_y",
+        "all_norm_knees",
+        "all_norm_knees_y",
+    )
+
+    def __init__(
+        self,
+        knee=None,
+        knee_y=None,
+        norm_knee=None,
+        norm_knee_y=None,
+        knee_index=None,
+        all_knees_indices=(),
+        all_knees=(),
+        all_knees_y=(),
+        all_norm_knees=(),
+        all_norm_knees_y=(),
+    ):
+        values = locals()
+        for name in self.__slots__:
+            value = values[name]
+            if name.startswith("all_"):
+                value = np.array(
+                    value, dtype=np.intp if name == "all_knees_indices" else None
+                )
+                value.flags.writeable = False
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("KneeResult is read-only.")
+
+    def __reduce__(self):
+        # rebuilt through __init__, so results can be sent to worker processes
+        return KneeResult, tuple(getattr(self, name) for name in self.__slots__)
+
+    def _record(self) -> tuple:
+        """The scalar fields, as a record of ``RESULT_DTYPE``."""
+        if self.knee_index is None:
+            return (np.nan, np.nan, np.nan, np.nan, -1, 0)
+        return (
+            self.knee,
+            self.knee_y,
+            self.norm_knee,
+            self.norm_knee_y,
+            self.knee_index,
+            len(self.all_knees_indices),
+        )
+
+    def to_bytes(self) -> bytes:
+        """Encode the result in a compact binary form.
+
+        The values are stored as little-endian float64 and int64, whatever
+        the type of the curve they came from.
+
+        Returns
+        -------
+        bytes
+            Can be decoded with ``KneeResult.from_bytes``.
+        """
+        arrays = [np.asarray(self.all_knees_indices, dtype="<i8")]
+        for name in _ALL_VALUES:
+            arrays.append(np.asarray(getattr(self, name), dtype="<f8"))
+        return _HEADER.pack(_MAGIC, _VERSION, *self._record()) + b"".join(
+            a.tobytes() for a in arrays
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "KneeResult":
+        """Decode a result encoded with ``to_bytes``.
+
+        Parameters
+        ----------
+        data : bytes-like
+            The encoded result.
+
+        Returns
+        -------
+        KneeResult
+        """
+        data = memoryview(data)
+        if len(data) < _HEADER.size:
+            raise ValueError("data is too short to hold a KneeResult.")
+        magic, version, *scalars, n_knees = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("data does not hold a KneeResult.")
+        if len(data) != _HEADER.size + 8 * (1 + len(_ALL_VALUES)) * n_knees:
+            raise ValueError("data does not hold a KneeResult.")
+        arrays = np.frombuffer(data, dtype="<f8", offset=_HEADER.size)
+        arrays = arrays.reshape(1 + len(_ALL_VALUES), n_knees)
+        values = dict(zip(_ALL_VALUES, arrays[1:]))
+        values["all_knees_indices"] = arrays[0].view("<i8")
+        knee, knee_y, norm_knee, norm_knee_y, knee_index = scalars
+        if knee_index >= 0:
+            values.update(
+                knee=knee,
+                knee_y=knee_y,
+                norm_knee=norm_knee,
+                norm_knee_y=norm_knee_y,
+                knee_index=knee_index,
+            )
+        return cls(**values)
+
+    def __repr__(self) -> str:
+        return "KneeResult(knee={}, knee_y={}, knee_index={})".format(
+            self.knee, self.knee_y, self.knee_index
+        )
+
+    # Niceties for users working with elbows rather than knees
+    @property
+    def elbow(self):
+        return self.knee
+
+    @property
+    def elbow_y(self):
+        return self.knee_y
+
+
+def results_to_numpy(results: Iterable[KneeResult]) -> np.ndarray:
+    """Gather the knees of many results in one structured array.
+
+    Parameters
+    ----------
+    results : iterable of KneeResult
+        The results, e.g. from ``kneedle``.
+
+    Returns
+    -------
+    numpy.ndarray
+        One ``RESULT_DTYPE`` record per result, with the fields ``knee``,
+        ``knee_y``, ``norm_knee``, ``norm_knee_y``, ``knee_index`` and
+        ``n_knees``, the length of the ``all_knees`` arrays. Results
+        without a knee hold NaN and a ``knee_index`` of -1. The array is
+        contiguous, ``tobytes`` and ``numpy.frombuffer`` serialize it.
+    """
+    return np.array([result._record() for result in results], dtype=RESULT_DTYPE)
+
+
+def results_to_arrow(results: Iterable[KneeResult]):
+    """Gather many results in one Arrow table.
+
+    Needs pyarrow.
+
+    Parameters
+    ----------
+    results : iterable of KneeResult
+        The results, e.g. from ``kneedle``.
+
+    Returns
+    -------
+    pyarrow.Table
+        One row per result, with the columns of ``results_to_numpy``,
+        null where there is no knee, and the ``all_knees_indices``,
+        ``all_knees``, ``all_knees_y``, ``all_norm_knees`` and
+        ``all_norm_knees_y`` list columns. The values of each list column
+        are stored in one flat buffer.
+    """
+    pyarrow = _import_pyarrow()
+    results = list(results)
+    table = results_to_numpy(results)
+    missing = table["knee_index"] < 0
+
+    columns = {}
+    for name in RESULT_DTYPE.names:
+        mask = None if name == "n_knees" else missing
+        columns[name] = pyarrow.array(table[name], mask=mask)
+    offsets = pyarrow.array(
+        np.concatenate(([0], np.cumsum(table["n_knees"]))).astype(np.int32)
+    )
+    for name in ("all_knees_indices",) + _ALL_VALUES:
+        values = [getattr(result, name) for result in results]
+        flat = np.concatenate(values) if values else np.empty(0)
+        if name == "all_knees_indices":
+            flat = flat.astype(np.int64)
+        columns[name] = pyarrow.ListArray.from_arrays(offsets, pyarrow.array(flat))
+    return pyarrow.table(columns)
@@ -0,0 +1,166 @@
+import numpy as np
+from typing import Iterable
+
+from .batch import locate_knees
+from .core import VALID_CURVE, VALID_DIRECTION
+
+
+def _windows(a: np.ndarray, n: int, window: int, step: int) -> np.ndarray:
+    """A read-only view of ``n`` windows of ``a``, ``step`` points apart."""
+    stride = a.strides[0]
+    return np.lib.stride_tricks.as_strided(
+        a, shape=(n, window), strides=(step * stride, stride), writeable=False
+    )
+
+
+class RollingKneeLocator(object):
+    """Locate the knee of every sliding window over a stream of points.
+
+    Each window of ``window`` consecutive points, starting every ``step``
+    points, is treated as its own curve. Points arrive through ``update``
+    or ``extend``, which return the knees of the windows they complete.
+    Only the last ``window - 1`` points are buffered between calls.
+
+    The windows completed by a call are not copied out of the stream, they
+    are strided views into it, and their knees are found together by
+    ``locate_knees`` in blocks of bounded size.
+
+    Parameters
+    ----------
+    window : int
+        The number of points in each window, at least 3.
+    step : int, default 1
+        The number of points between the starts of consecutive windows.
+    S : float, default 1.0
+        Sensitivity, see ``KneeLocator``.
+    curve : str, default "concave"
+        One of ``{"concave", "convex"}``.
+    direction : str, default "increasing"
+        One of ``{"increasing", "decreasing"}``.
+    interp_method : str, default "interp1d"
+        One of ``{"interp1d", "polynomial"}``.
+    online : bool, default False
+        If True, report the last knee found in each window instead of the
+        first.
+    polynomial_degree : int, default 7
+        The degree of the fitting polynomial. Only used when
+        ``interp_method="polynomial"``.
+    block_size : int, default 65536
+        The maximum number of points, summed over windows, passed to
+        ``locate_knees`` at once. Small blocks stay in the CPU cache and
+        bound the memory used per call.
+
+    Attributes
+    ----------
+    N : int
+        The number of points received so far.
+    n_windows : int
+        The number of windows completed so far. Window ``i`` covers the
+        points ``i * step`` to ``i * step + window - 1``.
+    """
+
+    def __init__(
+        self,
+        window: int,
+        step: int = 1,
+        S: float = 1.0,
+        curve: str = "concave",
+        direction: str = "increasing",
+        interp_method: str = "interp1d",
+        online: bool = False,
+        polynomial_degree: int = 7,
+        block_size: int = 2**16,
+    ):
+        if curve not in VALID_CURVE or direction not in VALID_DIRECTION:
+            raise ValueError(
+                "Please check that the curve and direction arguments are valid."
+            )
+        if window < 3:
+            raise ValueError("window must hold at least 3 points.")
+        if step < 1:
+            raise ValueError("step must be a positive integer.")
+        self.window = window
+        self.step = step
+        self.S = S
+        self.curve = curve
+        self.direction = direction
+        self.interp_method = interp_method
+        self.online = online
+        self.polynomial_degree = polynomial_degree
+        self.block_size = block_size
+        self.N = 0
+        self.n_windows = 0
+        # the points that may still belong to a window, and the position of
+        # the first of them in the stream
+        self._x = np.empty(0)
+        self._y = np.empty(0)
+        self._offset = 0
+
+    def update(self, x: float, y: float) -> np.ndarray:
+        """Append a single point to the stream.
+
+        Parameters
+        ----------
+        x : float
+            The x value of the new point.
+        y : float
+            The y value of the new point.
+
+        Returns
+        -------
+        numpy.ndarray
+            The knee of the window completed by this point, if any. Empty
+            otherwise.
+        """
+        return self.extend([x], [y])
+
+    def extend(self, xs: Iterable[float], ys: Iterable[float]) -> np.ndarray:
+        """Append several points to the stream.
+
+        Parameters
+        ----------
+        xs : array-like
+            x values of the new points.
+        ys : array-like
+            y values of the new points, must be the same length as ``xs``.
+
+        Returns
+        -------
+        numpy.ndarray
+            The knee of each window completed by the new points, in order.
+            Windows without a knee/elbow hold NaN.
+        """
+        xs = np.asarray(xs, dtype=float).ravel()
+        ys = np.asarray(ys, dtype=float).ravel()
+        if xs.shape != ys.shape:
+            raise ValueError("xs and ys must be the same length.")
+        x = np.concatenate((self._x, xs))
+        y = np.concatenate((self._y, ys))
+        self.N += len(xs)
+
+        first = self.n_windows * self.step - self._offset
+        n_new = max(0, (len(y) - self.window - first) // self.step + 1)
+        knees = np.empty(n_new)
+        if n_new:
+            x_windows = _windows(x[first:], n_new, self.window, self.step)
+            y_windows = _windows(y[first:], n_new, self.window, self.step)
+            rows = max(1, self.block_size // self.window)
+            for start in range(0, n_new, rows):
+                block = slice(start, start + rows)
+                knees[block] = locate_knees(
+                    x_windows[block],
+                    y_windows[block],
+                    S=self.S,
+                    curve=self.curve,
+                    direction=self.direction,
+                    interp_method=self.interp_method,
+                    online=self.online,
+                    polynomial_degree=self.polynomial_degree,
+                )[0]
+            self.n_windows += n_new
+
+        # keep the points from the start of the next window on
+        cut = min(self.n_windows * self.step - self._offset, len(y))
+        self._x, self._y = x[cut:], y[cut:]
+        self._offset += cut
+        return knees
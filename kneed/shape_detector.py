@@ -31,3 +31,55 @@ def find_shape(x, y):
     if p[0] <= 0 and q > 0:
         return "decreasing", "concave"
     return "decreasing", "convex"
+
+
+def find_shape_batch(x, y):
+    """Detect the direction and curve type of many curves at once.
+
+    Computes the same first-degree fit as ``find_shape`` for every row of
+    ``y`` in closed form, with one set of vectorized reductions instead of
+    a least-squares solve per curve.
+
+    Parameters
+    ----------
+    x : array-like
+        x values. Either 1-D and shared by every curve, or 2-D with the
+        same shape as ``y``.
+    y : array-like
+        2-D array of y values, one curve per row.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        ``(directions, curves)``, string arrays with one entry per curve,
+        holding ``"increasing"``/``"decreasing"`` and
+        ``"concave"``/``"convex"`` respectively.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if y.ndim != 2:
+        raise ValueError("y must be a 2-D array with one curve per row.")
+    if x.shape != y.shape[-1:] and x.shape != y.shape:
+        raise ValueError(
+            "x must be 1-D with one value per column of y, or have the same shape as y."
+        )
+
+    # least-squares line through each curve
+    x_mean = x.mean(axis=-1, keepdims=True)
+    y_mean = y.mean(axis=-1, keepdims=True)
+    x_centered = x - x_mean
+    slope = (x_centered * (y - y_mean)).sum(axis=-1, keepdims=True) / (
+        x_centered**2
+    ).sum(axis=-1, keepdims=True)
+    intercept = y_mean - slope * x_mean
+
+    x1, x2 = int(y.shape[-1] * 0.2), int(y.shape[-1] * 0.8)
+    q = (
+        y[:, x1:x2].mean(axis=-1)
+        - (slope * x[..., x1:x2].mean(axis=-1, keepdims=True) + intercept).ravel()
+    )
+    slope = slope.ravel()
+
+    directions = np.where(slope > 0, "increasing", "decreasing")
+    curves = np.where(q > 0, "concave", "convex")
+    return directions, curves
@@ -0,0 +1,271 @@
+import numpy as np
+from typing import Callable, Iterable, Optional
+
+
+def _scipy_too_old(smoother: str, version: str) -> ImportError:
+    """The error raised when a smoother needs a newer scipy."""
+    import scipy
+
+    return ImportError(
+        "The {} smoother needs scipy {} or later, but scipy {} is installed. "
+        "Please run command `pip install --upgrade scipy` ".format(
+            smoother, version, scipy.__version__
+        )
+    )
+
+
+def _scaled_vander(x: np.ndarray, degree: int, low: float, high: float) -> np.ndarray:
+    """Chebyshev Vandermonde matrix of ``x`` mapped from ``[low, high]`` to
+    ``[-1, 1]``, where the basis is well conditioned whatever the scale of x."""
+    if high > low:
+        x = (2 * x - (low + high)) / (high - low)
+    else:
+        x = x - low
+    return np.polynomial.chebyshev.chebvander(x, degree)
+
+
+def polynomial_fit(
+    x: Iterable[float],
+    y: Iterable[float],
+    degree: int,
+    x_eval: Optional[Iterable[float]] = None,
+) -> np.ndarray:
+    """Fit a least-squares polynomial and evaluate it.
+
+    The fit is done in a Chebyshev basis on ``x`` scaled to ``[-1, 1]``,
+    so large x values such as timestamps do not make it ill-conditioned.
+    The Vandermonde matrix is factorized once with a QR decomposition and
+    reused for every curve, so fitting many curves that share ``x`` costs
+    one factorization plus a matrix product.
+
+    Parameters
+    ----------
+    x : array-like
+        1-D x values.
+    y : array-like
+        y values, either 1-D or 2-D with one curve per row.
+    degree : int
+        The degree of the polynomial.
+    x_eval : array-like, optional
+        Where to evaluate the fitted polynomial. Defaults to ``x``.
+
+    Returns
+    -------
+    numpy.ndarray
+        The fitted values, with one row per curve if ``y`` is 2-D.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    low, high = x.min(), x.max()
+    vander = _scaled_vander(x, degree, low, high)
+    q, r = np.linalg.qr(vander)
+
+    diagonal = np.abs(np.diag(r))
+    full_rank = (
+        vander.shape[0] >= vander.shape[1]
+        and diagonal.min() > diagonal.max() * vander.shape[0] * np.finfo(float).eps
+    )
+    if full_rank and x_eval is None:
+        # the projection onto the column space of the Vandermonde matrix
+        return y @ q @ q.T
+
+    if full_rank:
+        coefficients = np.linalg.solve(r, (y @ q).T)
+    else:
+        # repeated x values, or fewer points than coefficients
+        coefficients = np.linalg.lstsq(vander, y.T, rcond=None)[0]
+    if x_eval is None:
+        return (vander @ coefficients).T
+    x_eval = np.asarray(x_eval, dtype=float)
+    return (_scaled_vander(x_eval, degree, low, high) @ coefficients).T
+
+
+def _default_window(n: int) -> int:
+    """An odd window of about 5% of the points, at least 3 when possible."""
+    window = max(3, (n // 20) | 1)
+    if window > n:
+        window = n if n % 2 else n - 1
+    return max(window, 1)
+
+
+def moving_average(
+    x: Iterable[float], y: Iterable[float], window: Optional[int] = None
+) -> np.ndarray:
+    """Centered moving average, from a cumulative sum in O(N).
+
+    Near the ends the window shrinks to the points available.
+
+    Parameters
+    ----------
+    x : array-like
+        1-D x values, only used for their length.
+    y : array-like
+        y values, either 1-D or 2-D with one curve per row.
+    window : int, optional
+        The number of points averaged. Defaults to an odd number close to
+        5% of the points.
+
+    Returns
+    -------
+    numpy.ndarray
+        The smoothed values, with the shape of ``y``.
+    """
+    y = np.asarray(y, dtype=float)
+    n = y.shape[-1]
+    half = (window if window is not None else _default_window(n)) // 2
+    sums = np.cumsum(y, axis=-1)
+    sums = np.concatenate((np.zeros(y.shape[:-1] + (1,)), sums), axis=-1)
+    positions = np.arange(n)
+    lo = np.maximum(positions - half, 0)
+    hi = np.minimum(positions + half + 1, n)
+    return (sums[..., hi] - sums[..., lo]) / (hi - lo)
+
+
+def savgol(
+    x: Iterable[float],
+    y: Iterable[float],
+    window_length: Optional[int] = None,
+    polyorder: int = 2,
+) -> np.ndarray:
+    """Savitzky-Golay filter, a least-squares polynomial fitted in a sliding
+    window, with ``scipy.signal.savgol_filter``.
+
+    The window is counted in points, so the filter assumes evenly spaced x
+    values. Needs scipy 1.4 or later.
+
+    Parameters
+    ----------
+    x : array-like
+        1-D x values, only used for their length.
+    y : array-like
+        y values, either 1-D or 2-D with one curve per row.
+    window_length : int, optional
+        The odd number of points in the window. Defaults to an odd number
+        close to 5% of the points.
+    polyorder : int, default 2
+        The degree of the polynomial fitted in each window.
+
+    Returns
+    -------
+    numpy.ndarray
+        The smoothed values, with the shape of ``y``.
+    """
+    try:
+        from scipy.signal import oaconvolve, savgol_coeffs, savgol_filter
+    except ImportError:
+        raise _scipy_too_old("savgol", "1.4") from None
+
+    y = np.asarray(y, dtype=float)
+    if window_length is None:
+        window_length = _default_window(y.shape[-1])
+    if y.shape[-1] <= window_length:
+        return savgol_filter(y, window_length, polyorder, axis=-1, mode="interp")
+
+    # savgol_filter convolves directly, in O(N * window_length). The same
+    # convolution by overlap-add costs O(N log window_length), and only the
+    # first and last window_length points are needed to fit the ends.
+    half = window_length // 2
+    smoothed = np.empty_like(y)
+    coefficients = savgol_coeffs(window_length, polyorder)
+    smoothed[..., half:-half] = oaconvolve(
+        y,
+        np.broadcast_to(coefficients, y.shape[:-1] + (window_length,)),
+        mode="valid",
+        axes=-1,
+    )
+    for ends in (slice(None, window_length), slice(-window_length, None)):
+        edge = savgol_filter(y[..., ends], window_length, polyorder, mode="interp")
+        if ends.start is None:
+            smoothed[..., :half] = edge[..., :half]
+        else:
+            smoothed[..., -half:] = edge[..., -half:]
+    return smoothed
+
+
+def spline(
+    x: Iterable[float], y: Iterable[float], lam: Optional[float] = None
+) -> np.ndarray:
+    """Cubic smoothing spline, with ``scipy.interpolate.make_smoothing_spline``.
+
+    Needs scipy 1.10 or later, and strictly increasing x values.
+
+    Parameters
+    ----------
+    x : array-like
+        1-D x values.
+    y : array-like
+        y values, either 1-D or 2-D with one curve per row.
+    lam : float, optional
+        The smoothing strength. By default it is chosen for each curve by
+        generalized cross-validation.
+
+    Returns
+    -------
+    numpy.ndarray
+        The smoothed values, with the shape of ``y``.
+    """
+    try:
+        from scipy.interpolate import make_smoothing_spline
+    except ImportError:
+        raise _scipy_too_old("spline", "1.10") from None
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if y.ndim == 1:
+        return make_smoothing_spline(x, y, lam=lam)(x)
+    return np.array([make_smoothing_spline(x, yi, lam=lam)(x) for yi in y])
+
+
+def _polynomial(x: Iterable[float], y: Iterable[float], degree: int = 7):
+    return polynomial_fit(x, y, degree)
+
+
+SMOOTHERS = {
+    "polynomial": _polynomial,
+    "savgol": savgol,
+    "moving_average": moving_average,
+    "spline": spline,
+}
+
+
+def register_smoother(name: str, smoother: Optional[Callable] = None):
+    """Register a function that can be used as ``interp_method``.
+
+    Can also be used as a decorator, ``@register_smoother("name")``.
+
+    Parameters
+    ----------
+    name : str
+        The ``interp_method`` value selecting the smoother.
+    smoother : callable
+        Called as ``smoother(x, y, **interp_kwargs)`` with 1-D ``x`` and
+        ``y`` either 1-D or 2-D with one curve per row, and returns the
+        smoothed values with the shape of ``y``.
+
+    Returns
+    -------
+    callable
+        The smoother, or a decorator registering it.
+    """
+    if name in ("interp1d", "polynomial"):
+        raise ValueError("{} is a built-in interp_method.".format(name))
+
+    def register(func):
+        SMOOTHERS[name] = func
+        return func
+
+    if smoother is None:
+        return register
+    return register(smoother)
+
+
+def get_smoother(name: str) -> Callable:
+    """Return the smoother registered as ``name``."""
+    try:
+        return SMOOTHERS[name]
+    except KeyError:
+        raise ValueError(
+            "{} is an invalid interp_method parameter, use one of {}".format(
+                name, ", ".join(repr(n) for n in ["interp1d"] + sorted(SMOOTHERS))
+            )
+        ) from None
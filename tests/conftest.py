@@ -0,0 +1,7 @@
+# every (curve, direction) pair, for tests parametrized over the shapes
+SHAPES = [
+    ("concave", "increasing"),
+    ("concave", "decreasing"),
+    ("convex", "increasing"),
+    ("convex", "decreasing"),
+]
@@ -0,0 +1,83 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from kneed.adaptive import find_knee_adaptive
+from kneed.knee_locator import KneeLocator
+
+
+def inertia(k):
+    """A smooth stand-in for the KMeans inertia of k clusters"""
+    return 1000 / k + 2 * k
+
+
+def test_integer_search_matches_dense_search():
+    calls = []
+
+    def func(k):
+        calls.append(k)
+        return inertia(k)
+
+    k = np.arange(1, 101)
+    dense = KneeLocator(k, inertia(k), curve="convex", direction="decreasing")
+    kl = find_knee_adaptive(
+        func, 1, 100, budget=30, integer=True, curve="convex", direction="decreasing"
+    )
+    assert kl.knee == dense.knee
+    assert len(calls) == len(set(calls)) < 30
+    assert all(type(value) is int for value in calls)
+
+
+def test_continuous_search():
+    x = np.linspace(0, 1, 1001)
+    dense = KneeLocator(x, -1 / (x + 0.1) + 5)
+    kl = find_knee_adaptive(lambda x: -1 / (x + 0.1) + 5, 0, 1, budget=30)
+    assert math.isclose(kl.knee, dense.knee, rel_tol=0.05)
+    assert kl.N <= 30
+
+
+def test_budget():
+    kl = find_knee_adaptive(
+        inertia, 1, 1000, budget=8, patience=100, curve="convex", direction="decreasing"
+    )
+    assert kl.N == 8
+
+
+def test_executor():
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        kl = find_knee_adaptive(
+            inertia,
+            1,
+            100,
+            integer=True,
+            executor=executor,
+            curve="convex",
+            direction="decreasing",
+        )
+    serial = find_knee_adaptive(
+        inertia, 1, 100, integer=True, curve="convex", direction="decreasing"
+    )
+    assert kl.knee == serial.knee
+    np.testing.assert_array_equal(kl.x, serial.x)
+
+
+def test_budget_spent_around_the_knee():
+    """When a round does not fit in the budget, the points next to the
+    knee are evaluated rather than the smallest ones"""
+
+    def func(k):
+        # a late drop around k=600 moves the elbow far from the start
+        return 1000 / k + 3000 / (1 + math.exp((k - 600) / 20))
+
+    kwargs = dict(integer=True, curve="convex", direction="decreasing")
+    first = find_knee_adaptive(func, 1, 1000, budget=6, **kwargs)
+    kl = find_knee_adaptive(func, 1, 1000, budget=7, **kwargs)
+    (added,) = set(kl.x) - set(first.x)
+    neighbours = first.x[first.knee_index - 1 : first.knee_index + 2]
+    assert neighbours.min() < added < neighbours.max()
+
+
+def test_invalid_budget():
+    with pytest.raises(ValueError):
+        find_knee_adaptive(inertia, 1, 100, budget=1)
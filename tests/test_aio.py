@@ -0,0 +1,155 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from kneed import aio
+from kneed.aio import AsyncKneeLocator
+from kneed.core import kneedle
+from kneed.data_generator import DataGenerator as dg
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    """Counts the submitted calls and the most that ran at once."""
+
+    def __init__(self, delay=0.0):
+        super().__init__(max_workers=8)
+        self.delay = delay
+        self.submitted = 0
+        self.running = 0
+        self.most_running = 0
+        self.lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        self.submitted += 1
+
+        def run():
+            with self.lock:
+                self.running += 1
+                self.most_running = max(self.most_running, self.running)
+            try:
+                time.sleep(self.delay)
+                return fn(*args, **kwargs)
+            finally:
+                with self.lock:
+                    self.running -= 1
+
+        return super().submit(run)
+
+
+def curves(n=12):
+    x = np.linspace(1, 10, 200)
+    return [(x, np.log(x) * (i + 1) + 0.1 * np.sin(i * x)) for i in range(n)]
+
+
+def test_locate_knee():
+    x, y = dg.figure2()
+    result = asyncio.run(aio.locate_knee(x, y, online=True))
+    assert result.knee == kneedle(x, y, online=True).knee
+    # the shared default locator works across event loops
+    result = asyncio.run(aio.locate_knee(x, y, curve="convex"))
+    assert result.knee == kneedle(x, y, curve="convex").knee
+
+
+def test_identical_requests_are_coalesced():
+    x, y = dg.figure2()
+    with CountingExecutor(delay=0.05) as executor:
+        locator = AsyncKneeLocator(executor)
+
+        async def main():
+            same = [locator.locate_knee(x, y) for _ in range(10)]
+            other = locator.locate_knee(x, y, S=2.0)
+            return await asyncio.gather(*same, other)
+
+        results = asyncio.run(main())
+    assert executor.submitted == 2
+    assert all(result is results[0] for result in results[:10])
+    assert locator.in_flight == 0
+
+
+def test_coalesce_disabled():
+    x, y = dg.figure2()
+    with CountingExecutor() as executor:
+        locator = AsyncKneeLocator(executor, coalesce=False)
+
+        async def main():
+            return await asyncio.gather(*[locator.locate_knee(x, y) for _ in range(3)])
+
+        asyncio.run(main())
+    assert executor.submitted == 3
+
+
+def test_concurrency_limit():
+    with CountingExecutor(delay=0.02) as executor:
+        locator = AsyncKneeLocator(executor, max_concurrency=2)
+
+        async def main():
+            return await asyncio.gather(
+                *[locator.locate_knee(x, y) for x, y in curves()]
+            )
+
+        asyncio.run(main())
+    assert executor.submitted == 12
+    assert executor.most_running == 2
+
+
+def test_locate_knees_many_async_source_backpressure():
+    """Results come in order, and the source is read at most
+    max_concurrency curves ahead of the consumer"""
+    data = curves()
+    read = []
+    ahead = []
+
+    async def source():
+        for curve in data:
+            read.append(curve)
+            yield curve
+
+    async def main():
+        locator = AsyncKneeLocator(max_concurrency=3)
+        results = []
+        async for result in locator.locate_knees_many(source(), S=0.5):
+            results.append(result)
+            ahead.append(len(read) - len(results))
+        return results
+
+    results = asyncio.run(main())
+    assert [r.knee for r in results] == [kneedle(x, y, S=0.5).knee for x, y in data]
+    assert max(ahead) <= 3
+
+
+def test_locate_knees_many_plain_iterable():
+    data = curves(5)
+
+    async def main():
+        return [result async for result in aio.locate_knees_many(data)]
+
+    results = asyncio.run(main())
+    assert [r.knee for r in results] == [kneedle(x, y).knee for x, y in data]
+
+
+def test_locate_knees_many_errors():
+    data = curves(3) + [([1, 2, 3], [1, 2])]
+
+    async def main():
+        return [result async for result in AsyncKneeLocator().locate_knees_many(data)]
+
+    with pytest.raises(ValueError):
+        asyncio.run(main())
+
+
+def test_process_pool():
+    x, y = dg.figure2()
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        locator = AsyncKneeLocator(executor)
+        result = asyncio.run(locator.locate_knee(x, y))
+    expected = kneedle(x, y)
+    assert result.knee == expected.knee
+    np.testing.assert_array_equal(result.all_knees, expected.all_knees)
+
+
+def test_invalid_max_concurrency():
+    with pytest.raises(ValueError):
+        AsyncKneeLocator(max_concurrency=0)
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+from kneed.batch import locate_knees
+from kneed.data_generator import DataGenerator as dg
+from kneed.knee_locator import KneeLocator
+from conftest import SHAPES
+
+
+def noisy_matrix(n_curves=20, n_points=200, seed=3):
+    rng = np.random.RandomState(seed)
+    x = np.arange(1, n_points + 1, dtype=float)
+    scale = rng.uniform(0.5, 2.0, size=(n_curves, 1))
+    y = np.log1p(x * scale) + rng.normal(scale=0.05, size=(n_curves, n_points))
+    return x, y
+
+
+def expected_knees(x, y, **kwargs):
+    x_rows = np.broadcast_to(x, y.shape)
+    expected = []
+    for xi, yi in zip(x_rows, y):
+        kl = KneeLocator(xi, yi, **kwargs)
+        found = kl.knee is not None
+        expected.append(
+            [
+                kl.knee if found else np.nan,
+                kl.knee_y if found else np.nan,
+                kl.norm_knee if found else np.nan,
+                kl.norm_knee_y if found else np.nan,
+            ]
+        )
+    return np.array(expected, dtype=float).T
+
+
+@pytest.mark.parametrize("online", [True, False])
+@pytest.mark.parametrize("curve, direction", SHAPES)
+def test_locate_knees_matches_knee_locator(curve, direction, online):
+    x, y = noisy_matrix()
+    results = locate_knees(x, y, curve=curve, direction=direction, online=online)
+    expected = expected_knees(x, y, curve=curve, direction=direction, online=online)
+    np.testing.assert_allclose(np.array(results), expected, equal_nan=True)
+
+
+def test_locate_knees_polynomial():
+    x, y = noisy_matrix(n_curves=5)
+    results = locate_knees(x, y, interp_method="polynomial", polynomial_degree=5)
+    expected = expected_knees(x, y, interp_method="polynomial", polynomial_degree=5)
+    np.testing.assert_allclose(np.array(results), expected, equal_nan=True)
+
+
+@pytest.mark.parametrize("interp_method", ["interp1d", "polynomial"])
+def test_locate_knees_per_row_x(interp_method):
+    x, y = noisy_matrix(n_curves=5)
+    x = x * np.arange(1, 6)[:, None]
+    results = locate_knees(x, y, interp_method=interp_method)
+    expected = expected_knees(x, y, interp_method=interp_method)
+    np.testing.assert_allclose(np.array(results), expected, equal_nan=True)
+
+
+def test_locate_knees_no_knee():
+    x, y = dg.concave_increasing()
+    y = np.vstack([y, np.ones_like(y)])
+    knees, knees_y, norm_knees, norm_knees_y = locate_knees(x, y)
+    assert knees[0] == 2
+    assert knees_y[0] == 80
+    assert np.isnan([knees[1], knees_y[1], norm_knees[1], norm_knees_y[1]]).all()
+
+
+def test_locate_knees_auto_shape():
+    curves = [dg.concave_increasing(), dg.convex_decreasing(), dg.concave_decreasing()]
+    x = curves[0][0]
+    y = np.array([yi for _, yi in curves])
+    results = locate_knees(x, y, curve="auto", direction="auto")
+    expected = [
+        expected_knees(x, y[[0]], curve="concave", direction="increasing"),
+        expected_knees(x, y[[1]], curve="convex", direction="decreasing"),
+        expected_knees(x, y[[2]], curve="concave", direction="decreasing"),
+    ]
+    np.testing.assert_array_equal(np.array(results), np.hstack(expected))
+
+
+def test_locate_knees_invalid_arguments():
+    x, y = dg.concave_increasing()
+    with pytest.raises(ValueError):
+        locate_knees(x, y)
+    with pytest.raises(ValueError):
+        locate_knees(x[:-1], np.atleast_2d(y))
+    with pytest.raises(ValueError):
+        locate_knees(x, np.atleast_2d(y), curve="bad curve")
+    with pytest.raises(ValueError):
+        locate_knees(x, np.atleast_2d(y), interp_method="not_a_method")
@@ -0,0 +1,146 @@
+import pickle
+import threading
+
+import numpy as np
+import pytest
+from kneed.cache import KneeCache
+from kneed.data_generator import DataGenerator as dg
+from kneed.knee_locator import KneeLocator
+
+
+def test_hit_returns_same_result():
+    x, y = dg.figure2()
+    cache = KneeCache()
+    first = KneeLocator(x, y, cache=cache)
+    second = KneeLocator(x, y, cache=cache)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert second.knee == first.knee
+    assert second.norm_knee_y == first.norm_knee_y
+    np.testing.assert_array_equal(second.y_difference, first.y_difference)
+    # the two locators do not share their containers or arrays
+    second.all_knees.add(-1)
+    assert -1 not in first.all_knees
+    second.y[:] = 0
+    assert KneeLocator(x, y, cache=cache).knee_y == first.knee_y
+    np.testing.assert_array_equal(KneeLocator(x, y, cache=cache).y, first.y)
+
+
+@pytest.mark.parametrize("interp_method", ["interp1d", "polynomial"])
+@pytest.mark.parametrize("keep_intermediates", [True, False])
+def test_entries_are_compact(interp_method, keep_intermediates):
+    """Entries hold x, y, the fitted line and the results, the rest is
+    rebuilt on a hit"""
+    x, y = dg.noisy_gaussian(N=1000)
+    cache = KneeCache()
+    kwargs = dict(interp_method=interp_method, keep_intermediates=keep_intermediates)
+    first = KneeLocator(x, y, cache=cache, **kwargs)
+    (entry,) = [value for _, value in cache._entries.values()]
+    assert len(pickle.dumps(entry)) < 3.5 * 8 * len(x)
+    hit = KneeLocator(x, y, cache=cache, **kwargs)
+    assert cache.hits == 1
+    assert hit.keep_intermediates == keep_intermediates
+    for name in ("Ds_y", "y_normalized", "y_difference", "maxima_indices", "Tmx"):
+        np.testing.assert_array_equal(getattr(hit, name), getattr(first, name))
+
+
+def test_key_covers_data_and_arguments():
+    x, y = dg.figure2()
+    cache = KneeCache()
+    KneeLocator(x, y, cache=cache)
+    KneeLocator(x, y, S=2.0, cache=cache)
+    KneeLocator(x, y, interp_method="polynomial", cache=cache)
+    KneeLocator(x, y.astype(np.float32), cache=cache)
+    KneeLocator(x, y[::-1], curve="convex", cache=cache)
+    assert (cache.hits, cache.misses) == (0, 5)
+    assert KneeCache.key(x, y, S=1.0) == KneeCache.key(list(x), y.copy(), S=1.0)
+
+
+def test_lru_eviction():
+    x, y = dg.figure2()
+    cache = KneeCache(maxsize=2)
+    for S in (1.0, 2.0, 3.0):
+        KneeLocator(x, y, S=S, cache=cache)
+    assert len(cache) == 2
+    KneeLocator(x, y, S=3.0, cache=cache)
+    KneeLocator(x, y, S=1.0, cache=cache)
+    assert (cache.hits, cache.misses) == (1, 4)
+
+
+def test_ttl(monkeypatch):
+    x, y = dg.figure2()
+    cache = KneeCache(ttl=10)
+    now = [1000.0]
+    monkeypatch.setattr("kneed.cache.time.monotonic", lambda: now[0])
+    KneeLocator(x, y, cache=cache)
+    now[0] += 5
+    KneeLocator(x, y, cache=cache)
+    now[0] += 10
+    KneeLocator(x, y, cache=cache)
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_directory(tmp_path):
+    x, y = dg.figure2()
+    KneeLocator(x, y, cache=KneeCache(directory=str(tmp_path)))
+    cache = KneeCache(directory=str(tmp_path))
+    kl = cache.locate(x, y)
+    assert cache.hits == 1
+    assert kl.knee == KneeLocator(x, y).knee
+    cache.clear()
+    assert len(cache) == 0
+    assert not list(tmp_path.iterdir())
+
+
+def test_key_covers_version(monkeypatch):
+    x, y = dg.figure2()
+    key = KneeCache.key(x, y, S=1.0)
+    monkeypatch.setattr("kneed.cache.__version__", "0.0.0")
+    assert KneeCache.key(x, y, S=1.0) != key
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        b"",
+        b"not a pickle",
+        # a class that no longer exists
+        b"cno_such_module\nKneeLocator\n.",
+        # int("x"), a ValueError while loading
+        b"cbuiltins\nint\n(S'x'\ntR.",
+    ],
+    ids=["empty", "garbage", "missing-module", "failing-call"],
+)
+def test_unreadable_entry_is_a_miss(tmp_path, content):
+    x, y = dg.figure2()
+    KneeLocator(x, y, cache=KneeCache(directory=str(tmp_path)))
+    (entry,) = tmp_path.iterdir()
+    entry.write_bytes(content)
+    cache = KneeCache(directory=str(tmp_path))
+    kl = cache.locate(x, y)
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert kl.knee == KneeLocator(x, y).knee
+    assert KneeCache(directory=str(tmp_path)).locate(x, y).knee == kl.knee
+
+
+def test_threads():
+    x, y = dg.noisy_gaussian(N=200)
+    cache = KneeCache(maxsize=4)
+    knees = []
+
+    def worker(S):
+        for _ in range(20):
+            knees.append((S, KneeLocator(x, y, S=S, cache=cache).knee))
+
+    threads = [threading.Thread(target=worker, args=(S,)) for S in (1.0, 2.0) * 4]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    expected = {S: KneeLocator(x, y, S=S).knee for S in (1.0, 2.0)}
+    assert all(knee == expected[S] for S, knee in knees)
+    assert cache.hits + cache.misses == 160
+
+
+def test_invalid_maxsize():
+    with pytest.raises(ValueError):
+        KneeCache(maxsize=0)
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from kneed.chunked import ChunkedKneeLocator
+from kneed.data_generator import DataGenerator as dg
+from kneed.knee_locator import KneeLocator
+from conftest import SHAPES
+
+
+def curves():
+    rng = np.random.RandomState(7)
+    x = np.arange(300.0)
+    yield dg.figure2()
+    yield dg.bumpy()
+    yield x, np.log1p(x) + rng.normal(scale=0.1, size=x.size)
+    # integer values create plateaus that are both maxima and minima
+    yield x, np.round(np.sqrt(x) + rng.normal(scale=0.5, size=x.size))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 64, 2**20])
+@pytest.mark.parametrize("online", [True, False])
+@pytest.mark.parametrize("curve, direction", SHAPES)
+def test_matches_knee_locator(curve, direction, online, chunk_size):
+    for x, y in curves():
+        kl = KneeLocator(x, y, curve=curve, direction=direction, online=online)
+        ckl = ChunkedKneeLocator(
+            x, y, curve=curve, direction=direction, online=online, chunk_size=chunk_size
+        )
+        assert ckl.knee == kl.knee
+        assert ckl.knee_y == kl.knee_y
+        assert ckl.norm_knee == kl.norm_knee
+        assert ckl.norm_knee_y == kl.norm_knee_y
+        assert ckl.knee_index == kl.knee_index
+        assert ckl.all_knees == kl.all_knees
+        assert ckl.all_norm_knees == kl.all_norm_knees
+        np.testing.assert_array_equal(ckl.all_knees_indices, kl.all_knees_indices)
+
+
+def test_memmap(tmp_path):
+    x, y = dg.noisy_gaussian(N=5000)
+    np.save(tmp_path / "x.npy", x)
+    np.save(tmp_path / "y.npy", y)
+    ckl = ChunkedKneeLocator(
+        np.load(tmp_path / "x.npy", mmap_mode="r"),
+        np.load(tmp_path / "y.npy", mmap_mode="r"),
+        chunk_size=100,
+    )
+    kl = KneeLocator(x, y)
+    assert ckl.knee == kl.knee
+    assert ckl.elbow_y == kl.knee_y
+
+
+def test_no_knee():
+    ckl = ChunkedKneeLocator(np.arange(10), np.ones(10), chunk_size=3)
+    assert ckl.knee is None
+    assert ckl.knee_index is None
+    assert ckl.all_knees == set()
+
+
+def test_invalid_arguments():
+    x, y = dg.figure2()
+    with pytest.raises(ValueError):
+        ChunkedKneeLocator(x, y[:-1])
+    with pytest.raises(ValueError):
+        ChunkedKneeLocator(x, y, chunk_size=0)
+    with pytest.raises(ValueError):
+        ChunkedKneeLocator(x, y, curve="straight")
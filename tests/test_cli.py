@@ -0,0 +1,281 @@
+import csv
+import json
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from kneed.cli import detect, main
+from kneed.knee_locator import KneeLocator
+
+
+def runs(n_runs=6):
+    rng = np.random.RandomState(0)
+    for run in range(n_runs):
+        x = np.linspace(1, 10, 40 + 10 * (run % 3))
+        y = (run + 1) * np.log(x) + rng.normal(scale=0.01, size=len(x))
+        yield "run{}".format(run), x, y
+
+
+def write_csv(path, curves):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["run", "step", "loss"])
+        for run, x, y in curves:
+            writer.writerows((run, a, b) for a, b in zip(x, y))
+
+
+def read_output(path):
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+@pytest.mark.parametrize("chunk_size", [7, 10000])
+def test_detect_csv_by_group(tmp_path, jobs, chunk_size):
+    """Every group gets the knee KneeLocator finds, whatever the chunking"""
+    curves = list(runs())
+    write_csv(tmp_path / "data.csv", curves)
+    status = main(
+        [
+            "detect",
+            str(tmp_path / "data.csv"),
+            "--x=step",
+            "--y=loss",
+            "--group-by=run",
+            "--jobs={}".format(jobs),
+            "--chunk-size={}".format(chunk_size),
+            "-o",
+            str(tmp_path / "knees.csv"),
+        ]
+    )
+    assert status == 0
+    rows = read_output(tmp_path / "knees.csv")
+    assert [row["run"] for row in rows] == [run for run, _, _ in curves]
+    for row, (_, x, y) in zip(rows, curves):
+        kl = KneeLocator(x, y)
+        assert float(row["knee"]) == pytest.approx(kl.knee)
+        assert float(row["knee_y"]) == pytest.approx(kl.knee_y)
+        assert int(row["n_points"]) == len(x)
+
+
+def test_detect_interleaved_groups_across_files(tmp_path):
+    """Rows of a group may be interleaved with other groups and span files"""
+    curves = list(runs(2))
+    rows = [(run, a, b) for run, x, y in curves for a, b in zip(x, y)]
+    order = np.random.RandomState(1).permutation(len(rows))
+    rows = [rows[i] for i in order]
+    # detect keeps rows in file order, sort each group by x to compare
+    rows.sort(key=lambda row: row[1])
+    for part, piece in enumerate((rows[: len(rows) // 2], rows[len(rows) // 2 :])):
+        with open(tmp_path / "part{}.csv".format(part), "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["run", "step", "loss"])
+            writer.writerows(piece)
+
+    table = detect(
+        [str(tmp_path / "part0.csv"), str(tmp_path / "part1.csv")],
+        y="loss",
+        x="step",
+        group_by=["run"],
+        chunk_size=5,
+    )
+    knees = dict(zip(table["run"], table["knee"]))
+    for run, x, y in curves:
+        assert knees[run] == pytest.approx(KneeLocator(x, y).knee)
+
+
+def test_detect_npy_without_x(tmp_path):
+    """Plain arrays are addressed by column position, x defaults to the row
+    position"""
+    _, x, y = next(runs())
+    np.save(tmp_path / "data.npy", y)
+    table = detect([str(tmp_path / "data.npy")], y="0", chunk_size=16)
+    kl = KneeLocator(np.arange(len(y)), y)
+    assert table["knee"] == [kl.knee]
+    assert table["n_points"] == [len(y)]
+
+
+def test_detect_structured_npy(tmp_path):
+    curves = list(runs(3))
+    data = np.array(
+        [(i, a, b) for i, (_, x, y) in enumerate(curves) for a, b in zip(x, y)],
+        dtype=[("id", int), ("x", float), ("y", float)],
+    )
+    np.save(tmp_path / "data.npy", data)
+    table = detect([str(tmp_path / "data.npy")], y="y", x="x", group_by=["id"])
+    assert table["id"] == [0, 1, 2]
+    for knee, (_, x, y) in zip(table["knee"], curves):
+        assert knee == pytest.approx(KneeLocator(x, y).knee)
+
+
+def test_detect_options(tmp_path):
+    """Curves without a knee hold NaN, and the KneeLocator arguments are
+    passed through"""
+    x = np.arange(10.0)
+    np.save(tmp_path / "data.npy", np.column_stack((x, x)))
+    table = detect([str(tmp_path / "data.npy")], y="1", x="0")
+    assert np.isnan(table["knee"][0])
+
+    x = np.linspace(1, 10, 50)
+    np.save(tmp_path / "data.npy", np.column_stack((x, 1 / x)))
+    table = detect(
+        [str(tmp_path / "data.npy")],
+        y="1",
+        x="0",
+        curve="auto",
+        direction="auto",
+        S=2.0,
+    )
+    kl = KneeLocator(x, 1 / x, curve="convex", direction="decreasing", S=2.0)
+    assert table["knee"] == [pytest.approx(kl.knee)]
+
+
+def test_json_output(tmp_path, capsys):
+    x = np.arange(10.0)
+    np.save(tmp_path / "data.npy", np.column_stack((x, x)))
+    main(["detect", str(tmp_path / "data.npy"), "--x=0", "--y=1", "--format=json"])
+    records = json.loads(capsys.readouterr().out)
+    assert records == [
+        {
+            "knee": None,
+            "knee_y": None,
+            "norm_knee": None,
+            "norm_knee_y": None,
+            "n_points": 10,
+        }
+    ]
+
+
+def test_parquet_round_trip(tmp_path):
+    pyarrow = pytest.importorskip("pyarrow")
+    import pyarrow.parquet
+
+    curves = list(runs(3))
+    pyarrow.parquet.write_table(
+        pyarrow.table(
+            {
+                "run": [run for run, x, _ in curves for _ in x],
+                "step": np.concatenate([x for _, x, _ in curves]),
+                "loss": np.concatenate([y for _, _, y in curves]),
+            }
+        ),
+        tmp_path / "data.parquet",
+    )
+    main(
+        [
+            "detect",
+            str(tmp_path / "data.parquet"),
+            "--x=step",
+            "--y=loss",
+            "--group-by=run",
+            "-o",
+            str(tmp_path / "knees.parquet"),
+        ]
+    )
+    table = pyarrow.parquet.read_table(tmp_path / "knees.parquet").to_pydict()
+    assert table["run"] == [run for run, _, _ in curves]
+    for knee, (_, x, y) in zip(table["knee"], curves):
+        assert knee == pytest.approx(KneeLocator(x, y).knee)
+
+
+def test_profile(tmp_path, capsys):
+    write_csv(tmp_path / "data.csv", runs())
+    main(
+        [
+            "detect",
+            str(tmp_path / "data.csv"),
+            "--x=step",
+            "--y=loss",
+            "--group-by=run",
+            "--profile",
+        ]
+    )
+    err = capsys.readouterr().err
+    for phase in ("read", "detect", "write"):
+        assert phase in err
+    assert "6 curves" in err
+
+
+@pytest.mark.parametrize(
+    "arguments",
+    [
+        ["--y=missing"],
+        ["--y=loss", "--jobs=0"],
+        ["--y=loss", "-o", "knees.txt"],
+        ["--y=loss", "--interp-method=unknown"],
+    ],
+)
+def test_invalid_arguments(tmp_path, capsys, arguments):
+    write_csv(tmp_path / "data.csv", runs(1))
+    with pytest.raises(SystemExit) as error:
+        main(["detect", str(tmp_path / "data.csv")] + arguments)
+    assert error.value.code == 2
+    assert "error" in capsys.readouterr().err
+
+
+def test_invalid_output(tmp_path, capsys, monkeypatch):
+    """A bad output path fails before the input is read"""
+    write_csv(tmp_path / "data.csv", runs(1))
+
+    def detect(*args, **kwargs):
+        raise AssertionError("detect should not run")
+
+    monkeypatch.setattr("kneed.cli.detect", detect)
+    with pytest.raises(SystemExit) as error:
+        main(
+            [
+                "detect",
+                str(tmp_path / "data.csv"),
+                "--y=loss",
+                "-o",
+                str(tmp_path / "missing" / "knees.csv"),
+            ]
+        )
+    assert error.value.code == 2
+    assert "knees.csv" in capsys.readouterr().err
+
+
+def test_failed_run_keeps_output(tmp_path):
+    """An existing output is only replaced by a complete one"""
+    write_csv(tmp_path / "data.csv", runs(1))
+    output = tmp_path / "knees.csv"
+    output.write_text("previous results\n")
+    with pytest.raises(SystemExit):
+        main(["detect", str(tmp_path / "data.csv"), "--y=missing", "-o", str(output)])
+    assert output.read_text() == "previous results\n"
+    assert [path.name for path in tmp_path.iterdir()] == ["data.csv", "knees.csv"]
+
+    main(["detect", str(tmp_path / "data.csv"), "--y=loss", "-o", str(output)])
+    assert len(read_output(output)) == 1
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["data.csv", "knees.csv"]
+
+
+def test_broken_pipe(tmp_path):
+    """A reader that stops early, like `head`, is not reported as an error"""
+    write_csv(tmp_path / "data.csv", runs(1))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "kneed", "detect", str(tmp_path / "data.csv")]
+        + ["--x=step", "--y=loss", "--group-by=step"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    process.stdout.close()
+    stderr = process.stderr.read().decode()
+    process.wait()
+    assert "Broken pipe" not in stderr and "Traceback" not in stderr
+
+
+def test_python_m_kneed(tmp_path):
+    write_csv(tmp_path / "data.csv", runs(2))
+    completed = subprocess.run(
+        [sys.executable, "-m", "kneed", "detect", str(tmp_path / "data.csv")]
+        + ["--x=step", "--y=loss", "--group-by=run"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert completed.stdout.splitlines()[0] == (
+        "run,knee,knee_y,norm_knee,norm_knee_y,n_points"
+    )
+    assert len(completed.stdout.splitlines()) == 3
@@ -0,0 +1,106 @@
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from kneed.core import KneeResult, kneedle
+from kneed.data_generator import DataGenerator as dg
+from kneed.knee_locator import KneeLocator
+
+
+def assert_same(result, kl):
+    assert result.knee == kl.knee
+    assert result.knee_y == kl.knee_y
+    assert result.norm_knee == kl.norm_knee
+    assert result.norm_knee_y == kl.norm_knee_y
+    assert result.knee_index == kl.knee_index
+    np.testing.assert_array_equal(result.all_knees_indices, kl.all_knees_indices)
+    np.testing.assert_array_equal(result.all_knees, kl.all_knees_x)
+    np.testing.assert_array_equal(result.all_knees_y, kl.all_knees_y)
+    np.testing.assert_array_equal(result.all_norm_knees_y, kl.all_norm_knees_y)
+    assert set(result.all_norm_knees) == kl.all_norm_knees
+
+
+@pytest.mark.parametrize("online", [True, False])
+@pytest.mark.parametrize("interp_method", ["interp1d", "polynomial"])
+@pytest.mark.parametrize(
+    "data, curve, direction",
+    [
+        (dg.concave_increasing(), "concave", "increasing"),
+        (dg.concave_decreasing(), "concave", "decreasing"),
+        (dg.convex_increasing(), "convex", "increasing"),
+        (dg.convex_decreasing(), "convex", "decreasing"),
+        (dg.bumpy(), "convex", "decreasing"),
+        (dg.noisy_gaussian(mu=50, sigma=10, N=1000, seed=3), "concave", "increasing"),
+    ],
+)
+def test_kneedle_matches_knee_locator(data, curve, direction, interp_method, online):
+    """kneedle returns exactly what KneeLocator finds"""
+    x, y = data
+    kwargs = dict(
+        curve=curve, direction=direction, interp_method=interp_method, online=online
+    )
+    assert_same(kneedle(x, y, **kwargs), KneeLocator(x, y, **kwargs))
+
+
+def test_kneedle_auto_and_dtype():
+    x, y = dg.figure2()
+    assert_same(
+        kneedle(x, y, curve="auto", direction="auto", dtype="float32"),
+        KneeLocator(x, y, curve="auto", direction="auto", dtype="float32"),
+    )
+
+
+def test_kneedle_no_knee():
+    result = kneedle(np.arange(10), np.arange(10))
+    assert result.knee is None and result.knee_index is None
+    assert result.all_knees_indices.size == 0
+
+
+def test_kneedle_invalid_arguments():
+    with pytest.raises(ValueError):
+        kneedle([1, 2, 3], [1, 2, 3], curve="bogus")
+    with pytest.raises(ValueError):
+        kneedle([1, 2, 3], [1, 2])
+
+
+def test_result_is_read_only():
+    x, y = dg.figure2()
+    result = kneedle(x, y)
+    with pytest.raises(AttributeError):
+        result.knee = 1.0
+    with pytest.raises(ValueError):
+        result.all_knees[0] = 1.0
+    assert result.elbow == result.knee
+    assert "knee_index=" in repr(result)
+    assert KneeResult().knee is None
+
+
+def test_concurrent_calls():
+    """Many threads sharing the same input arrays get the serial results,
+    and the inputs are left untouched"""
+    x = np.linspace(1, 10, 5000)
+    rng = np.random.RandomState(0)
+    curves = [np.log(x) + rng.normal(scale=0.01, size=len(x)) for _ in range(64)]
+    originals = [y.copy() for y in curves]
+    expected = [kneedle(x, y, online=True) for y in curves]
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        for _ in range(3):
+            results = list(pool.map(lambda y: kneedle(x, y, online=True), curves))
+            for result, reference in zip(results, expected):
+                assert result.knee == reference.knee
+                np.testing.assert_array_equal(
+                    result.all_knees_indices, reference.all_knees_indices
+                )
+    for y, original in zip(curves, originals):
+        np.testing.assert_array_equal(y, original)
+
+
+def test_result_pickles():
+    x, y = dg.figure2()
+    result = kneedle(x, y)
+    restored = pickle.loads(pickle.dumps(result))
+    assert restored.knee == result.knee
+    np.testing.assert_array_equal(restored.all_knees, result.all_knees)
+    assert not restored.all_knees.flags.writeable
@@ -0,0 +1,121 @@
+import numpy as np
+import pytest
+from kneed.decimation import lttb, minmax
+from kneed.knee_locator import KneeLocator
+from conftest import SHAPES
+
+
+def shaped_curve(curve, direction, n=100_000):
+    x = np.linspace(1.0, 10.0, n)
+    if curve == "concave":
+        y = np.log(x) if direction == "increasing" else -np.exp(x / 2)
+    else:
+        y = np.exp(x / 2) if direction == "increasing" else 1 / x
+    return x, y
+
+
+@pytest.mark.parametrize("method", [lttb, minmax])
+def test_keeps_ends_sorted_and_unique(method):
+    rng = np.random.RandomState(3)
+    x = np.arange(1000.0)
+    y = rng.normal(size=x.size)
+    indices = method(x, y, 50)
+    assert indices[0] == 0
+    assert indices[-1] == len(x) - 1
+    assert len(indices) <= 50
+    np.testing.assert_array_equal(indices, np.unique(indices))
+
+
+@pytest.mark.parametrize("method", [lttb, minmax])
+def test_short_curves_are_kept(method):
+    x = np.arange(10.0)
+    np.testing.assert_array_equal(method(x, x**2, 10), np.arange(10))
+
+
+def test_minmax_keeps_spikes():
+    y = np.zeros(1000)
+    y[123], y[877] = 5.0, -5.0
+    indices = minmax(np.arange(1000.0), y, 10)
+    assert 123 in indices
+    assert 877 in indices
+
+
+def test_too_few_points():
+    x = np.arange(10.0)
+    with pytest.raises(ValueError):
+        lttb(x, x, 2)
+    with pytest.raises(ValueError):
+        minmax(x, x, 3)
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+@pytest.mark.parametrize("curve, direction", SHAPES)
+def test_downsampled_knee_matches_full_resolution(curve, direction, method):
+    x, y = shaped_curve(curve, direction)
+    kl = KneeLocator(x, y, curve=curve, direction=direction)
+    dkl = KneeLocator(
+        x,
+        y,
+        curve=curve,
+        direction=direction,
+        downsample=500,
+        downsample_method=method,
+    )
+    assert len(dkl.x) <= 500
+    np.testing.assert_array_equal(dkl.x, x[dkl.downsample_indices])
+    assert abs(dkl.knee - kl.knee) <= dkl.knee_error
+    assert dkl.knee_y == y[x == dkl.knee][0]
+
+
+def test_downsample_polynomial():
+    x, y = shaped_curve("concave", "increasing")
+    kl = KneeLocator(x, y, interp_method="polynomial", downsample=500)
+    assert kl.knee == pytest.approx(3.9, abs=0.2)
+    assert kl.knee_error < 0.1
+
+
+def test_downsample_short_curve_is_unchanged():
+    x, y = shaped_curve("concave", "increasing", n=100)
+    kl = KneeLocator(x, y, downsample=500)
+    assert kl.downsample_indices is None
+    assert kl.knee_error is None
+    assert kl.knee == KneeLocator(x, y).knee
+
+
+def test_invalid_downsample_arguments():
+    x, y = shaped_curve("concave", "increasing", n=100)
+    with pytest.raises(ValueError):
+        KneeLocator(x, y, downsample=50, downsample_method="random")
+    with pytest.raises(ValueError):
+        KneeLocator(x, y, downsample=50, resample=20)
+
+
+@pytest.mark.parametrize("online", [True, False])
+@pytest.mark.parametrize("curve, direction", SHAPES)
+def test_downsampled_knee_fields_agree(curve, direction, online):
+    """Every reported knee field refers to the same original point"""
+    x, y = shaped_curve(curve, direction, n=200_000)
+    rng = np.random.RandomState(0)
+    y = y + rng.normal(scale=1e-3 * np.ptp(y), size=len(y))
+    kl = KneeLocator(
+        x, y, curve=curve, direction=direction, online=online, downsample=1000
+    )
+    assert x[kl.knee_index] == kl.knee
+    assert y[kl.knee_index] == kl.knee_y
+    assert kl.knee in kl.all_knees
+    np.testing.assert_array_equal(kl.all_knees_x, x[kl.all_knees_indices])
+    np.testing.assert_array_equal(kl.all_knees_y, y[kl.all_knees_indices])
+    assert set(kl.all_knees_x) == kl.all_knees
+
+    # normalized like the full resolution curve
+    full = KneeLocator(x, y, curve=curve, direction=direction)
+    threshold_index = full._knee_index(kl.knee_index)
+    assert kl.norm_knee == full.x_normalized[threshold_index]
+    assert kl.norm_knee_y == pytest.approx(full.y_normalized[threshold_index])
+
+    result = kl.result
+    assert result.knee == kl.knee and result.all_knees[-1] in kl.all_knees
+    np.testing.assert_array_equal(result.all_knees_indices, kl.all_knees_indices)
+    table = kl.sweep_sensitivity([kl.S])
+    assert table["knee"][0] == kl.knee
+    assert table["knee_index"][0] == kl.knee_index
@@ -0,0 +1,160 @@
+import numpy as np
+import pytest
+from kneed.data_generator import DataGenerator as dg
+from kneed.knee_locator import KneeLocator, _extrema_mask
+from conftest import SHAPES
+
+
+def reference_find_knee(kl):
+    """The original point-by-point traversal of the difference curve."""
+    all_knees, all_norm_knees = set(), set()
+    all_knees_y, all_norm_knees_y = [], []
+    if not kl.maxima_indices.size:
+        return None, None, all_knees, all_norm_knees, all_knees_y, all_norm_knees_y
+    maxima_threshold_index = 0
+    detection_active = True
+    for i, x in enumerate(kl.x_difference):
+        if i < kl.maxima_indices[0]:
+            continue
+        j = i + 1
+        if i == (len(kl.x_difference) - 1):
+            break
+        if (kl.maxima_indices == i).any():
+            threshold = kl.Tmx[maxima_threshold_index]
+            threshold_index = i
+            maxima_threshold_index += 1
+            detection_active = True
+        if (kl.minima_indices == i).any():
+            threshold = 0.0
+            detection_active = False
+        if detection_active and kl.y_difference[j] < threshold:
+            if kl.curve == "convex":
+                if kl.direction == "decreasing":
+                    knee = kl.x[threshold_index]
+                else:
+                    knee = kl.x[-(threshold_index + 1)]
+            else:
+                if kl.direction == "decreasing":
+                    knee = kl.x[-(threshold_index + 1)]
+                else:
+                    knee = kl.x[threshold_index]
+            norm_knee = kl.x_normalized[threshold_index]
+            if knee not in all_knees:
+                all_knees_y.append(kl.y[kl.x == knee][0])
+                all_norm_knees_y.append(
+                    kl.y_normalized[kl.x_normalized == norm_knee][0]
+                )
+            all_knees.add(knee)
+            all_norm_knees.add(norm_knee)
+            if kl.online is False:
+                return (
+                    knee,
+                    norm_knee,
+                    all_knees,
+                    all_norm_knees,
+                    all_knees_y,
+                    all_norm_knees_y,
+                )
+    if all_knees == set():
+        return None, None, all_knees, all_norm_knees, all_knees_y, all_norm_knees_y
+    return knee, norm_knee, all_knees, all_norm_knees, all_knees_y, all_norm_knees_y
+
+
+def assert_matches_reference(kl):
+    knee, norm_knee, all_knees, all_norm_knees, all_knees_y, all_norm_knees_y = (
+        reference_find_knee(kl)
+    )
+    assert kl.knee == knee
+    assert kl.norm_knee == norm_knee
+    assert kl.all_knees == all_knees
+    assert kl.all_norm_knees == all_norm_knees
+    assert kl.all_knees_y == all_knees_y
+    assert kl.all_norm_knees_y == all_norm_knees_y
+
+
+def noisy_curves():
+    rng = np.random.RandomState(7)
+    x = np.arange(300)
+    yield x, np.log1p(x) + rng.normal(scale=0.1, size=x.size)
+    yield x, np.sort(rng.gamma(0.5, 1.0, x.size))[::-1]
+    # integer values create plateaus that are both maxima and minima
+    yield x, np.round(np.sqrt(x) + rng.normal(scale=0.5, size=x.size))
+    yield x, np.sin(x / 20.0)
+
+
+@pytest.mark.parametrize("online", [True, False])
+@pytest.mark.parametrize("curve, direction", SHAPES)
+@pytest.mark.parametrize(
+    "data",
+    [
+        dg.figure2(),
+        dg.concave_increasing(),
+        dg.concave_decreasing(),
+        dg.convex_increasing(),
+        dg.convex_decreasing(),
+        dg.bumpy(),
+        dg.noisy_gaussian(N=500),
+    ],
+)
+def test_generated_curves_match_reference(data, curve, direction, online):
+    x, y = data
+    kl = KneeLocator(x, y, curve=curve, direction=direction, online=online)
+    assert_matches_reference(kl)
+
+
+@pytest.mark.parametrize("S", [0.0, 1.0, 5.0])
+@pytest.mark.parametrize("online", [True, False])
+@pytest.mark.parametrize("curve, direction", SHAPES)
+def test_noisy_curves_match_reference(curve, direction, online, S):
+    for x, y in noisy_curves():
+        kl = KneeLocator(x, y, S=S, curve=curve, direction=direction, online=online)
+        assert_matches_reference(kl)
+
+
+def test_no_maxima_matches_reference():
+    kl = KneeLocator(range(10), [1] * 10)
+    assert_matches_reference(kl)
+
+
+@pytest.mark.parametrize("comparator", [np.greater_equal, np.less_equal])
+def test_extrema_mask_matches_argrelextrema(comparator):
+    from scipy.signal import argrelextrema
+
+    rng = np.random.RandomState(11)
+    arrays = [
+        np.round(rng.normal(size=50)),
+        rng.normal(size=(4, 30)),
+        np.array([1.0, np.nan, 2.0, 2.0, np.nan, 0.0]),
+        np.array([3.0]),
+        np.ones(5),
+    ]
+    for a in arrays:
+        expected = np.zeros(a.shape, dtype=bool)
+        expected[argrelextrema(a, comparator, axis=-1)] = True
+        np.testing.assert_array_equal(_extrema_mask(a, comparator), expected)
+
+
+@pytest.mark.parametrize("online", [True, False])
+@pytest.mark.parametrize("curve, direction", SHAPES)
+def test_sweep_sensitivity_matches_knee_locator(curve, direction, online):
+    S_values = [0.0, 0.5, 1.0, 3.0, 10.0, 100.0, 400.0, 1e6]
+    # exact ties between a drop and S * spacing, common with rounded y
+    ties = (np.arange(10), np.array([-1, -1, -3, -4, -4, -4, 0, 3, 3, 6]))
+    curves = list(noisy_curves()) + [dg.bumpy(), ties]
+    for x, y in curves:
+        kl = KneeLocator(x, y, curve=curve, direction=direction, online=online)
+        table = kl.sweep_sensitivity(S_values)
+        np.testing.assert_array_equal(table["S"], S_values)
+        for row in table:
+            expected = KneeLocator(
+                x, y, S=row["S"], curve=curve, direction=direction, online=online
+            )
+            if expected.knee is None:
+                assert row["knee_index"] == -1
+                assert np.isnan(row["knee"])
+            else:
+                assert row["knee_index"] == expected.knee_index
+                assert row["knee"] == expected.knee
+                assert row["knee_y"] == expected.knee_y
+                assert row["norm_knee"] == expected.norm_knee
+                assert row["norm_knee_y"] == expected.norm_knee_y
@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+from kneed.batch import locate_knees_grouped
+from kneed.knee_locator import KneeLocator
+
+
+def long_format(n_groups=60, seed=0):
+    """Curves of a few different lengths, one row per point"""
+    rng = np.random.RandomState(seed)
+    lengths = rng.choice([2, 8, 30, 200], size=n_groups)
+    groups = np.repeat(np.arange(n_groups), lengths)
+    x = np.concatenate([np.arange(1, n + 1, dtype=float) for n in lengths])
+    y = np.log(x) * (groups % 5 + 1) + rng.normal(scale=0.01, size=len(x))
+    return groups, x, y
+
+
+def expected_knees(groups, x, y, **kwargs):
+    expected = []
+    for group in range(groups.max() + 1):
+        rows = groups == group
+        knee = None
+        if rows.sum() >= 3:
+            knee = KneeLocator(x[rows], y[rows], **kwargs).knee
+        expected.append(np.nan if knee is None else knee)
+    return np.array(expected)
+
+
+@pytest.mark.parametrize("block_size", [2**16, 100])
+@pytest.mark.parametrize("shuffle", [False, True])
+def test_locate_knees_grouped(shuffle, block_size):
+    groups, x, y = long_format()
+    expected = expected_knees(groups, x, y, S=2.0)
+    if shuffle:
+        # interleave the curves, keeping the order of each one's points
+        order = np.argsort(np.random.RandomState(1).rand(len(x)) + x, kind="stable")
+        groups, x, y = groups[order], x[order], y[order]
+    knees, knees_y, _, _ = locate_knees_grouped(
+        x, y, groups, block_size=block_size, S=2.0
+    )
+    np.testing.assert_array_equal(knees, expected)
+    assert np.isnan(knees_y).tolist() == np.isnan(expected).tolist()
+
+
+def test_locate_knees_grouped_default_x_and_skipped_rows():
+    groups, x, y = long_format(10)
+    expected = expected_knees(groups, x, y)
+    groups = np.append(groups, [-1, -1])
+    y = np.append(y, [100.0, 200.0])
+    knees, _, _, _ = locate_knees_grouped(None, y, groups, n_groups=12)
+    # x defaults to 0, 1, 2... instead of 1, 2, 3...
+    np.testing.assert_array_equal(knees[:10], expected - 1)
+    assert np.isnan(knees[10:]).all()
+
+
+def test_knees_by_group_pandas():
+    pd = pytest.importorskip("pandas")
+    from kneed.pandas import knees_by_group
+
+    groups, x, y = long_format()
+    df = pd.DataFrame({"run": groups // 2, "part": groups % 2, "x": x, "y": y})
+    df.loc[0, "run"] = np.nan
+    out = knees_by_group(df.iloc[::-1], by=["run", "part"], x="x", y="y")
+    reference = (
+        df.iloc[::-1]
+        .groupby(["run", "part"])
+        .apply(lambda d: np.nan if len(d) < 3 else KneeLocator(d.x, d.y).knee)
+    )
+    assert out.index.equals(reference.index)
+    np.testing.assert_array_equal(out["knee"], reference.astype(float))
+    assert out["n_points"].tolist() == df.groupby(["run", "part"]).size().tolist()
+    assert knees_by_group(df.iloc[:0], by="run", x=None, y="y").empty
+
+
+def test_knees_by_group_arrow():
+    pa = pytest.importorskip("pyarrow")
+    from kneed.arrow import knees_by_group
+
+    groups, x, y = long_format()
+    names = np.array(["a", "b", "c"])[groups % 3]
+    keys = pa.array(names, mask=groups == 0)
+    table = pa.table({"name": keys, "id": groups // 3, "x": x, "y": y})
+    out = knees_by_group(table, by=["name", "id"], x="x", y="y")
+    assert out.column_names == [
+        "name",
+        "id",
+        "knee",
+        "knee_y",
+        "norm_knee",
+        "norm_knee_y",
+        "n_points",
+    ]
+    assert out.schema.field("name").type == pa.string()
+    expected = expected_knees(groups, x, y)[1:]
+    result = out.to_pydict()
+    pairs = list(zip(result["name"], result["id"]))
+    assert pairs == sorted(pairs) and len(pairs) == len(expected)
+    for name, id_, knee, n_points in zip(
+        result["name"], result["id"], result["knee"], result["n_points"]
+    ):
+        group = id_ * 3 + "abc".index(name)
+        assert n_points == (groups == group).sum()
+        if np.isnan(expected[group - 1]):
+            assert knee is None
+        else:
+            assert knee == expected[group - 1]
@@ -0,0 +1,21 @@
+import subprocess
+import sys
+
+
+def test_import_is_lightweight():
+    """Guard `import kneed` against pulling in scipy or matplotlib eagerly"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import kneed"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # lines look like "import time:   self [us] | cumulative | imported package"
+    imported = [
+        line.rsplit("|", 1)[-1].strip()
+        for line in completed.stderr.splitlines()
+        if line.startswith("import time:")
+    ]
+    assert "kneed" in imported
+    heavy = [name for name in imported if name.split(".")[0] in ("scipy", "matplotlib")]
+    assert heavy == []
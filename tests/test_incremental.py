@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+from kneed.chunked import ChunkedKneeLocator
+from kneed.data_generator import DataGenerator as dg
+from kneed.incremental import IncrementalKneeLocator
+from kneed.knee_locator import KneeLocator
+from conftest import SHAPES
+
+
+@pytest.mark.parametrize("online", [True, False])
+def test_update_matches_knee_locator(online):
+    x, y = dg.bumpy()
+    ikl = IncrementalKneeLocator(
+        curve="convex", direction="decreasing", online=online, capacity=4
+    )
+    for n, (xi, yi) in enumerate(zip(x, y), start=1):
+        ikl.update(xi, yi)
+        if n < 10:
+            continue
+        kl = KneeLocator(
+            x[:n], y[:n], curve="convex", direction="decreasing", online=online
+        )
+        assert ikl.knee == kl.knee
+        assert ikl.norm_knee == kl.norm_knee
+    assert len(ikl) == len(x)
+    np.testing.assert_array_equal(ikl.y, y)
+
+
+def test_extend():
+    x, y = dg.figure2()
+    ikl = IncrementalKneeLocator(capacity=1)
+    ikl.extend(x[:5], y[:5])
+    ikl.extend(x[5:], y[5:])
+    kl = KneeLocator(x, y)
+    assert ikl.knee == kl.knee
+    assert ikl.elbow_y == kl.knee_y
+    assert ikl.norm_knee_y == kl.norm_knee_y
+
+
+def test_result_reused_until_update():
+    x, y = dg.figure2()
+    ikl = IncrementalKneeLocator()
+    ikl.extend(x, y)
+    result = ikl._locate()
+    assert ikl._locate() is result
+    ikl.update(1.1, 4.2)
+    assert ikl._locate() is not result
+
+
+def test_too_few_points():
+    ikl = IncrementalKneeLocator()
+    assert ikl.knee is None
+    ikl.update(0, 1)
+    assert ikl.knee is None
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        IncrementalKneeLocator(curve="bad curve")
+    ikl = IncrementalKneeLocator()
+    with pytest.raises(ValueError):
+        ikl.extend([1, 2], [1])
+
+
+@pytest.mark.parametrize("online", [True, False])
+@pytest.mark.parametrize("curve, direction", SHAPES)
+def test_long_curve_matches_knee_locator(curve, direction, online):
+    rng = np.random.RandomState(3)
+    x = np.linspace(0.0, 10.0, 40000)
+    y = np.log1p(x) + rng.normal(scale=0.01, size=x.size)
+    if curve == "convex":
+        y = -y
+    if (curve == "convex") == (direction == "increasing"):
+        y = y[::-1]
+    ikl = IncrementalKneeLocator(curve=curve, direction=direction, online=online)
+    ikl.extend(x[:1000], y[:1000])
+    for xi, yi in zip(x[1000:1010], y[1000:1010]):
+        ikl.update(xi, yi)
+    ikl.extend(x[1010:], y[1010:])
+    ikl.extend([], [])
+    assert (ikl._x_min, ikl._x_max) == (x.min(), x.max())
+    assert (ikl._y_min, ikl._y_max) == (y.min(), y.max())
+    kl = KneeLocator(x, y, curve=curve, direction=direction, online=online)
+    assert ikl.knee == kl.knee
+    assert ikl.knee_y == kl.knee_y
+    assert ikl.norm_knee == kl.norm_knee
+    assert ikl.norm_knee_y == kl.norm_knee_y
+
+
+def test_offline_read_stops_at_first_knee(monkeypatch):
+    x, y = dg.figure2()
+    x = np.concatenate([x, np.linspace(1.2, 100.0, 10**5)])
+    y = np.concatenate([y, np.log(x[len(y) :])])
+    read = []
+    difference = ChunkedKneeLocator._difference
+
+    def recording(self, start, stop):
+        read.append(stop)
+        return difference(self, start, stop)
+
+    monkeypatch.setattr(ChunkedKneeLocator, "_difference", recording)
+    ikl = IncrementalKneeLocator()
+    ikl.extend(x, y)
+    assert ikl.knee == KneeLocator(x, y).knee
+    assert max(read) < len(x) // 2
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from kneed.core import kneedle
+from kneed.parallel import _balance, map_knees
+
+
+def uneven_curves(n=40, seed=0):
+    """Curves of very different lengths, some sharing x, one without a knee"""
+    rng = np.random.RandomState(seed)
+    shared_x = np.linspace(1, 10, 300)
+    curves = []
+    for i in range(n):
+        if i % 4 == 0:
+            x = shared_x
+        else:
+            x = np.linspace(1, 10, rng.randint(10, 5000 if i % 7 else 50000))
+        y = np.log(x) * (i + 1) + rng.normal(scale=0.01, size=len(x))
+        curves.append((x, y))
+    curves.append((list(range(10)), list(range(10))))
+    return curves
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+@pytest.mark.parametrize("online", [True, False])
+def test_matches_kneedle(n_jobs, online):
+    curves = uneven_curves()
+    results = map_knees(curves, n_jobs=n_jobs, online=online)
+    assert len(results) == len(curves)
+    for record, (x, y) in zip(results, curves):
+        expected = kneedle(x, y, online=online)
+        if expected.knee is None:
+            assert np.isnan(record["knee"]) and record["knee_index"] == -1
+        else:
+            assert record["knee"] == expected.knee
+            assert record["knee_y"] == expected.knee_y
+            assert record["norm_knee"] == expected.norm_knee
+            assert record["norm_knee_y"] == expected.norm_knee_y
+            assert record["knee_index"] == expected.knee_index
+
+
+def test_generator_input_and_options():
+    curves = uneven_curves(8)
+    results = map_knees(((x, y) for x, y in curves), n_jobs=2, chunks_per_job=1, S=3.0)
+    expected = [kneedle(x, y, S=3.0).knee_index for x, y in curves]
+    assert results["knee_index"].tolist() == [-1 if k is None else k for k in expected]
+
+
+def test_balance():
+    """Every curve lands in exactly one chunk, and the chunks hold about the
+    same number of points"""
+    lengths = np.array([100_000] + [1000] * 300)
+    chunks = _balance(lengths, 4)
+    assert sorted(np.concatenate(chunks).tolist()) == list(range(len(lengths)))
+    loads = [lengths[chunk].sum() + 2000 * len(chunk) for chunk in chunks]
+    assert loads == sorted(loads, reverse=True)
+    assert max(loads) - min(loads) <= 100_000 + 2000
+
+
+def test_empty_and_invalid():
+    assert len(map_knees([], n_jobs=2)) == 0
+    with pytest.raises(ValueError):
+        map_knees([([1, 2, 3], [1, 2])], n_jobs=2)
+    with pytest.raises(ValueError):
+        map_knees([([1, 2, 3], [1, 2, 3])], n_jobs=0)
+    with pytest.raises(ValueError):
+        map_knees([([1, 2, 3], [1, 2, 3])], n_jobs=2, curve="bogus")
@@ -0,0 +1,82 @@
+import pickle
+
+import numpy as np
+import pytest
+from kneed.core import kneedle
+from kneed.data_generator import DataGenerator as dg
+from kneed.knee_locator import KneeLocator
+from kneed.result import (
+    RESULT_DTYPE,
+    KneeResult,
+    results_to_arrow,
+    results_to_numpy,
+)
+
+
+def sample_results():
+    x, y = dg.bumpy()
+    return [
+        kneedle(*dg.figure2()),
+        kneedle(x, y, curve="convex", direction="decreasing", online=True),
+        kneedle(np.arange(10), np.arange(10)),
+        kneedle(*dg.figure2(), dtype="float32"),
+    ]
+
+
+def assert_same(a, b):
+    for name in KneeResult.__slots__:
+        if name.startswith("all_"):
+            np.testing.assert_array_equal(getattr(a, name), getattr(b, name))
+        else:
+            assert getattr(a, name) == getattr(b, name)
+
+
+@pytest.mark.parametrize("result", sample_results())
+def test_bytes_round_trip(result):
+    data = result.to_bytes()
+    assert len(data) == 56 + 40 * len(result.all_knees_indices)
+    assert_same(KneeResult.from_bytes(data), result)
+    assert_same(KneeResult.from_bytes(bytearray(data)), result)
+
+
+def test_from_bytes_invalid():
+    data = kneedle(*dg.figure2()).to_bytes()
+    for bad in (data[:10], b"XXXX" + data[4:], data + b"\0" * 8):
+        with pytest.raises(ValueError):
+            KneeResult.from_bytes(bad)
+
+
+def test_results_to_numpy():
+    results = sample_results()
+    table = results_to_numpy(results)
+    assert table.dtype == RESULT_DTYPE
+    assert table["knee"][0] == results[0].knee
+    assert table["n_knees"].tolist() == [len(r.all_knees) for r in results]
+    assert np.isnan(table["knee"][2]) and table["knee_index"][2] == -1
+    restored = np.frombuffer(table.tobytes(), dtype=RESULT_DTYPE)
+    for name in RESULT_DTYPE.names:
+        np.testing.assert_array_equal(restored[name], table[name])
+    assert len(results_to_numpy([])) == 0
+
+
+def test_results_to_arrow():
+    pytest.importorskip("pyarrow")
+    results = sample_results()
+    table = results_to_arrow(results).to_pydict()
+    assert table["knee"][0] == results[0].knee
+    assert table["knee"][2] is None and table["knee_index"][2] is None
+    assert table["all_knees"][1] == results[1].all_knees.tolist()
+    assert table["all_knees_indices"][1] == results[1].all_knees_indices.tolist()
+    assert table["all_knees"][2] == []
+
+
+@pytest.mark.parametrize("online", [True, False])
+@pytest.mark.parametrize("keep_intermediates", [True, False])
+def test_knee_locator_result(online, keep_intermediates):
+    x, y = dg.bumpy()
+    kwargs = dict(curve="convex", direction="decreasing", online=online)
+    kl = KneeLocator(x, y, keep_intermediates=keep_intermediates, **kwargs)
+    assert_same(kl.result, kneedle(x, y, **kwargs))
+    # the result is much smaller than the locator
+    assert len(pickle.dumps(kl.result)) < len(pickle.dumps(kl)) / 2
+    assert KneeLocator(np.arange(10), np.arange(10)).result.knee is None
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from kneed.knee_locator import KneeLocator
+from kneed.rolling import RollingKneeLocator
+
+
+def stream(n=1500, seed=0):
+    rng = np.random.RandomState(seed)
+    x = np.arange(n, dtype=float)
+    y = np.sqrt(np.cumsum(np.abs(rng.normal(size=n)))) + rng.normal(scale=0.3, size=n)
+    return x, y
+
+
+def window_knees(x, y, window, step, **kwargs):
+    knees = []
+    for start in range(0, len(x) - window + 1, step):
+        kl = KneeLocator(x[start : start + window], y[start : start + window], **kwargs)
+        knees.append(np.nan if kl.knee is None else kl.knee)
+    return np.array(knees)
+
+
+@pytest.mark.parametrize("online", [True, False])
+@pytest.mark.parametrize("window, step", [(40, 1), (40, 7), (15, 50)])
+def test_extend_matches_knee_locator(window, step, online):
+    x, y = stream()
+    rkl = RollingKneeLocator(window, step, online=online, block_size=256)
+    knees = []
+    rng = np.random.RandomState(1)
+    start = 0
+    while start < len(x):
+        stop = start + rng.randint(1, 150)
+        knees.append(rkl.extend(x[start:stop], y[start:stop]))
+        start = stop
+    expected = window_knees(x, y, window, step, online=online)
+    np.testing.assert_array_equal(np.concatenate(knees), expected)
+    assert rkl.n_windows == len(expected)
+    assert rkl.N == len(x)
+
+
+def test_update():
+    x, y = stream(n=100)
+    rkl = RollingKneeLocator(30, curve="convex", direction="decreasing")
+    knees = [rkl.update(xi, -yi) for xi, yi in zip(x, y)]
+    assert all(len(k) == 0 for k in knees[:29])
+    assert all(len(k) == 1 for k in knees[29:])
+    expected = window_knees(x, -y, 30, 1, curve="convex", direction="decreasing")
+    np.testing.assert_array_equal(np.concatenate(knees), expected)
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        RollingKneeLocator(2)
+    with pytest.raises(ValueError):
+        RollingKneeLocator(10, step=0)
+    with pytest.raises(ValueError):
+        RollingKneeLocator(10, curve="straight")
+    with pytest.raises(ValueError):
+        RollingKneeLocator(10).extend([1.0, 2.0], [1.0])
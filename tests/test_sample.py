@@ -2,9 +2,10 @@ import math
 import matplotlib.pyplot as plt
 import numpy as np
 import pytest
+from kneed.cache import KneeCache
 from kneed.data_generator import DataGenerator as dg
 from kneed.knee_locator import KneeLocator
-from kneed.shape_detector import find_shape
+from kneed.shape_detector import find_shape, find_shape_batch
 
 
 @pytest.mark.parametrize("interp_method", ["interp1d", "polynomial"])
@@ -267,6 +268,35 @@ def test_y():
     assert math.isclose(kl.all_norm_elbows_y[0], 0.758, rel_tol=0.03)
 
 
+def test_knee_index():
+    """Test that knee results are tracked by index"""
+    x, y = dg.bumpy()
+    kl = KneeLocator(x, y, curve="convex", direction="decreasing", online=True)
+    assert kl.x[kl.knee_index] == kl.knee
+    assert kl.y[kl.knee_index] == kl.knee_y
+    np.testing.assert_array_equal(kl.all_knees_x, [26, 31, 41, 46, 53])
+    np.testing.assert_array_equal(kl.all_knees_x, kl.x[kl.all_knees_indices])
+    np.testing.assert_array_equal(kl.all_knees_y, kl.y[kl.all_knees_indices])
+
+
+def test_knee_y_at_zero():
+    """Test that a knee at x=0 still reports its y value"""
+    x, y = dg.convex_decreasing()
+    kl = KneeLocator(x - 2, y, curve="convex", direction="decreasing")
+    assert kl.knee == 0
+    assert kl.knee_y == 20
+    assert kl.norm_knee_y is not None
+
+
+def test_knee_y_duplicate_x():
+    """Test that the knee y value comes from the knee point, not the first equal x"""
+    x = np.array([0, 1, 2, 2, 3, 4, 5, 6, 7, 8], dtype=float)
+    y = np.array([0, 60, 80, 84, 90, 95, 96, 97, 98, 99], dtype=float)
+    kl = KneeLocator(x, y, curve="concave", online=True)
+    assert kl.y[kl.knee_index] == kl.knee_y
+    np.testing.assert_array_equal(kl.all_knees_y, kl.y[kl.all_knees_indices])
+
+
 def test_y_no_knee():
     """Test the y value, if there is no knee found."""
     kl = KneeLocator(
@@ -289,6 +319,141 @@ def test_interp_method():
         kl = KneeLocator(x, y, interp_method="not_a_method")
 
 
+def test_interp1d_reuses_y():
+    """Test that the default interp1d path does not refit the data"""
+    x, y = dg.figure2()
+    kl = KneeLocator(x, y, S=1.0, curve="concave", interp_method="interp1d")
+    assert kl.Ds_y is kl.y
+
+
+@pytest.mark.parametrize("interp_method", ["interp1d", "polynomial"])
+def test_resample_uniform(interp_method):
+    """Test resampling unevenly spaced data onto a uniform grid"""
+    x = np.linspace(0, 1, 40) ** 2
+    y = -1 / (x + 0.1) + 5
+    kl = KneeLocator(x, y, curve="concave", interp_method=interp_method, resample=100)
+    assert kl.N == len(kl.x) == len(kl.y) == 100
+    np.testing.assert_allclose(np.diff(kl.x), 1 / 99)
+    assert math.isclose(kl.knee, 0.22, rel_tol=0.1)
+    assert math.isclose(kl.knee_y, -1 / (kl.knee + 0.1) + 5, rel_tol=0.05)
+
+
+def test_resample_grid():
+    """Test resampling onto a user-supplied grid"""
+    x, y = dg.figure2()
+    grid = np.linspace(0, 1, 19)
+    kl = KneeLocator(x, y, curve="concave", resample=grid)
+    np.testing.assert_array_equal(kl.x, grid)
+    np.testing.assert_allclose(kl.y[::2], y)
+    assert math.isclose(kl.knee, 0.22, rel_tol=0.05)
+
+
+def test_length_mismatch():
+    """Test that x and y must have the same length"""
+    with pytest.raises(ValueError):
+        KneeLocator(range(4), [1, 3, 5])
+
+
+def test_profile():
+    """Test that profiling records every step"""
+    x, y = dg.figure2()
+    stages = [
+        "input",
+        "fit",
+        "normalize",
+        "difference",
+        "extrema",
+        "thresholds",
+        "find_knee",
+    ]
+    kl = KneeLocator(x, y, S=1.0, curve="concave", profile=True)
+    assert list(kl.timings) == stages
+    for record in kl.timings.values():
+        assert record["time"] >= 0
+        assert record["bytes"] >= 0
+    assert kl.timings["input"]["size"] == len(x)
+    assert kl.timings["find_knee"]["size"] == 1
+
+    received = []
+    kl = KneeLocator(x, y, profile=lambda stage, record: received.append(stage))
+    assert received == stages
+    assert list(kl.timings) == stages
+
+
+def test_profile_disabled():
+    """Test that timings are empty unless profiling is requested"""
+    x, y = dg.figure2()
+    kl = KneeLocator(x, y)
+    assert kl.timings == {}
+
+
+@pytest.mark.parametrize("interp_method", ["interp1d", "polynomial"])
+def test_keep_intermediates(interp_method):
+    """Test that compact locators rebuild the same intermediate arrays"""
+    x, y = dg.bumpy()
+    full = KneeLocator(
+        x, y, curve="convex", direction="decreasing", interp_method=interp_method
+    )
+    compact = KneeLocator(
+        x,
+        y,
+        curve="convex",
+        direction="decreasing",
+        interp_method=interp_method,
+        keep_intermediates=False,
+    )
+    assert compact._intermediates is None
+    assert compact.knee == full.knee
+    assert compact.norm_knee_y == full.norm_knee_y
+    for name in [
+        "Ds_y",
+        "x_normalized",
+        "y_normalized",
+        "x_difference",
+        "y_difference",
+        "maxima_indices",
+        "x_difference_maxima",
+        "y_difference_maxima",
+        "minima_indices",
+        "x_difference_minima",
+        "y_difference_minima",
+        "Tmx",
+    ]:
+        np.testing.assert_array_equal(getattr(compact, name), getattr(full, name))
+    assert compact._intermediates is None
+
+
+def test_keep_intermediates_pickle():
+    """Test that compact locators pickle without their intermediate arrays"""
+    import pickle
+
+    x, y = dg.figure2()
+    kl = KneeLocator(x, y, keep_intermediates=False)
+    assert not hasattr(kl, "__dict__")
+    restored = pickle.loads(pickle.dumps(kl))
+    assert restored.knee == kl.knee
+    np.testing.assert_array_equal(restored.y_difference, kl.y_difference)
+
+
+def test_keep_intermediates_read_only():
+    x, y = dg.figure2()
+    kl = KneeLocator(x, y, keep_intermediates=False)
+    with pytest.raises(AttributeError, match="keep_intermediates"):
+        kl.Tmx = np.zeros(3)
+    kl = KneeLocator(x, y)
+    kl.Tmx = np.zeros(3)
+    np.testing.assert_array_equal(kl.Tmx, np.zeros(3))
+
+
+def test_plot_knee_normalized_compact():
+    """Test that plotting rebuilds the arrays of compact locators"""
+    x, y = dg.figure2()
+    kl = KneeLocator(x, y, keep_intermediates=False)
+    num_figures_before = plt.gcf().number
+    kl.plot_knee_normalized()
+    assert num_figures_before < plt.gcf().number
+
+
 def test_x_equals_y():
     """Test that knee is None when no maxima are found"""
     x = range(10)
@@ -297,7 +462,6 @@ def test_x_equals_y():
     assert kl.knee is None
 
 
-
 def test_plot_knee_normalized():
     """Test that plotting is functional"""
     x, y = dg.figure2()
@@ -560,3 +724,90 @@ def test_find_shape():
     direction, curve = find_shape(x, y)
     assert direction == "increasing"
     assert curve == "convex"
+
+
+def test_find_shape_batch():
+    """Test that find_shape_batch matches find_shape on every row"""
+    rng = np.random.RandomState(0)
+    x = np.arange(50.0)
+    y = np.cumsum(rng.normal(size=(200, 50)), axis=1)
+    for xs in (x, np.sort(rng.uniform(0, 10, size=y.shape), axis=1)):
+        directions, curves = find_shape_batch(xs, y)
+        for xi, yi, direction, curve in zip(
+            np.broadcast_to(xs, y.shape), y, directions, curves
+        ):
+            assert (direction, curve) == find_shape(xi, yi)
+
+
+@pytest.mark.parametrize(
+    "data, curve, direction",
+    [
+        (dg.concave_increasing(), "concave", "increasing"),
+        (dg.concave_decreasing(), "concave", "decreasing"),
+        (dg.convex_increasing(), "convex", "increasing"),
+        (dg.convex_decreasing(), "convex", "decreasing"),
+    ],
+)
+def test_auto_shape(data, curve, direction):
+    """Test that curve and direction can be detected with "auto" """
+    x, y = data
+    kl = KneeLocator(x, y, curve="auto", direction="auto")
+    assert kl.curve == curve
+    assert kl.direction == direction
+    assert kl.knee == KneeLocator(x, y, curve=curve, direction=direction).knee
+
+
+@pytest.mark.parametrize("interp_method", ["interp1d", "polynomial"])
+def test_dtype_float32(interp_method):
+    """Test that dtype="float32" keeps every step in single precision"""
+    x, y = dg.figure2()
+    kl = KneeLocator(x, y, interp_method=interp_method, dtype="float32")
+    assert kl.x.dtype == kl.y.dtype == np.float32
+    assert kl.x_normalized.dtype == kl.y_difference.dtype == np.float32
+    expected = KneeLocator(x, y, interp_method=interp_method)
+    assert kl.knee == pytest.approx(expected.knee, rel=1e-6)
+
+
+def test_dtype_invalid():
+    with pytest.raises(ValueError):
+        KneeLocator(range(10), range(10), dtype="int32")
+
+
+def test_integer_input():
+    """Test that integer inputs are normalized exactly, without overflow"""
+    y = np.log(np.arange(1, 201))
+    x = np.arange(-100, 100, dtype=np.int8)
+    kl = KneeLocator(x, y)
+    assert kl.knee == KneeLocator(np.arange(-100, 100), y).knee
+    assert kl.x_normalized.max() == 1.0
+
+    timestamps = 1_700_000_000_000 + 1000 * np.arange(200, dtype=np.int64)
+    kl = KneeLocator(timestamps, y)
+    np.testing.assert_array_equal(kl.x_normalized, np.arange(200) / 199)
+
+
+def test_input_not_copied():
+    x, y = dg.figure2()
+    kl = KneeLocator(x, y)
+    assert kl.x is x
+    assert kl.y is y
+
+
+@pytest.mark.parametrize(
+    "kwargs", [dict(keep_intermediates=False), dict(cache=KneeCache())]
+)
+def test_input_copied_when_read_later(kwargs):
+    """Locators that read x and y again do not follow changes to them"""
+    x, y = (np.array(a) for a in dg.figure2())
+    kl = KneeLocator(x, y, **kwargs)
+    expected = KneeLocator(x.copy(), y.copy())
+    if "cache" in kwargs:
+        # the locator itself shares x and y, only the cache entry is copied
+        assert kl.y is y
+    y[:5] = 0
+    assert kl.y_normalized[kl._knee_index(kl.knee_index)] == kl.norm_knee_y
+    np.testing.assert_array_equal(kl.y_difference, expected.y_difference)
+    if "cache" in kwargs:
+        hit = KneeLocator(x.copy(), expected.y, **kwargs)
+        assert hit.knee_y == expected.knee_y
+        np.testing.assert_array_equal(hit.y, expected.y)
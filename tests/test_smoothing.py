@@ -0,0 +1,141 @@
+import sys
+import types
+
+import numpy as np
+import pytest
+from kneed.batch import locate_knees
+from kneed.knee_locator import KneeLocator
+from kneed.smoothing import (
+    SMOOTHERS,
+    moving_average,
+    polynomial_fit,
+    register_smoother,
+    savgol,
+    spline,
+)
+
+
+def test_polynomial_fit_matches_polyfit():
+    x = np.linspace(0, 3, 50)
+    y = np.sin(x) + 0.1 * np.cos(7 * x)
+    expected = np.poly1d(np.polyfit(x, y, 5))(x)
+    np.testing.assert_allclose(polynomial_fit(x, y, 5), expected, atol=1e-10)
+    x_eval = np.linspace(0.5, 2.5, 7)
+    expected = np.poly1d(np.polyfit(x, y, 5))(x_eval)
+    np.testing.assert_allclose(polynomial_fit(x, y, 5, x_eval), expected, atol=1e-10)
+
+
+def test_polynomial_fit_batch_matches_rows():
+    rng = np.random.RandomState(0)
+    x = np.arange(40.0)
+    y = np.log1p(x) + rng.normal(scale=0.05, size=(6, 40))
+    fitted = polynomial_fit(x, y, 7)
+    for yi, fitted_i in zip(y, fitted):
+        np.testing.assert_allclose(polynomial_fit(x, yi, 7), fitted_i)
+
+
+def test_polynomial_fit_timestamps():
+    """Large x values are scaled before fitting"""
+    x = np.arange(100.0)
+    y = np.log1p(x)
+    np.testing.assert_allclose(
+        polynomial_fit(1.7e9 + 60 * x, y, 7), polynomial_fit(x, y, 7), atol=1e-8
+    )
+    kl = KneeLocator(1.7e9 + 60 * x, y, interp_method="polynomial")
+    assert (kl.knee - 1.7e9) / 60 == KneeLocator(x, y, interp_method="polynomial").knee
+
+
+@pytest.mark.parametrize(
+    "x", [np.arange(5.0), np.array([0.0, 0.0, 1.0, 1.0, 2.0, 2.0, 3.0, 3.0, 4.0])]
+)
+def test_polynomial_fit_rank_deficient(x):
+    """Too few distinct x values for the degree fall back to least squares"""
+    y = x**2
+    np.testing.assert_allclose(polynomial_fit(x, y, 7), y, atol=1e-8)
+
+
+def noisy_log(n=400, seed=0):
+    rng = np.random.RandomState(seed)
+    x = np.linspace(1, 10, n)
+    return x, np.log(x) + rng.normal(scale=0.05, size=n)
+
+
+def test_moving_average():
+    x, y = noisy_log()
+    smoothed = moving_average(x, y, window=5)
+    np.testing.assert_allclose(
+        smoothed[2:-2], np.convolve(y, np.ones(5) / 5, mode="valid")
+    )
+    assert smoothed[0] == pytest.approx(y[:3].mean())
+    np.testing.assert_allclose(
+        moving_average(x, np.vstack([y, y]), window=5)[1], smoothed
+    )
+
+
+@pytest.mark.parametrize("window_length, polyorder", [(11, 2), (151, 3), (399, 2)])
+def test_savgol_matches_scipy(window_length, polyorder):
+    from scipy.signal import savgol_filter
+
+    x, y = noisy_log()
+    y = np.vstack([y, y[::-1]])
+    np.testing.assert_allclose(
+        savgol(x, y, window_length, polyorder),
+        savgol_filter(y, window_length, polyorder, axis=-1, mode="interp"),
+        atol=1e-12,
+    )
+
+
+@pytest.mark.parametrize("smoother", [moving_average, savgol, spline])
+def test_smoothers_reduce_noise(smoother):
+    x, y = noisy_log()
+    residual = smoother(x, y) - np.log(x)
+    assert np.abs(residual).mean() < 0.5 * np.abs(y - np.log(x)).mean()
+
+
+@pytest.mark.parametrize("interp_method", ["savgol", "moving_average", "spline"])
+def test_knee_locator_smoothers(interp_method):
+    x, y = noisy_log()
+    kl = KneeLocator(x, y, S=3.0, interp_method=interp_method)
+    assert kl.knee == pytest.approx(KneeLocator(x, np.log(x)).knee, abs=1.0)
+    results = locate_knees(x, y[np.newaxis], S=3.0, interp_method=interp_method)
+    assert results[0][0] == kl.knee
+
+
+def test_interp_kwargs():
+    x, y = noisy_log()
+    kl = KneeLocator(x, y, interp_method="moving_average", interp_kwargs={"window": 7})
+    np.testing.assert_array_equal(kl.Ds_y, moving_average(x, y, window=7))
+
+
+def test_register_smoother():
+    x, y = noisy_log()
+    calls = []
+
+    @register_smoother("clipped")
+    def clipped(x, y, upper=np.inf):
+        calls.append(upper)
+        return np.minimum(y, upper)
+
+    try:
+        kl = KneeLocator(x, y, interp_method="clipped", interp_kwargs={"upper": 2.0})
+        assert calls == [2.0]
+        assert kl.Ds_y.max() == 2.0
+    finally:
+        del SMOOTHERS["clipped"]
+
+    with pytest.raises(ValueError):
+        register_smoother("interp1d", clipped)
+    with pytest.raises(ValueError):
+        KneeLocator(x, y, interp_method="clipped")
+
+
+@pytest.mark.parametrize(
+    "smoother, module, version",
+    [(savgol, "scipy.signal", "1.4"), (spline, "scipy.interpolate", "1.10")],
+)
+def test_old_scipy(monkeypatch, smoother, module, version):
+    """Smoothers that need a newer scipy say which version"""
+    monkeypatch.setitem(sys.modules, module, types.ModuleType(module))
+    x = np.linspace(1, 10, 100)
+    with pytest.raises(ImportError, match="scipy {} or later".format(version)):
+        smoother(x, np.log(x))